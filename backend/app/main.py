@@ -1,18 +1,133 @@
 from fastapi import FastAPI
-from fastapi.staticfiles import StaticFiles
-from fastapi.responses import FileResponse
+from fastapi.responses import FileResponse, ORJSONResponse
 from fastapi.middleware.cors import CORSMiddleware
 from app.routes import health, user, auth
 from app.routers.phonics import flashcards, sound_out, games, progress, mouth_moves, homophone_quiz
-from app.routers import achievements
+from app.routers import achievements, bootstrap, leaderboard, push
+from app.services.content import load_catalog, watch_content, RELOAD_INTERVAL
+from app.services.compression import PrecompressedStaticFiles
+from app.services.auth import progress_log, user_store, watch_guests, watch_users
+from app.services.item_stats import item_stats, watch_item_stats
+from app.services.leaderboard import get_leaderboard
+from app.services.push import watch_push
+from app.services.reviews import watch_reviews
+import asyncio
 import os
 
 app = FastAPI(
     title="SoundSteps API",
     description="Backend API for SoundSteps - Interactive Phonics Learning Platform",
-    version="1.2.0"
+    version="1.2.0",
+    default_response_class=ORJSONResponse
 )
 
+content_watcher = None
+guest_sweeper = None
+user_sync = None
+push_relay = None
+review_batch = None
+item_stats_flusher = None
+
+@app.on_event("startup")
+async def load_content():
+    """
+    Load and validate all content files once, before serving requests,
+    then keep watching them for edits.
+    """
+    global content_watcher
+    load_catalog()
+    if RELOAD_INTERVAL > 0:
+        content_watcher = asyncio.create_task(watch_content(RELOAD_INTERVAL))
+
+@app.on_event("startup")
+async def start_guest_sweeper():
+    """
+    Periodically drop idle guests from memory and storage.
+    """
+    global guest_sweeper
+    guest_sweeper = asyncio.create_task(watch_guests())
+
+@app.on_event("startup")
+async def start_user_sync():
+    """
+    Apply other workers' user changes and token revocations in the background.
+    """
+    global user_sync
+    user_sync = asyncio.create_task(watch_users())
+
+@app.on_event("startup")
+async def apply_achievement_rules():
+    """
+    Recompute learners' XP and achievements if achievements.json changed
+    since they were computed (the first worker does; the rest find it done).
+    """
+    await asyncio.to_thread(progress_log.apply_rules)
+
+@app.on_event("startup")
+async def build_leaderboard():
+    """
+    Build this worker's leaderboard before serving requests.
+    """
+    await asyncio.to_thread(get_leaderboard)
+
+@app.on_event("startup")
+async def start_push_relay():
+    """
+    Relay progress and leaderboard changes to this worker's event streams.
+    """
+    global push_relay
+    push_relay = asyncio.create_task(watch_push())
+
+@app.on_event("startup")
+async def start_review_batch():
+    """
+    Reschedule overdue flashcard and sound-out reviews once a night.
+    """
+    global review_batch
+    review_batch = asyncio.create_task(watch_reviews(progress_log))
+
+@app.on_event("startup")
+async def start_item_stats_flusher():
+    """
+    Share graded answers' per-item counts with the other workers every few seconds.
+    """
+    global item_stats_flusher
+    item_stats_flusher = asyncio.create_task(watch_item_stats())
+
+@app.on_event("shutdown")
+async def stop_background_tasks():
+    """
+    Stop the content hot-reload, guest sweeper, user sync, push relay,
+    review batch and item statistics tasks.
+    """
+    if content_watcher is not None:
+        content_watcher.cancel()
+    if guest_sweeper is not None:
+        guest_sweeper.cancel()
+    if user_sync is not None:
+        user_sync.cancel()
+    if push_relay is not None:
+        push_relay.cancel()
+    if review_batch is not None:
+        review_batch.cancel()
+    if item_stats_flusher is not None:
+        item_stats_flusher.cancel()
+
+@app.on_event("shutdown")
+def flush_user_store():
+    """
+    Write out any user changes still pending in the persistence backend.
+    """
+    user_store.close()
+
+@app.on_event("shutdown")
+def flush_item_stats():
+    """
+    Write out per-item counts not yet flushed.
+    """
+    item_stats.flush()
+    item_stats.close()
+
 # CORS middleware (allow frontend to access API)
 app.add_middleware(
     CORSMiddleware,
@@ -85,16 +200,38 @@ app.include_router(
     tags=["Achievements"]
 )
 
+# XP standings, globally and per class
+app.include_router(
+    leaderboard.router,
+    prefix="/api/leaderboard",
+    tags=["Leaderboard"]
+)
+
+# Server-Sent Events: XP, unlocks and standings as they change
+app.include_router(
+    push.router,
+    prefix="/api/push",
+    tags=["Push"]
+)
+
+# Single-request startup payload for the SPA
+app.include_router(
+    bootstrap.router,
+    prefix="/api/bootstrap",
+    tags=["Bootstrap"]
+)
+
 # Serve static files (frontend and assets)
 static_dir = os.path.join(os.path.dirname(__file__), "../../static")
 # Assets are now consolidated under static/assets/
 assets_dir = os.path.join(os.path.dirname(__file__), "../../static/assets")
 
 if os.path.exists(static_dir):
-    app.mount("/static", StaticFiles(directory=static_dir), name="static")
+    # Serves .gz/.br variants by Accept-Encoding instead of compressing per request
+    app.mount("/static", PrecompressedStaticFiles(directory=static_dir), name="static")
 if os.path.exists(assets_dir):
     # Mount assets at /assets for backwards compatibility with existing data files
-    app.mount("/assets", StaticFiles(directory=assets_dir), name="assets")
+    app.mount("/assets", PrecompressedStaticFiles(directory=assets_dir), name="assets")
 
 @app.get("/", tags=["Root"])
 async def root():
@@ -3,12 +3,21 @@ Authentication Middleware
 Handles JWT token verification and route protection
 """
 
-from fastapi import Depends, HTTPException, status
+from fastapi import Depends, HTTPException, Request, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from typing import Optional
+import asyncio
+import time
 
-from app.services.auth import verify_token, get_user_by_id
-from app.models.user import User
+from app.services import metrics
+from app.services.auth import (
+    verify_token,
+    get_user_by_id,
+    principal_cache,
+    token_denylist,
+    touch_guest,
+)
+from app.models.user import Principal, User
 
 # Security scheme for JWT bearer token
 security = HTTPBearer()
@@ -24,42 +33,74 @@ async def get_current_user(
         credentials: HTTP Bearer token from Authorization header
         
     Returns:
-        Current user object
+        Current user object (a read-only Principal shared with other
+        requests of the same token)
         
     Raises:
         HTTPException: If token is invalid or user not found
     """
-    credentials_exception = HTTPException(
+    start = time.perf_counter()
+    try:
+        # Other workers' user changes reach this cache through watch_users,
+        # so nothing here waits on the user store
+        cached = principal_cache.get(credentials.credentials)
+        if cached is not None:
+            # Revocation does not reach this cache, so every hit checks the
+            # denylist's Bloom filter in memory (other workers' revocations
+            # reach it through watch_users); only a positive reads SQLite
+            claims, principal = cached
+            jti = claims.get("jti")
+            if token_denylist.might_be_revoked(jti) and await asyncio.to_thread(token_denylist.is_revoked, jti):
+                principal_cache.invalidate_token(credentials.credentials)
+                raise credentials_exception()
+            if principal.is_guest:
+                # Keep the guest from looking idle to the sweeper
+                await touch_guest(principal.id)
+            return principal
+        return await asyncio.to_thread(verify_principal, credentials.credentials)
+    finally:
+        metrics.observe("auth_request", time.perf_counter() - start)
+
+
+def credentials_exception() -> HTTPException:
+    return HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Could not validate credentials",
         headers={"WWW-Authenticate": "Bearer"},
     )
+
+
+def verify_principal(token: str) -> Principal:
+    """
+    Verify a token and look up its user (the principal cache's miss path)
+    
+    Reads the denylist and the user store: call it from a thread.
+    
+    Raises:
+        HTTPException: If token is invalid or revoked, or user not found
+    """
+    version = principal_cache.version
     
     # Verify token
-    payload = verify_token(credentials.credentials)
-    if payload is None:
-        raise credentials_exception
+    payload = verify_token(token)
+    if payload is None or token_denylist.is_revoked(payload.get("jti")):
+        raise credentials_exception()
     
     # Extract user ID from token
     user_id: str = payload.get("sub")
     if user_id is None:
-        raise credentials_exception
+        raise credentials_exception()
     
     # Get user from database
     user_in_db = get_user_by_id(user_id)
     if user_in_db is None:
-        raise credentials_exception
+        raise credentials_exception()
     
-    # Return user without password
-    return User(
-        id=user_in_db.id,
-        username=user_in_db.username,
-        email=user_in_db.email,
-        is_guest=user_in_db.is_guest,
-        created_at=user_in_db.created_at,
-        last_active=user_in_db.last_active,
-        progress=user_in_db.progress
-    )
+    # Return user without password or progress (which changes with every
+    # recorded event; /auth/me reads it from the progress log)
+    principal = user_in_db.to_model(Principal, progress=False)
+    principal_cache.put(token, payload, principal, version)
+    return principal
 
 
 async def get_current_active_user(
@@ -103,7 +144,7 @@ async def get_current_registered_user(
 
 # Optional token (for endpoints that work with or without auth)
 class OptionalHTTPBearer(HTTPBearer):
-    async def __call__(self, request):
+    async def __call__(self, request: Request):
         try:
             return await super().__call__(request)
         except HTTPException:
@@ -132,3 +173,18 @@ async def get_current_user_optional(
         return await get_current_user(credentials)
     except HTTPException:
         return None
+
+
+async def request_user_optional(request: Request) -> Optional[User]:
+    """
+    get_current_user_optional for routes that only sometimes need the
+    caller: called from the route body, so requests that don't need the
+    caller skip token verification
+    
+    Args:
+        request: The incoming request
+        
+    Returns:
+        Current user object or None if not authenticated
+    """
+    return await get_current_user_optional(await optional_security(request))
@@ -0,0 +1,45 @@
+"""
+Leaderboard Models for SoundSteps
+Pages of XP standings and class membership
+"""
+
+from pydantic import BaseModel, Field
+from typing import List, Literal, Optional
+
+Scope = Literal["global", "class"]
+Period = Literal["all", "week", "day"]
+
+
+class LeaderboardEntry(BaseModel):
+    """One learner's place on a board"""
+    rank: int
+    username: str
+    xp: int
+    is_me: bool = False
+
+
+class LeaderboardStanding(BaseModel):
+    """The caller's own place (rank is None until they have XP there)"""
+    rank: Optional[int] = None
+    xp: int = 0
+
+
+class LeaderboardPage(BaseModel):
+    """A slice of one board"""
+    scope: Scope
+    period: Period
+    window: Optional[str] = Field(None, description="UTC day (2026-10-18) or ISO week (2026-W42); none for all time")
+    class_code: Optional[str] = None
+    total: int
+    entries: List[LeaderboardEntry] = []
+    me: LeaderboardStanding
+
+
+class ClassJoin(BaseModel):
+    """Class code shared by a teacher"""
+    code: str = Field(..., pattern=r"^[A-Za-z0-9-]{3,20}$")
+
+
+class ClassMembership(BaseModel):
+    """The class a learner is in, if any"""
+    class_code: Optional[str] = None
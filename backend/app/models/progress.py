@@ -0,0 +1,129 @@
+"""
+Progress Models for SoundSteps
+Learning events posted by the client and the dashboard built from a
+learner's running aggregates
+"""
+
+from pydantic import BaseModel, Field, model_validator
+from typing import Dict, List, Literal, Optional
+
+# Events accepted in one POST /api/progress/events
+MAX_EVENT_BATCH = 500
+
+EventType = Literal["card_view", "answer", "time_spent", "module_complete"]
+
+
+class ProgressEvent(BaseModel):
+    """
+    One learning event
+
+    - **card_view**: an item (flashcard, word, question) was shown
+    - **answer**: an item was answered; `correct` is required
+    - **time_spent**: `seconds` of activity in the module
+    - **module_complete**: the module was finished (XP once per day)
+    """
+    type: EventType
+    module: str = Field(..., min_length=1, max_length=32)
+    item_id: Optional[int] = Field(None, ge=0)
+    correct: Optional[bool] = None
+    seconds: float = Field(0, ge=0, le=86400)
+    at: Optional[float] = Field(None, description="Epoch seconds on the client (default: when received)")
+    key: Optional[str] = Field(None, min_length=1, max_length=64, description="Idempotency key, unique per learner")
+
+    @model_validator(mode="after")
+    def answer_needs_result(self):
+        if self.type == "answer" and self.correct is None:
+            raise ValueError("answer events need correct")
+        return self
+
+
+class ProgressEventBatch(BaseModel):
+    """Events recorded since the client's last upload, oldest first"""
+    events: List[ProgressEvent] = Field(..., min_length=1, max_length=MAX_EVENT_BATCH)
+    utc_offset_minutes: int = Field(0, ge=-840, le=840, description="Learner's offset from UTC, for streak days")
+
+
+class SyncEvent(ProgressEvent):
+    """A queued event; its key makes resending it harmless"""
+    key: str = Field(..., min_length=1, max_length=64, description="Idempotency key, unique per learner")
+
+
+class ProgressSyncBatch(BaseModel):
+    """
+    A client's whole offline queue (possibly empty) and the cursor of its
+    last successful sync
+    """
+    events: List[SyncEvent] = Field([], max_length=MAX_EVENT_BATCH)
+    cursor: int = Field(0, ge=0, description="Cursor from the last sync (0: none)")
+    utc_offset_minutes: int = Field(0, ge=-840, le=840, description="Learner's offset from UTC, for streak days")
+
+
+class ModuleProgress(BaseModel):
+    """Running totals for one module"""
+    views: int = 0
+    answers: int = 0
+    correct: int = 0
+    accuracy: float = 0.0
+    time_spent: float = 0.0
+    completions: int = 0
+    last_completed: Optional[str] = None
+
+
+class UnlockedAchievement(BaseModel):
+    """An achievement a learner holds, as defined in the achievements configuration"""
+    id: str
+    kind: Literal["module", "streak"]
+    name: str
+    description: str = ""
+    icon: str = ""
+    xp: int = Field(0, description="Bonus XP the achievement awarded")
+    unlocked_at: int = Field(..., description="Epoch seconds")
+
+
+class ProgressDashboard(BaseModel):
+    """A learner's progress summary, read from their aggregate row"""
+    cursor: int = 0
+    events: int = 0
+    xp: int = 0
+    level: int = 1
+    xp_per_level: int
+    level_progress: float = 0.0
+    current_streak: int = 0
+    best_streak: int = 0
+    last_active_day: Optional[str] = None
+    answers: int = 0
+    correct: int = 0
+    accuracy: float = 0.0
+    time_spent: float = 0.0
+    cards_viewed: int = 0
+    modules: Dict[str, ModuleProgress] = {}
+    achievements: List[UnlockedAchievement] = []
+
+
+class ProgressIngestResult(BaseModel):
+    """Outcome of posting a batch of events"""
+    accepted: int
+    duplicates: int = 0
+    rejected: List[int] = Field([], description="Positions in events of events naming an unknown module (not recorded)")
+    xp_awarded: int
+    completed_modules: List[str] = []
+    unlocked: List[UnlockedAchievement] = []
+    leveled_up: bool = False
+    dashboard: ProgressDashboard
+
+
+class ProgressSyncResult(BaseModel):
+    """
+    Outcome of a sync: what was applied and the learner's state as a
+    delta from the client's cursor (totals always, modules only if they
+    changed after it). Keep `state.cursor` for the next sync.
+    """
+    applied: int
+    duplicates: int
+    rejected: List[str] = Field([], description="Keys of events naming an unknown module (not recorded)")
+    xp_awarded: int
+    completed_modules: List[str] = []
+    unlocked: List[UnlockedAchievement] = []
+    leveled_up: bool = False
+    full: bool = Field(..., description="True if state.modules lists every module (cursor unknown or 0)")
+    state: ProgressDashboard
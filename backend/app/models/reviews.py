@@ -0,0 +1,32 @@
+"""
+Review Models for SoundSteps
+A learner's spaced-repetition queue for a deck (flashcards, sound-out words)
+"""
+
+from pydantic import BaseModel, Field
+from typing import Any, Dict, List, Optional
+
+
+class ReviewSchedule(BaseModel):
+    """Where the learner stands with an item (SM-2)"""
+    ease: float
+    interval: int = Field(..., description="Days between the last review and the next")
+    reps: int = Field(..., description="Passing reviews in a row")
+    lapses: int
+    due: float = Field(..., description="Epoch seconds")
+    reviewed_at: float = Field(..., description="Epoch seconds")
+
+
+class ReviewItem(BaseModel):
+    """A deck item to study, with its schedule (None for an item never reviewed)"""
+    item: Dict[str, Any]
+    review: Optional[ReviewSchedule] = None
+
+
+class ReviewQueue(BaseModel):
+    """The next items to study: due ones first, then new ones"""
+    deck: str
+    items: List[ReviewItem]
+    due: int = Field(..., description="Items due now, including any beyond this page (counted up to 999)")
+    new: int = Field(..., description="Items in this page never reviewed")
+    next_due: Optional[float] = Field(None, description="When the next item not yet due comes due")
@@ -3,7 +3,7 @@ User Model for SoundSteps Authentication System
 Handles user data structure and validation
 """
 
-from pydantic import BaseModel, EmailStr, Field
+from pydantic import BaseModel, ConfigDict, EmailStr, Field
 from typing import Optional, Dict, Any
 from datetime import datetime
 import uuid
@@ -32,7 +32,10 @@ class GuestCreate(BaseModel):
 
 
 class UserInDB(UserBase):
-    """User model as stored in database"""
+    """
+    User as stored (users.json entries, SQLite rows); in memory users are
+    held as the compact models.user_record.UserRecord
+    """
     id: str
     hashed_password: str
     is_guest: bool = False
@@ -50,6 +53,15 @@ class User(UserBase):
     progress: Dict[str, Any] = {}
 
 
+class Principal(User):
+    """
+    Read-only user projection of an authenticated caller, shared between
+    requests by the principal cache. Progress is left empty, so recording
+    progress does not invalidate it
+    """
+    model_config = ConfigDict(frozen=True)
+
+
 class Token(BaseModel):
     """JWT token response"""
     access_token: str
@@ -0,0 +1,232 @@
+"""
+Compact User Record
+In-memory representation of a user: a slotted object with epoch-second
+timestamps, completed flashcards as a bitset and interned names. The
+pydantic models in models/user.py are only built from it at the API
+boundary; the stored formats (users.json, SQLite rows) are unchanged
+"""
+
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional, Type, TypeVar
+import copy
+import os
+import sys
+import threading
+
+from pydantic import BaseModel
+
+GUEST_EMAIL_DOMAIN = "guest.soundsteps.app"
+
+# Numeric progress fields kept in slots, in the order progress dicts list them
+PROGRESS_COUNTERS = (
+    "soundout_completed",
+    "games_completed",
+    "minimal_pairs_completed",
+    "total_time_spent",
+    "current_streak",
+)
+
+# Flashcard IDs at or above this are not given a bit (the list is kept as is)
+MAX_FLASHCARD_BIT = 1 << 16
+
+# Records are changed and read under one of these locks, picked by user ID:
+# updates to different users rarely contend, and nobody (persistence, the
+# principal cache) sees a half-applied update. Reentrant, so a holder can
+# still serialize the record
+USER_LOCK_STRIPES = int(os.getenv("USER_LOCK_STRIPES", "64"))
+_stripes = [threading.RLock() for _ in range(USER_LOCK_STRIPES)]
+
+Model = TypeVar("Model", bound=BaseModel)
+
+
+def record_lock(user_id: str) -> threading.RLock:
+    """The lock stripe guarding a user's record"""
+    return _stripes[hash(user_id) % len(_stripes)]
+
+
+def to_epoch(iso: str) -> int:
+    """Epoch seconds of a stored (naive UTC) ISO timestamp"""
+    try:
+        return int(datetime.fromisoformat(iso).replace(tzinfo=timezone.utc).timestamp())
+    except (TypeError, ValueError):
+        return 0
+
+
+def to_iso(epoch: int) -> str:
+    """Naive UTC ISO timestamp, as the API and stored formats use"""
+    return datetime.fromtimestamp(epoch, timezone.utc).replace(tzinfo=None).isoformat()
+
+
+def _is_number(value: Any) -> bool:
+    return isinstance(value, (int, float)) and not isinstance(value, bool)
+
+
+class UserRecord:
+    """
+    One user (registered or guest)
+
+    A guest's placeholder email is derived from the ID rather than stored.
+    Progress lives in typed slots: the flashcards_completed list as an int
+    bitset over flashcard IDs and the known counters as numbers. Progress
+    keys the record has no slot for (or values of an unexpected type) are
+    kept verbatim in `extra`, which is None for almost every user.
+
+    Change a record only while holding its `lock`, and persist it after
+    releasing the lock: a snapshot takes the lock of each record in turn,
+    so holding one stripe while persisting could deadlock with another
+    thread doing the same.
+    """
+
+    __slots__ = (
+        "id", "_username", "_email", "hashed_password", "is_guest",
+        "created_at", "last_active", "flashcards", *PROGRESS_COUNTERS, "extra",
+    )
+
+    def __init__(
+        self,
+        id: str,
+        username: str,
+        email: Optional[str],
+        hashed_password: str,
+        is_guest: bool,
+        created_at: int,
+        last_active: int,
+        progress: Optional[Dict[str, Any]] = None
+    ):
+        self.id = id
+        self.username = username
+        self.hashed_password = hashed_password
+        self.is_guest = is_guest
+        self.email = email
+        self.created_at = created_at
+        self.last_active = last_active
+        self.flashcards = 0
+        for name in PROGRESS_COUNTERS:
+            setattr(self, name, 0)
+        self.extra: Optional[Dict[str, Any]] = None
+        if progress:
+            self.update_progress(progress)
+
+    @property
+    def lock(self) -> threading.RLock:
+        return record_lock(self.id)
+
+    @property
+    def username(self) -> str:
+        return self._username
+
+    @username.setter
+    def username(self, value: str):
+        # Many users share a name ("Guest"); keep one copy of each
+        self._username = sys.intern(value)
+
+    @property
+    def email(self) -> str:
+        return self._email if self._email is not None else f"{self.id}@{GUEST_EMAIL_DOMAIN}"
+
+    @email.setter
+    def email(self, value: Optional[str]):
+        # The placeholder is not stored
+        if value == f"{self.id}@{GUEST_EMAIL_DOMAIN}":
+            value = None
+        self._email = value
+
+    @property
+    def progress(self) -> Dict[str, Any]:
+        """Progress as a fresh dict (changing it does not change the record)"""
+        with self.lock:
+            progress: Dict[str, Any] = {"flashcards_completed": self.completed_flashcards()}
+            for name in PROGRESS_COUNTERS:
+                progress[name] = getattr(self, name)
+            if self.extra:
+                progress.update(copy.deepcopy(self.extra))
+        return progress
+
+    def completed_flashcards(self) -> List[int]:
+        """IDs of completed flashcards, ascending"""
+        bits, ids, card_id = self.flashcards, [], 0
+        while bits:
+            if bits & 1:
+                ids.append(card_id)
+            bits >>= 1
+            card_id += 1
+        return ids
+
+    def update_progress(self, update: Dict[str, Any]):
+        """Merge progress fields into the record (like dict.update)"""
+        with self.lock:
+            self._update_progress(update)
+
+    def _update_progress(self, update: Dict[str, Any]):
+        for key, value in update.items():
+            if key == "flashcards_completed" and isinstance(value, list) and all(
+                isinstance(card_id, int) and not isinstance(card_id, bool) and 0 <= card_id < MAX_FLASHCARD_BIT
+                for card_id in value
+            ):
+                bits = 0
+                for card_id in value:
+                    bits |= 1 << card_id
+                self.flashcards = bits
+                self._drop_extra(key)
+            elif key in PROGRESS_COUNTERS and _is_number(value):
+                setattr(self, key, value)
+                self._drop_extra(key)
+            else:
+                if key == "flashcards_completed":
+                    self.flashcards = 0
+                elif key in PROGRESS_COUNTERS:
+                    setattr(self, key, 0)
+                if self.extra is None:
+                    self.extra = {}
+                self.extra[key] = value
+
+    def _drop_extra(self, key: str):
+        if self.extra and key in self.extra:
+            del self.extra[key]
+            if not self.extra:
+                self.extra = None
+
+    def to_model(self, model: Type[Model], progress: bool = True) -> Model:
+        """Build an API model (User, Principal, ...) from the record, with or without progress"""
+        with self.lock:
+            fields = dict(
+                id=self.id,
+                username=self.username,
+                email=self.email,
+                is_guest=self.is_guest,
+                created_at=to_iso(self.created_at),
+                last_active=to_iso(self.last_active),
+                progress=self.progress if progress else {}
+            )
+        return model(**fields)
+
+    def to_dict(self) -> Dict[str, Any]:
+        """The stored form (the field layout of models.user.UserInDB), as of one instant"""
+        with self.lock:
+            return {
+                "username": self.username,
+                "email": self.email,
+                "id": self.id,
+                "hashed_password": self.hashed_password,
+                "is_guest": self.is_guest,
+                "created_at": to_iso(self.created_at),
+                "last_active": to_iso(self.last_active),
+                "progress": self.progress,
+            }
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "UserRecord":
+        """Build a record from its stored form"""
+        return cls(
+            id=data["id"],
+            username=data["username"],
+            email=data["email"],
+            hashed_password=data["hashed_password"],
+            is_guest=data.get("is_guest", False),
+            created_at=to_epoch(data["created_at"]),
+            last_active=to_epoch(data["last_active"]),
+            progress=data.get("progress")
+        )
+
+    def __repr__(self) -> str:
+        return f"UserRecord(id={self.id!r}, username={self.username!r}, is_guest={self.is_guest})"
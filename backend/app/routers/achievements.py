@@ -1,29 +1,13 @@
-from fastapi import APIRouter
-import json
-import os
+from fastapi import APIRouter, Request
 
-router = APIRouter()
+from app.services.content import get_catalog
+from app.services.http_cache import cached_json
 
-DATA_FILE = os.path.join(os.path.dirname(__file__), "../../data/achievements.json")
+router = APIRouter()
 
 @router.get("/", summary="Get achievements configuration")
-async def get_achievements():
+async def get_achievements(request: Request):
     """
     Returns the achievements configuration including XP values and achievement definitions.
     """
-    try:
-        with open(DATA_FILE, 'r', encoding='utf-8') as f:
-            achievements = json.load(f)
-        return achievements
-    except FileNotFoundError:
-        return {
-            "modules": {},
-            "streaks": {},
-            "xpPerLevel": 500
-        }
-    except json.JSONDecodeError:
-        return {
-            "modules": {},
-            "streaks": {},
-            "xpPerLevel": 500
-        }
+    return cached_json(request, get_catalog().achievements_body)
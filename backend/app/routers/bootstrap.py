@@ -0,0 +1,48 @@
+from fastapi import APIRouter, HTTPException, Query, Request
+from typing import Optional
+import asyncio
+
+from app.services.content import BOOTSTRAP_MODULES, get_catalog
+from app.services.http_cache import cached_json
+
+router = APIRouter()
+
+# A request pinned to the current version can be cached for good
+IMMUTABLE_CACHE_CONTROL = "public, max-age=31536000, immutable"
+
+@router.get("", summary="Get all startup content in one request")
+async def get_bootstrap(
+    request: Request,
+    modules: Optional[str] = Query(
+        None,
+        description="Comma-separated modules to include (default: all): " + ", ".join(BOOTSTRAP_MODULES)
+    ),
+    version: Optional[str] = Query(None, description="Content version the client expects")
+):
+    """
+    Returns every module's content plus the achievements configuration,
+    replacing one round trip per module on app startup.
+    The payload carries a content version; requesting it again with
+    ?version= pins the response so browsers can cache it indefinitely.
+    """
+    if modules:
+        requested = {name.strip() for name in modules.split(",") if name.strip()}
+        unknown = requested - set(BOOTSTRAP_MODULES)
+        if unknown:
+            raise HTTPException(
+                status_code=400,
+                detail=f"Unknown modules: {', '.join(sorted(unknown))}"
+            )
+        selection = tuple(name for name in BOOTSTRAP_MODULES if name in requested)
+    else:
+        selection = BOOTSTRAP_MODULES
+
+    catalog = get_catalog()
+    prepared = catalog.bootstrap_bodies.get(selection)
+    if prepared is None:
+        # Encoding and compressing is CPU work, keep it off the event loop
+        prepared = await asyncio.to_thread(catalog.bootstrap_body, selection)
+
+    if version == catalog.version:
+        return cached_json(request, prepared, IMMUTABLE_CACHE_CONTROL)
+    return cached_json(request, prepared)
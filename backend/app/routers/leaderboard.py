@@ -0,0 +1,77 @@
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+
+from app.middleware.auth_middleware import get_current_user
+from app.models.leaderboard import ClassJoin, ClassMembership, LeaderboardPage, Period, Scope
+from app.models.user import User
+from app.services.auth import display_names, progress_log
+from app.services.leaderboard import get_leaderboard
+
+router = APIRouter()
+
+
+def page_response(result, current_user: User) -> dict:
+    """Attach usernames to a leaderboard result"""
+    if result is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Not in a class")
+    names = display_names([user_id for _, user_id, _ in result["entries"]])
+    result["entries"] = [
+        {"rank": rank, "username": names.get(user_id, "Learner"), "xp": xp, "is_me": user_id == current_user.id}
+        for rank, user_id, xp in result["entries"]
+    ]
+    return result
+
+
+@router.get("/", response_model=LeaderboardPage, summary="Leaderboard standings")
+def standings(
+    scope: Scope = "global",
+    period: Period = "all",
+    offset: int = Query(0, ge=0),
+    limit: int = Query(10, ge=1, le=100),
+    current_user: User = Depends(get_current_user)
+):
+    """
+    A page of XP standings (top K from offset 0) and the caller's rank
+
+    - **scope**: `global`, or `class` for the caller's class
+    - **period**: `all` time, this ISO `week` or to`day` (UTC)
+    """
+    return page_response(
+        get_leaderboard().standings(scope, period, current_user.id, offset, limit), current_user
+    )
+
+
+@router.get("/around", response_model=LeaderboardPage, summary="Learners around me")
+def around_me(
+    scope: Scope = "global",
+    period: Period = "all",
+    count: int = Query(5, ge=1, le=25),
+    current_user: User = Depends(get_current_user)
+):
+    """
+    The caller's rank with up to `count` learners above and below
+    """
+    return page_response(
+        get_leaderboard().neighbors(scope, period, current_user.id, count), current_user
+    )
+
+
+@router.get("/class", response_model=ClassMembership, summary="My class")
+def my_class(current_user: User = Depends(get_current_user)):
+    return {"class_code": progress_log.class_of(current_user.id)}
+
+
+@router.put("/class", response_model=ClassMembership, summary="Join a class")
+def join_class(membership: ClassJoin, current_user: User = Depends(get_current_user)):
+    """
+    Join the class with this code (leaving any other); the class board
+    ranks its members by the same XP as the global one
+    """
+    class_code = membership.code.upper()
+    progress_log.set_class(current_user.id, class_code)
+    return {"class_code": class_code}
+
+
+@router.delete("/class", response_model=ClassMembership, summary="Leave my class")
+def leave_class(current_user: User = Depends(get_current_user)):
+    progress_log.set_class(current_user.id, None)
+    return {"class_code": None}
@@ -1,39 +1,49 @@
-from fastapi import APIRouter, HTTPException
-import json
-import os
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
+
+from app.middleware.auth_middleware import get_current_user
+from app.models.reviews import ReviewQueue
+from app.models.user import User
+from app.services.auth import progress_log
+from app.services.content import Dataset, get_catalog
+from app.services.http_cache import cached_json
+from app.services.reviews import next_items
 
 router = APIRouter()
 
-DATA_FILE = os.path.join(os.path.dirname(__file__), "../../../data/flashcards.json")
+
+def _flashcards() -> Dataset:
+    dataset = get_catalog().get("flashcards")
+    if dataset is None:
+        raise HTTPException(status_code=500, detail="Flashcards data is unavailable")
+    return dataset
 
 @router.get("/", summary="Get all phonics flashcards")
-async def get_flashcards():
+async def get_flashcards(request: Request):
     """
     Returns the complete list of phonics flashcards A-Z.
     Each card includes letter, word, image, audio, and phoneme.
     """
-    try:
-        with open(DATA_FILE, 'r') as f:
-            flashcards = json.load(f)
-        return {"cards": flashcards, "total": len(flashcards)}
-    except FileNotFoundError:
-        raise HTTPException(status_code=500, detail="Flashcards data file not found")
-    except json.JSONDecodeError:
-        raise HTTPException(status_code=500, detail="Invalid flashcards data format")
+    dataset = _flashcards()
+    return cached_json(request, dataset.listing_body)
+
+@router.get("/next", response_model=ReviewQueue, summary="Next flashcards to study")
+def next_flashcards(count: int = Query(10, ge=1, le=50), current_user: User = Depends(get_current_user)):
+    """
+    The caller's next `count` flashcards: those due for review (spaced
+    repetition, most overdue first), then ones never seen. Views and
+    answers recorded through /api/progress reschedule them.
+    """
+    dataset = _flashcards()
+    queue = progress_log.review_queue(current_user.id, "flashcards", count, dataset.item_ids)
+    return next_items(dataset, queue, count)
 
 @router.get("/{card_id}", summary="Get specific flashcard by ID")
-async def get_flashcard(card_id: int):
+async def get_flashcard(card_id: int, request: Request):
     """
     Returns a single flashcard by its ID.
     """
-    try:
-        with open(DATA_FILE, 'r') as f:
-            flashcards = json.load(f)
-        
-        card = next((c for c in flashcards if c["id"] == card_id), None)
-        if not card:
-            raise HTTPException(status_code=404, detail="Flashcard not found")
-        
-        return card
-    except FileNotFoundError:
-        raise HTTPException(status_code=500, detail="Flashcards data file not found")
+    card = _flashcards().get_body(card_id)
+    if not card:
+        raise HTTPException(status_code=404, detail="Flashcard not found")
+    
+    return cached_json(request, card)
@@ -1,94 +1,148 @@
-from fastapi import APIRouter, HTTPException
-from pydantic import BaseModel
-import json
-import os
+from fastapi import APIRouter, HTTPException, Query, Request
+from pydantic import BaseModel, Field
+from typing import List, Literal, Optional
 
-router = APIRouter()
+from app.middleware.auth_middleware import request_user_optional
+from app.services.content import Dataset, get_catalog
+from app.services.grading import grade_answer, grade_round
+from app.services.http_cache import cached_json
+from app.services.item_stats import GAME_MODULES, adaptive_round, item_stats
 
-MONSTER_FILE = os.path.join(os.path.dirname(__file__), "../../../data/hungry_monster.json")
-PAIRS_FILE = os.path.join(os.path.dirname(__file__), "../../../data/minimal_pairs.json")
+router = APIRouter()
 
 class GameSubmission(BaseModel):
     question_id: int
-    selected_answer: str
+    selected_answer: str = Field(..., max_length=100)
+    # Time taken to answer, if the client measured it
+    seconds: Optional[float] = Field(None, ge=0, le=600)
+
+class RoundAnswer(BaseModel):
+    game: Literal["hungry_monster", "minimal_pairs", "homophone_quiz", "mouth_moves"]
+    item_id: int
+    answer: str = Field(..., max_length=100)
+    # Word being sorted (minimal_pairs) or positioned (mouth_moves)
+    word: Optional[str] = Field(None, max_length=100)
+    seconds: Optional[float] = Field(None, ge=0, le=600)
+
+class RoundSubmission(BaseModel):
+    answers: List[RoundAnswer] = Field(..., min_length=1, max_length=200)
+
+
+def _monster_questions() -> Dataset:
+    dataset = get_catalog().get("hungry_monster")
+    if dataset is None:
+        raise HTTPException(status_code=500, detail="Game data is unavailable")
+    return dataset
+
+
+def _minimal_pairs() -> Dataset:
+    dataset = get_catalog().get("minimal_pairs")
+    if dataset is None:
+        raise HTTPException(status_code=500, detail="Minimal pairs data is unavailable")
+    return dataset
 
 @router.get("/hungry-monster", summary="Get Hungry Monster game questions")
-async def get_monster_questions():
+async def get_monster_questions(
+    request: Request,
+    adaptive: bool = False,
+    count: Optional[int] = Query(None, ge=1, le=50)
+):
     """
     Returns all Hungry Monster game questions.
+    With `adaptive=true`, returns a round picked for the caller instead:
+    `count` questions (default 5-10 by skill) around their level,
+    easiest first.
     """
-    try:
-        with open(MONSTER_FILE, 'r') as f:
-            questions = json.load(f)
-        return {"questions": questions, "total": len(questions)}
-    except FileNotFoundError:
-        raise HTTPException(status_code=500, detail="Game data file not found")
+    dataset = _monster_questions()
+    if adaptive:
+        current_user = await request_user_optional(request)
+        return await adaptive_round(dataset, current_user.id if current_user else None, count)
+    return cached_json(request, dataset.listing_body)
 
 @router.get("/hungry-monster/{question_id}", summary="Get specific monster question")
-async def get_monster_question(question_id: int):
+async def get_monster_question(question_id: int, request: Request):
     """
     Returns a specific Hungry Monster question by ID.
     """
-    try:
-        with open(MONSTER_FILE, 'r') as f:
-            questions = json.load(f)
-        
-        question = next((q for q in questions if q["id"] == question_id), None)
-        if not question:
-            raise HTTPException(status_code=404, detail="Question not found")
-        
-        return question
-    except FileNotFoundError:
-        raise HTTPException(status_code=500, detail="Game data file not found")
+    question = _monster_questions().get_body(question_id)
+    if not question:
+        raise HTTPException(status_code=404, detail="Question not found")
+    
+    return cached_json(request, question)
+
+@router.get("/stats/{game}", summary="Per-item difficulty statistics")
+def get_item_stats(game: str):
+    """
+    Attempts, accuracy, mean answer time, difficulty bucket and most
+    common wrong answers of every item of a graded game, from answers
+    graded by this API (counts reach it within a few seconds).
+    """
+    dataset = get_catalog().get(game) if game in GAME_MODULES else None
+    if dataset is None:
+        raise HTTPException(status_code=404, detail="Game not found")
+    return {"game": game, "items": item_stats.describe(dataset)}
 
 @router.post("/hungry-monster/submit", summary="Submit game answer")
 async def submit_monster_answer(submission: GameSubmission):
     """
     Validates the submitted answer for a Hungry Monster question.
     """
-    try:
-        with open(MONSTER_FILE, 'r') as f:
-            questions = json.load(f)
-        
-        question = next((q for q in questions if q["id"] == submission.question_id), None)
-        if not question:
-            raise HTTPException(status_code=404, detail="Question not found")
-        
-        is_correct = submission.selected_answer.lower() == question["correctAnswer"].lower()
-        
-        return {
-            "correct": is_correct,
-            "correctAnswer": question["correctAnswer"],
-            "selectedAnswer": submission.selected_answer
-        }
-    except FileNotFoundError:
-        raise HTTPException(status_code=500, detail="Game data file not found")
+    result = grade_answer(
+        _monster_questions().answer_key,
+        submission.question_id,
+        submission.selected_answer
+    )
+    if not result:
+        raise HTTPException(status_code=404, detail="Question not found")
+    item_stats.observe("hungry_monster", submission.question_id, result["correct"],
+                       submission.selected_answer, seconds=submission.seconds)
+    
+    return result
+
+@router.post("/grade", summary="Grade a whole round of answers")
+async def grade_game_round(submission: RoundSubmission):
+    """
+    Grades a round of answers across game types in one request.
+    - **hungry_monster** / **homophone_quiz**: `answer` is the chosen word
+    - **minimal_pairs**: `word` is the sorted word, `answer` its phoneme bucket (e.g. "/p/")
+    - **mouth_moves**: `word` is one word of the pair, `answer` its mouth position
+    
+    Returns per-item results in submission order plus the round score.
+    """
+    graded = grade_round(
+        get_catalog().answer_keys,
+        [answer.model_dump() for answer in submission.answers]
+    )
+    for answer, result in zip(submission.answers, graded["results"]):
+        if "error" not in result:
+            item_stats.observe(answer.game, answer.item_id, result["correct"],
+                               answer.answer, answer.word, answer.seconds)
+    return graded
 
 @router.get("/minimal-pairs", summary="Get minimal pairs exercises")
-async def get_minimal_pairs():
+async def get_minimal_pairs(
+    request: Request,
+    adaptive: bool = False,
+    count: Optional[int] = Query(None, ge=1, le=50)
+):
     """
     Returns all minimal pair sorting exercises.
+    With `adaptive=true`, returns a round picked for the caller instead
+    (see /hungry-monster).
     """
-    try:
-        with open(PAIRS_FILE, 'r') as f:
-            pairs = json.load(f)
-        return {"exercises": pairs, "total": len(pairs)}
-    except FileNotFoundError:
-        raise HTTPException(status_code=500, detail="Minimal pairs data file not found")
+    dataset = _minimal_pairs()
+    if adaptive:
+        current_user = await request_user_optional(request)
+        return await adaptive_round(dataset, current_user.id if current_user else None, count)
+    return cached_json(request, dataset.listing_body)
 
 @router.get("/minimal-pairs/{exercise_id}", summary="Get specific minimal pair exercise")
-async def get_minimal_pair(exercise_id: int):
+async def get_minimal_pair(exercise_id: int, request: Request):
     """
     Returns a specific minimal pair exercise by ID.
     """
-    try:
-        with open(PAIRS_FILE, 'r') as f:
-            pairs = json.load(f)
-        
-        exercise = next((e for e in pairs if e["id"] == exercise_id), None)
-        if not exercise:
-            raise HTTPException(status_code=404, detail="Exercise not found")
-        
-        return exercise
-    except FileNotFoundError:
-        raise HTTPException(status_code=500, detail="Minimal pairs data file not found")
+    exercise = _minimal_pairs().get_body(exercise_id)
+    if not exercise:
+        raise HTTPException(status_code=404, detail="Exercise not found")
+    
+    return cached_json(request, exercise)
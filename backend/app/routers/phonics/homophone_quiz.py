@@ -1,39 +1,45 @@
-from fastapi import APIRouter, HTTPException
-import json
-import os
+from fastapi import APIRouter, HTTPException, Query, Request
+from typing import Optional
+
+from app.middleware.auth_middleware import request_user_optional
+from app.services.content import Dataset, get_catalog
+from app.services.http_cache import cached_json
+from app.services.item_stats import adaptive_round
 
 router = APIRouter()
 
-DATA_FILE = os.path.join(os.path.dirname(__file__), "../../../data/homophone_quiz.json")
+
+def _questions() -> Dataset:
+    dataset = get_catalog().get("homophone_quiz")
+    if dataset is None:
+        raise HTTPException(status_code=500, detail="Homophone quiz data is unavailable")
+    return dataset
 
 @router.get("/", summary="Get all homophone quiz questions")
-async def get_homophone_quiz():
+async def get_homophone_quiz(
+    request: Request,
+    adaptive: bool = False,
+    count: Optional[int] = Query(None, ge=1, le=50)
+):
     """
     Returns all homophone quiz questions.
     Each question includes an image and two word options.
+    With `adaptive=true`, returns a round picked for the caller instead
+    (see /api/game/hungry-monster).
     """
-    try:
-        with open(DATA_FILE, 'r', encoding='utf-8') as f:
-            questions = json.load(f)
-        return {"questions": questions, "total": len(questions)}
-    except FileNotFoundError:
-        raise HTTPException(status_code=500, detail="Homophone quiz data file not found")
-    except json.JSONDecodeError:
-        raise HTTPException(status_code=500, detail="Invalid homophone quiz data format")
+    dataset = _questions()
+    if adaptive:
+        current_user = await request_user_optional(request)
+        return await adaptive_round(dataset, current_user.id if current_user else None, count)
+    return cached_json(request, dataset.listing_body)
 
 @router.get("/{question_id}", summary="Get specific homophone quiz question")
-async def get_homophone_question(question_id: int):
+async def get_homophone_question(question_id: int, request: Request):
     """
     Returns a specific homophone quiz question by ID.
     """
-    try:
-        with open(DATA_FILE, 'r', encoding='utf-8') as f:
-            questions = json.load(f)
-        
-        question = next((q for q in questions if q["id"] == question_id), None)
-        if not question:
-            raise HTTPException(status_code=404, detail="Question not found")
-        
-        return question
-    except FileNotFoundError:
-        raise HTTPException(status_code=500, detail="Homophone quiz data file not found")
+    question = _questions().get_body(question_id)
+    if not question:
+        raise HTTPException(status_code=404, detail="Question not found")
+    
+    return cached_json(request, question)
@@ -1,18 +1,110 @@
-from fastapi import APIRouter
+from fastapi import APIRouter, Depends
+from typing import List
+
+from app.middleware.auth_middleware import get_current_user
+from app.models.progress import (
+    ProgressDashboard,
+    ProgressEvent,
+    ProgressEventBatch,
+    ProgressIngestResult,
+    ProgressSyncBatch,
+    ProgressSyncResult,
+)
+from app.models.user import User
+from app.services.achievements import AchievementRules, get_rules
+from app.services.auth import progress_log
+from app.services.progress import Recorded
 
 router = APIRouter()
 
-@router.get("/", summary="Learner progress dashboard")
-async def learner_progress():
+
+def awards(recorded: Recorded, rules: AchievementRules) -> dict:
+    """What a batch earned: XP, modules, new achievements and whether the level went up"""
+    xp = recorded.aggregate.xp
+    return {
+        "xp_awarded": recorded.xp_awarded,
+        "completed_modules": recorded.completed,
+        "unlocked": rules.describe({
+            achievement_id: recorded.aggregate.achievements[achievement_id]
+            for achievement_id in recorded.unlocked
+        }),
+        "leveled_up": rules.level(xp) > rules.level(xp - recorded.xp_awarded),
+    }
+
+
+def record(current_user: User, events: List[ProgressEvent], utc_offset_minutes: int) -> Recorded:
+    """Log events for the caller (GET /api/auth/me reads its progress from the log too)"""
+    return progress_log.record(current_user.id, events, utc_offset_minutes)
+
+
+@router.get("/", response_model=ProgressDashboard, summary="Learner progress dashboard")
+def learner_progress(current_user: User = Depends(get_current_user)):
+    """
+    Returns the current learner's totals, XP, level, streak, accuracy
+    (overall and per module) and achievements. Read from the learner's
+    running aggregate; the event history is not replayed.
     """
-    Placeholder progress data for dashboard visualization.
+    return progress_log.get(current_user.id).dashboard(get_rules())
+
+
+@router.post("/events", response_model=ProgressIngestResult, summary="Record learning events")
+def record_events(batch: ProgressEventBatch, current_user: User = Depends(get_current_user)):
     """
+    Append a batch of card views, answers, time spent and module
+    completions to the learner's history and update their totals
+
+    - **events**: Up to 500 events, oldest first; `module` is a key of the
+      achievements configuration
+    - **utc_offset_minutes**: Where the learner's days start, for streaks
+
+    Completing a module awards its XP once per day and unlocks its
+    achievement; streaks unlock theirs (with bonus XP) on the day they
+    reach their length. Events with a `key` already recorded are skipped,
+    as are events naming an unknown module (listed by position in
+    `rejected`; the rest of the batch is still recorded).
+    Returns what this batch awarded and the updated dashboard.
+    """
+    recorded = record(current_user, batch.events, batch.utc_offset_minutes)
+    rules = get_rules()
     return {
-        "feature": "Competence Dashboard",
-        "status": "scaffolded",
-        "progress": {
-            "flashcards": "completed",
-            "sound-out": "in-progress",
-            "games": "locked"
-        }
+        "accepted": recorded.applied,
+        "duplicates": recorded.duplicates,
+        "rejected": recorded.rejected,
+        **awards(recorded, rules),
+        "dashboard": recorded.aggregate.dashboard(rules),
     }
+
+
+@router.post("/sync", response_model=ProgressSyncResult, summary="Sync an offline event queue")
+def sync_events(batch: ProgressSyncBatch, current_user: User = Depends(get_current_user)):
+    """
+    Upload everything queued since the last sync in one request and get
+    back what changed
+
+    - **events**: Up to 500 queued events, oldest first, each with a
+      client-generated `key`. Keys already recorded are skipped, so
+      resending a queue whose response was lost never counts anything
+      (XP included) twice
+    - **cursor**: `state.cursor` from the previous sync (0 on first sync)
+    - **utc_offset_minutes**: Where the learner's days start, for streaks
+
+    `state` carries the authoritative totals, XP, level and achievements,
+    and only the modules that changed after `cursor` (all of them when
+    `full` is true). `unlocked` lists the achievements this sync earned.
+    Events naming an unknown module are not recorded and their keys are
+    listed in `rejected`; the rest of the queue still is.
+    """
+    recorded = record(current_user, batch.events, batch.utc_offset_minutes)
+    aggregate = recorded.aggregate
+    rules = get_rules()
+    # A cursor from the future (another server's, a reset log) is unknown
+    since = batch.cursor if batch.cursor <= aggregate.seq else 0
+    return {
+        "applied": recorded.applied,
+        "duplicates": recorded.duplicates,
+        "rejected": [batch.events[i].key for i in recorded.rejected],
+        **awards(recorded, rules),
+        "full": since == 0,
+        "state": aggregate.dashboard(rules, since=since),
+    }
+
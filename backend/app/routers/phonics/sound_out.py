@@ -1,39 +1,49 @@
-from fastapi import APIRouter, HTTPException
-import json
-import os
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
+
+from app.middleware.auth_middleware import get_current_user
+from app.models.reviews import ReviewQueue
+from app.models.user import User
+from app.services.auth import progress_log
+from app.services.content import Dataset, get_catalog
+from app.services.http_cache import cached_json
+from app.services.reviews import next_items
 
 router = APIRouter()
 
-DATA_FILE = os.path.join(os.path.dirname(__file__), "../../../data/soundout.json")
+
+def _words() -> Dataset:
+    dataset = get_catalog().get("soundout")
+    if dataset is None:
+        raise HTTPException(status_code=500, detail="Sound-out data is unavailable")
+    return dataset
 
 @router.get("/", summary="Get all sound-out words")
-async def get_soundout_words():
+async def get_soundout_words(request: Request):
     """
     Returns all words for phonetic blending practice.
     Each word includes segmented and blended audio versions.
     """
-    try:
-        with open(DATA_FILE, 'r') as f:
-            words = json.load(f)
-        return {"words": words, "total": len(words)}
-    except FileNotFoundError:
-        raise HTTPException(status_code=500, detail="Sound-out data file not found")
-    except json.JSONDecodeError:
-        raise HTTPException(status_code=500, detail="Invalid sound-out data format")
+    dataset = _words()
+    return cached_json(request, dataset.listing_body)
+
+@router.get("/next", response_model=ReviewQueue, summary="Next words to study")
+def next_soundout(count: int = Query(10, ge=1, le=50), current_user: User = Depends(get_current_user)):
+    """
+    The caller's next `count` words: those due for review (spaced
+    repetition, most overdue first), then ones never seen. Views and
+    answers recorded through /api/progress reschedule them.
+    """
+    dataset = _words()
+    queue = progress_log.review_queue(current_user.id, "soundout", count, dataset.item_ids)
+    return next_items(dataset, queue, count)
 
 @router.get("/{word_id}", summary="Get specific word by ID")
-async def get_soundout_word(word_id: int):
+async def get_soundout_word(word_id: int, request: Request):
     """
     Returns a single word for blending practice by its ID.
     """
-    try:
-        with open(DATA_FILE, 'r') as f:
-            words = json.load(f)
-        
-        word = next((w for w in words if w["id"] == word_id), None)
-        if not word:
-            raise HTTPException(status_code=404, detail="Word not found")
-        
-        return word
-    except FileNotFoundError:
-        raise HTTPException(status_code=500, detail="Sound-out data file not found")
+    word = _words().get_body(word_id)
+    if not word:
+        raise HTTPException(status_code=404, detail="Word not found")
+    
+    return cached_json(request, word)
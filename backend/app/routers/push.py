@@ -0,0 +1,30 @@
+from fastapi import APIRouter, Depends, HTTPException, status
+
+from app.middleware.auth_middleware import get_current_user
+from app.models.user import User
+from app.services.push import EventStreamResponse, PushCapacityError, push_hub
+
+router = APIRouter()
+
+
+@router.get("/stream", summary="Live progress and leaderboard events", response_class=EventStreamResponse)
+async def event_stream(current_user: User = Depends(get_current_user)):
+    """
+    Server-Sent Events for the caller, from whichever worker records them:
+
+    - **progress**: `{xp, level}` after the caller's XP changes
+    - **achievement**: an achievement the caller unlocked
+    - **standing**: `{rank, xp, total}` on the global all-time board, when it changes
+    - **leaderboard**: `{entries, total}`, the top of that board, when it changes
+
+    Rank changes are checked every few seconds and unsent updates are
+    replaced by newer ones. An idle stream gets a `: ping` comment every
+    15 seconds; streams end after 15 minutes and the client reconnects.
+    """
+    try:
+        stream = push_hub.open(current_user.id)
+    except PushCapacityError as e:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE, detail=str(e), headers={"Retry-After": "30"}
+        )
+    return EventStreamResponse(stream)
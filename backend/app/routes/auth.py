@@ -3,8 +3,11 @@ Authentication Routes
 Handles user registration, login, and guest access
 """
 
-from fastapi import APIRouter, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi.security import HTTPAuthorizationCredentials
+from typing import Optional
 from datetime import timedelta
+import asyncio
 
 from app.models.user import UserCreate, UserLogin, GuestCreate, Token, User
 from app.services.auth import (
@@ -12,12 +15,27 @@ from app.services.auth import (
     authenticate_user,
     create_guest_user,
     create_access_token,
+    get_user_by_id,
+    revoke_token,
+    user_with_progress,
+    upgrade_guest,
     ACCESS_TOKEN_EXPIRE_MINUTES
 )
+from app.services.password import PasswordPoolBusy
+from app.middleware.auth_middleware import credentials_exception, get_current_user, optional_security
 
 router = APIRouter()
 
 
+def busy_exception(error: PasswordPoolBusy) -> HTTPException:
+    """503 telling the client when to retry a shed password request"""
+    return HTTPException(
+        status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+        detail="Server is busy, please try again shortly",
+        headers={"Retry-After": str(error.retry_after)},
+    )
+
+
 @router.post("/register", response_model=Token, summary="Register a new user")
 async def register(user_data: UserCreate):
     """
@@ -29,7 +47,10 @@ async def register(user_data: UserCreate):
     
     Returns JWT token and user data
     """
-    user = register_user(user_data)
+    try:
+        user = await register_user(user_data)
+    except PasswordPoolBusy as e:
+        raise busy_exception(e)
     
     if not user:
         raise HTTPException(
@@ -60,7 +81,10 @@ async def login(credentials: UserLogin):
     
     Returns JWT token and user data
     """
-    user = authenticate_user(credentials.email_or_username, credentials.password)
+    try:
+        user = await authenticate_user(credentials.email_or_username, credentials.password)
+    except PasswordPoolBusy as e:
+        raise busy_exception(e)
     
     if not user:
         raise HTTPException(
@@ -83,17 +107,20 @@ async def login(credentials: UserLogin):
 
 
 @router.post("/guest", response_model=Token, summary="Create guest session")
-async def guest_login(guest_data: GuestCreate):
+def guest_login(guest_data: GuestCreate):
     """
     Create a guest user session without registration
     
     - **name**: Optional guest name (defaults to "Guest")
     
     Guest users are assigned auto-incremented IDs (guest_00001, guest_00002, etc.)
-    and have the same app access as registered users but no data persistence.
+    and have the same app access as registered users but no data persistence:
+    idle guests expire. POST /upgrade keeps a guest's progress.
     
     Returns JWT token and guest user data
     """
+    # A plain def, so this runs in the threadpool: allocating the guest
+    # number and saving the guest may wait on the store or the ID service
     user = create_guest_user(guest_data.name)
     
     # Create access token for guest
@@ -109,13 +136,77 @@ async def guest_login(guest_data: GuestCreate):
     )
 
 
+@router.post("/upgrade", response_model=Token, summary="Upgrade a guest to a registered account")
+async def upgrade(
+    user_data: UserCreate,
+    current_user: User = Depends(get_current_user),
+    credentials: HTTPAuthorizationCredentials = Depends(optional_security)
+):
+    """
+    Register an account for the current guest, keeping their progress
+    
+    - **username**: 3-20 characters, unique
+    - **email**: Valid email address, unique
+    - **password**: Minimum 8 characters
+    
+    The guest session ends: its token is revoked and the guest removed.
+    Returns JWT token and user data for the new account
+    """
+    if not current_user.is_guest:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Only guest sessions can be upgraded"
+        )
+    
+    try:
+        user = await upgrade_guest(current_user.id, user_data)
+    except PasswordPoolBusy as e:
+        raise busy_exception(e)
+    
+    if not user:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Username or email already exists"
+        )
+    await asyncio.to_thread(revoke_token, credentials.credentials)
+    
+    access_token_expires = timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
+    access_token = create_access_token(
+        data={"sub": user.id, "username": user.username, "is_guest": False},
+        expires_delta=access_token_expires
+    )
+    
+    return Token(
+        access_token=access_token,
+        user=user
+    )
+
+
+@router.get("/me", response_model=User, summary="Current user")
+async def me(current_user: User = Depends(get_current_user)):
+    """
+    Return the user the bearer token belongs to
+    
+    Works on every worker, whichever one created the account
+    """
+    # The cached principal leaves progress out; read it from the record
+    # and the progress log
+    user = await asyncio.to_thread(get_user_by_id, current_user.id)
+    if user is None:
+        raise credentials_exception()
+    return await asyncio.to_thread(user_with_progress, user)
+
+
 @router.post("/logout", summary="User logout")
-async def logout():
+async def logout(credentials: Optional[HTTPAuthorizationCredentials] = Depends(optional_security)):
     """
-    Logout user (client should remove token)
+    Logout user: the bearer token, if sent, is revoked on every worker
+    until it expires (client should still remove it)
     
     Returns success message
     """
+    if credentials is not None:
+        await asyncio.to_thread(revoke_token, credentials.credentials)
     return {
         "message": "Logged out successfully",
         "action": "Client should clear authentication token"
@@ -1,4 +1,13 @@
-from fastapi import APIRouter
+from fastapi import APIRouter, Header, HTTPException, status
+from typing import Optional
+import hmac
+import os
+
+from app.services import metrics
+
+# Bearer token required by GET /metrics, which reveals worker PIDs, user
+# and guest counts and internal timings; unset hides the endpoint
+METRICS_TOKEN = os.getenv("METRICS_TOKEN", "")
 
 router = APIRouter()
 
@@ -9,4 +18,11 @@ async def health_check():
         "status": "online",
         "service": "Magic Maker Studio Backend",
         "environment": "development"
-    }
\ No newline at end of file
+    }
+
+@router.get("/metrics", tags=["System"], include_in_schema=False)
+async def get_metrics(authorization: Optional[str] = Header(None)):
+    """Counters, gauges and timings of the worker process that answered."""
+    if not METRICS_TOKEN or not hmac.compare_digest(authorization or "", f"Bearer {METRICS_TOKEN}"):
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Not Found")
+    return {"pid": os.getpid(), **metrics.snapshot()}
@@ -0,0 +1,153 @@
+"""
+Achievements Service
+The XP and achievement rules of achievements.json compiled into lookup
+tables keyed by what can trigger them. Recording an event evaluates only
+the rules its triggers name (a module's first completion of the day, a
+streak reaching some length) rather than every rule; when the rules
+change, every learner's XP and achievements are re-derived in a few
+set-based statements over the aggregates (ProgressLog.apply_rules)
+"""
+
+from typing import Any, Dict, List, NamedTuple, Optional, Tuple
+import hashlib
+import json
+import threading
+
+from app.services.content import get_catalog, streak_days
+
+# What ProgressAggregate.apply reports: ("module_complete", module) for the
+# first completion of a module on a day, ("streak", days) when the streak
+# grows to days
+Trigger = Tuple[str, Any]
+
+
+class Rule(NamedTuple):
+    """XP awarded on a trigger: every time, or once with an achievement"""
+    xp: int
+    achievement_id: Optional[str] = None
+
+
+def json_path(*keys: str) -> str:
+    """SQLite JSON path to a nested key (keys quoted, so any name is safe)"""
+    return "$" + "".join("." + json.dumps(key) for key in keys)
+
+
+class AchievementRules:
+    """
+    achievements.json compiled for evaluation
+
+    `rules` maps each trigger to the few rules it can affect, so applying
+    an event is a dict lookup per trigger. `unlocks` holds each
+    achievement's condition as SQL over an aggregates row and `xp_sql`
+    the XP those rules add up to, for recomputing every learner at once.
+    `fingerprint` changes only when something that affects XP or unlocks
+    does (not for a new icon or description).
+    """
+
+    def __init__(self, config: Dict[str, Any]):
+        self.config = config
+        self.xp_per_level: int = config.get("xpPerLevel", 500)
+        self.module_xp: Dict[str, int] = {}
+        # Achievement ID -> what the client shows for it
+        self.achievements: Dict[str, Dict[str, Any]] = {}
+        self.rules: Dict[Trigger, Tuple[Rule, ...]] = {}
+        # (achievement ID, SQL condition on an aggregates row, parameters)
+        self.unlocks: List[Tuple[str, str, Tuple]] = []
+
+        rules: Dict[Trigger, List[Rule]] = {}
+        xp_terms, xp_params = [], []
+        for module, entry in config.get("modules", {}).items():
+            xp = entry.get("xp", 0)
+            self.module_xp[module] = xp
+            trigger = ("module_complete", module)
+            if xp:
+                rules.setdefault(trigger, []).append(Rule(xp))
+                # Module XP is earned once per day completed
+                xp_terms.append("COALESCE(json_extract(modules, ?), 0) * ?")
+                xp_params += [json_path(module, "xp_days"), xp]
+            achievement = entry.get("achievement")
+            if achievement:
+                self._define(achievement["id"], achievement, "module", 0)
+                rules.setdefault(trigger, []).append(Rule(0, achievement["id"]))
+                self.unlocks.append((
+                    achievement["id"], "COALESCE(json_extract(modules, ?), 0) > 0",
+                    (json_path(module, "completions"),)
+                ))
+        for key, entry in config.get("streaks", {}).items():
+            days = streak_days(key, entry)
+            achievement_id = entry.get("id") or f"streak_{key}"
+            xp = entry.get("xp", 0)
+            self._define(achievement_id, entry, "streak", xp, days)
+            rules.setdefault(("streak", days), []).append(Rule(xp, achievement_id))
+            self.unlocks.append((achievement_id, "best_streak >= ?", (days,)))
+            if xp:
+                xp_terms.append("(best_streak >= ?) * ?")
+                xp_params += [days, xp]
+
+        self.rules = {trigger: tuple(found) for trigger, found in rules.items()}
+        self.xp_sql = " + ".join(xp_terms) or "0"
+        self.xp_params = tuple(xp_params)
+        self.fingerprint = hashlib.sha256(json.dumps(
+            [sorted(self.module_xp.items()), sorted(self.unlocks), self.xp_sql, self.xp_params]
+        ).encode()).hexdigest()[:16]
+
+    def _define(self, achievement_id: str, entry: Dict[str, Any], kind: str, xp: int, days: Optional[int] = None):
+        self.achievements[achievement_id] = {
+            "id": achievement_id,
+            "kind": kind,
+            "name": entry.get("name", achievement_id),
+            "description": entry.get("description") or (f"{days}-day streak" if days else ""),
+            "icon": entry.get("icon", ""),
+            "xp": xp,
+        }
+
+    def evaluate(self, unlocked: Dict[str, int], triggers: List[Trigger], at: float) -> Tuple[int, List[str]]:
+        """
+        Apply the rules an event's triggers name
+
+        Args:
+            unlocked: The learner's achievements (ID -> epoch second), added to
+            triggers: What the event did (from ProgressAggregate.apply)
+            at: When it happened
+
+        Returns:
+            XP awarded and the IDs of achievements unlocked
+        """
+        xp, new = 0, []
+        for trigger in triggers:
+            for rule in self.rules.get(trigger, ()):
+                if rule.achievement_id is None:
+                    xp += rule.xp
+                elif rule.achievement_id not in unlocked:
+                    unlocked[rule.achievement_id] = int(at)
+                    xp += rule.xp
+                    new.append(rule.achievement_id)
+        return xp, new
+
+    def level(self, xp: int) -> int:
+        return xp // self.xp_per_level + 1
+
+    def describe(self, unlocked: Dict[str, int]) -> List[Dict[str, Any]]:
+        """Unlocked achievements the rules still define, oldest first"""
+        return [
+            {**self.achievements[achievement_id], "unlocked_at": at}
+            for achievement_id, at in sorted(unlocked.items(), key=lambda item: item[1])
+            if achievement_id in self.achievements
+        ]
+
+
+_rules: Optional[AchievementRules] = None
+_rules_lock = threading.Lock()
+
+
+def get_rules() -> AchievementRules:
+    """The rules of the current content catalog, compiled once per version"""
+    global _rules
+    config = get_catalog().achievements
+    rules = _rules
+    if rules is None or rules.config is not config:
+        with _rules_lock:
+            if _rules is None or _rules.config is not config:
+                _rules = AchievementRules(config)
+            rules = _rules
+    return rules
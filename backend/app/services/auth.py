@@ -5,57 +5,178 @@ Handles user authentication, JWT tokens, and session management
 
 from jose import JWTError, jwt
 from datetime import datetime, timedelta
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, List
+import asyncio
+import threading
+import time
 import uuid
-import json
 import os
 
-from app.models.user import User, UserInDB, UserCreate, GuestCreate
-from app.services.password import hash_password, verify_password
+from app.models.user import User, UserCreate, GuestCreate
+from app.models.user_record import UserRecord
+from app.services import metrics
+from app.services.password import (
+    PasswordPoolBusy,
+    hash_password_async,
+    needs_rehash,
+    pool_is_idle,
+    verify_password_async,
+)
+from app.services.user_store import DuplicateUserError, create_user_store
+from app.services.id_allocator import create_id_allocator
+from app.services.principal_cache import PrincipalCache
+from app.services.revocation import TokenDenylist
+from app.services.progress import ProgressLog
+from app.services.guests import GUEST_IDLE_TTL, GUEST_SWEEP_INTERVAL, GuestTier
 
 # JWT Configuration
 SECRET_KEY = os.getenv("SECRET_KEY", "your-secret-key-change-in-production-please-use-strong-key-here")
 ALGORITHM = "HS256"
 ACCESS_TOKEN_EXPIRE_MINUTES = 60 * 24 * 7  # 7 days
 
-# In-memory user storage (replace with database in production)
-users_db: Dict[str, UserInDB] = {}
+# In-memory user storage (replace with database in production);
+# registered users only, guests live in guest_tier
+users_db: Dict[str, UserRecord] = {}
 guest_counter = 0
 
+# Guests: bounded, evicted when idle. With a store that persists guests
+# (sqlite) this is a cache in front of it; otherwise guests exist only here
+guest_tier = GuestTier()
+
+# Persisted last_active of a guest is refreshed at most this often, so
+# activity survives for the sweeper without a write per request
+GUEST_TOUCH_INTERVAL = min(3600, GUEST_IDLE_TTL / 4)
+
+# Seconds between applying other workers' user changes and revocations to
+# this worker's memory. Lookups read memory only; just a login or token
+# whose user is not found here yet syncs first. A token revoked elsewhere
+# is refused here within this delay
+USER_SYNC_INTERVAL = float(os.getenv("USER_SYNC_INTERVAL", "1"))
+
+# Secondary indexes kept in sync with users_db:
+# normalized email -> user ID, and username -> user ID
+email_index: Dict[str, str] = {}
+username_index: Dict[str, str] = {}
+
+# Makes check-then-insert atomic so concurrent registrations cannot both
+# claim the same email or username, and guards the indexes. Changes to one
+# user's record take only that record's lock stripe (UserRecord.lock);
+# when both are needed users_lock comes first
+users_lock = threading.RLock()
+
 # File-based persistence for demo
-USERS_FILE = os.path.join(os.path.dirname(__file__), "../../data/users.json")
+USERS_FILE = os.getenv("USERS_FILE", os.path.join(os.path.dirname(__file__), "../../data/users.json"))
+
+# Persistence backend, chosen by the USER_STORE env var (json | journal | sqlite).
+# Only sqlite is shared between worker processes.
+user_store = create_user_store(json_path=USERS_FILE)
+
+# Position in the store's change feed up to which users_db is current
+change_cursor = 0
+
+# Background rehash tasks, referenced so they are not garbage collected
+rehash_tasks = set()
+
+# Verified tokens -> claims and user projection; every change to a user's
+# username, email or guest status (or their deletion) must call
+# principal_cache.invalidate_user. Progress and activity times are not
+# part of the projection
+principal_cache = PrincipalCache()
+
+# Revoked token IDs, shared by every worker
+token_denylist = TokenDenylist()
+
+# Learning events and per-user aggregates, shared by every worker
+progress_log = ProgressLog()
+
+
+def normalize_email(email: str) -> str:
+    """Normalize an email address for lookups"""
+    return email.strip().lower()
+
+
+def _index_user(user: UserRecord):
+    """Add a registered user to the secondary indexes"""
+    email_index[normalize_email(user.email)] = user.id
+    username_index[user.username] = user.id
+
+
+def _unindex_user(user: UserRecord):
+    """Remove a user from the secondary indexes"""
+    if email_index.get(normalize_email(user.email)) == user.id:
+        del email_index[normalize_email(user.email)]
+    if username_index.get(user.username) == user.id:
+        del username_index[user.username]
 
 
 def load_users():
-    """Load users from JSON file if it exists"""
-    global users_db, guest_counter
-    if os.path.exists(USERS_FILE):
-        try:
-            with open(USERS_FILE, 'r') as f:
-                data = json.load(f)
-                users_db = {uid: UserInDB(**user_data) for uid, user_data in data.get('users', {}).items()}
-                guest_counter = data.get('guest_counter', 0)
-        except Exception as e:
-            print(f"Error loading users: {e}")
+    """Load users from the persistence backend"""
+    global users_db, guest_counter, change_cursor
+    change_cursor = user_store.change_cursor()
+    # Stored guests are loaded lazily, on their next request
+    users, guest_counter = user_store.load(include_guests=not user_store.persists_guests)
+
+    users_db = {user_id: user for user_id, user in users.items() if not user.is_guest}
+    email_index.clear()
+    username_index.clear()
+    for user in users_db.values():
+        _index_user(user)
+
+    # Guests left in users.json from before the guest tier; idle ones are
+    # compacted out by the first sweep
+    guests = sorted((user for user in users.values() if user.is_guest), key=lambda user: user.last_active)
+    for guest in guests:
+        guest_tier.put(guest, last_seen=guest.last_active)
 
 
 def save_users():
-    """Save users to JSON file for persistence"""
-    try:
-        os.makedirs(os.path.dirname(USERS_FILE), exist_ok=True)
-        with open(USERS_FILE, 'w') as f:
-            data = {
-                'users': {uid: user.dict() for uid, user in users_db.items()},
-                'guest_counter': guest_counter
-            }
-            json.dump(data, f, indent=2)
-    except Exception as e:
-        print(f"Error saving users: {e}")
+    """Persist a full snapshot of all users (prefer the per-user writes)"""
+    snapshot = dict(users_db)
+    if user_store.persists_guests:
+        snapshot.update((guest.id, guest) for guest in guest_tier.values())
+    user_store.save_all(snapshot, guest_counter)
+
+
+def _identity_changed(old: Optional[UserRecord], new: Optional[UserRecord]) -> bool:
+    """Whether a change to a user affects their cached principals"""
+    if old is None or new is None:
+        return True
+    return (old.username, old.email, old.is_guest) != (new.username, new.email, new.is_guest)
+
+
+def sync_users():
+    """Apply users created, changed or deleted by other worker processes"""
+    global change_cursor
+    with users_lock:
+        changes, cursor = user_store.changes_since(change_cursor)
+        if changes is None:
+            load_users()
+            principal_cache.clear()
+            return
+        for user_id, user in changes.items():
+            if _identity_changed(users_db.get(user_id) or guest_tier.peek(user_id), user):
+                principal_cache.invalidate_user(user_id)
+            if user is not None and user.is_guest:
+                # Only refresh guests this worker holds; others load on demand
+                guest_tier.replace(user)
+                continue
+            guest_tier.discard(user_id)
+            old = users_db.pop(user_id, None)
+            if old is not None:
+                _unindex_user(old)
+            if user is not None:
+                users_db[user_id] = user
+                _index_user(user)
+        change_cursor = cursor
 
 
 # Load users on module import
 load_users()
 
+# Guest numbers must be unique across workers (and nodes), so they come from
+# the store or a shared service rather than the guest_counter global
+id_allocator = create_id_allocator(user_store, floor=guest_counter)
+
 
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -> str:
     """
@@ -74,7 +195,8 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -
     else:
         expire = datetime.utcnow() + timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
     
-    to_encode.update({"exp": expire})
+    # jti identifies the token so it can be revoked on its own
+    to_encode.update({"exp": expire, "jti": uuid.uuid4().hex})
     encoded_jwt = jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
     return encoded_jwt
 
@@ -96,81 +218,247 @@ def verify_token(token: str) -> Optional[Dict[str, Any]]:
         return None
 
 
-def get_user_by_email(email: str) -> Optional[UserInDB]:
-    """Find user by email"""
-    for user in users_db.values():
-        if user.email == email:
-            return user
-    return None
+def revoke_token(token: str) -> bool:
+    """
+    Revoke a token until it expires (logout)
+    
+    Args:
+        token: JWT token string
+        
+    Returns:
+        True if the token was valid and is now revoked
+    """
+    payload = verify_token(token)
+    if payload is None or "jti" not in payload:
+        return False
+    token_denylist.revoke(payload["jti"], payload["exp"])
+    principal_cache.invalidate_token(token)
+    return True
 
 
-def get_user_by_username(username: str) -> Optional[UserInDB]:
-    """Find user by username"""
-    for user in users_db.values():
-        if user.username == username:
-            return user
-    return None
+def get_user_by_email(email: str) -> Optional[UserRecord]:
+    """Find user by email (case-insensitive)"""
+    user_id = email_index.get(normalize_email(email))
+    return users_db.get(user_id) if user_id else None
+
+
+def get_user_by_username(username: str) -> Optional[UserRecord]:
+    """Find registered user by username"""
+    user_id = username_index.get(username)
+    return users_db.get(user_id) if user_id else None
+
+
+def get_user_by_id(user_id: str) -> Optional[UserRecord]:
+    """Find user (registered or guest) by ID"""
+    user = users_db.get(user_id)
+    if user is None:
+        user = get_guest(user_id)
+    if user is None:
+        # Registered by another worker since the last watch_users pass
+        sync_users()
+        user = users_db.get(user_id)
+    return user
+
+
+def get_guest(guest_id: str) -> Optional[UserRecord]:
+    """
+    Find a guest and mark them active
+    
+    Guests evicted from this worker's tier (or created by another worker)
+    are loaded from the store when it persists guests.
+    """
+    guest = guest_tier.get(guest_id)
+    if guest is None and user_store.persists_guests:
+        guest = user_store.load_user(guest_id)
+        if guest is None or not guest.is_guest:
+            return None
+        _evicted(guest_tier.put(guest))
+    if guest is not None and _bump_guest_activity(guest):
+        user_store.save_user(guest)
+    return guest
+
+
+def display_names(user_ids: List[str]) -> Dict[str, str]:
+    """
+    Usernames for a list of user IDs (e.g. a leaderboard page), without
+    marking guests active; IDs of users that no longer exist are left out
+    """
+    names = {}
+    for user_id in user_ids:
+        user = users_db.get(user_id) or guest_tier.peek(user_id)
+        if user is None and user_store.persists_guests:
+            user = user_store.load_user(user_id)
+        if user is not None:
+            names[user_id] = user.username
+    return names
+
+
+async def touch_guest(guest_id: str):
+    """Record activity of a guest whose request skipped the user lookup"""
+    guest = guest_tier.get(guest_id)
+    if guest is not None and _bump_guest_activity(guest):
+        # SQLite may wait out another worker's write lock: not on the loop
+        await asyncio.to_thread(user_store.save_user, guest)
+
+
+def _bump_guest_activity(guest: UserRecord) -> bool:
+    """
+    Advance a guest's last_active in memory every GUEST_TOUCH_INTERVAL;
+    True if the caller should persist it, for the sweeper
+    """
+    if not user_store.persists_guests:
+        return False
+    now = int(time.time())
+    with guest.lock:
+        if guest.last_active + GUEST_TOUCH_INTERVAL > now:
+            return False
+        guest.last_active = now
+    return True
+
+
+def _evicted(guest_ids):
+    """Forget cached principals of guests dropped from the tier"""
+    for guest_id in guest_ids:
+        principal_cache.invalidate_user(guest_id)
+
+
+def _save_user(user: UserRecord):
+    """Persist a changed user; memory-only guests have nothing to write"""
+    if user.is_guest and not user_store.persists_guests:
+        return
+    user_store.save_user(user)
+
+
+def sweep_guests(now: Optional[float] = None) -> Dict[str, int]:
+    """
+    Drop guests idle for GUEST_IDLE_TTL from memory and from storage,
+    along with the progress of guests that are gone
+    
+    Args:
+        now: Epoch seconds to sweep as of (default: current time)
+        
+    Returns:
+        Counts of guests evicted from memory, purged from storage and
+        whose progress was deleted
+    """
+    now = time.time() if now is None else now
+    idle_before = now - GUEST_IDLE_TTL
+    evicted = guest_tier.evict_idle(idle_before)
+    _evicted(evicted)
+    purged = user_store.purge_guests(idle_before)
+    if purged:
+        metrics.inc("guests_purged", purged)
+    # A guest's events stop when they go idle; the progress of those no
+    # longer in the tier or the store can never be read again
+    gone = [
+        guest_id for guest_id in progress_log.idle_guests(idle_before)
+        if guest_id not in guest_tier
+        and not (user_store.persists_guests and user_store.load_user(guest_id) is not None)
+    ]
+    progress_purged = progress_log.delete(gone)
+    return {"evicted": len(evicted), "purged": purged, "progress_purged": progress_purged}
+
+
+async def watch_guests(interval: float = GUEST_SWEEP_INTERVAL):
+    """Sweep idle guests every interval seconds"""
+    while True:
+        await asyncio.sleep(interval)
+        try:
+            with metrics.timed("guest_sweep"):
+                await asyncio.to_thread(sweep_guests)
+        except Exception as e:
+            print(f"Error sweeping guests: {e}")
+
+
+async def watch_users(interval: float = USER_SYNC_INTERVAL):
+    """Apply other workers' user changes and token revocations every interval seconds"""
+    while True:
+        await asyncio.sleep(interval)
+        try:
+            await asyncio.to_thread(sync_users)
+            await asyncio.to_thread(token_denylist.refresh)
+        except Exception as e:
+            print(f"Error syncing users: {e}")
+
+
+def _name_taken(email: str, username: str) -> bool:
+    return get_user_by_email(email) is not None or get_user_by_username(username) is not None
+
+
+def _insert_user(user: UserRecord) -> bool:
+    """Index and persist a new registered user; False if the email or username is taken"""
+    with users_lock:
+        # Re-check under the lock: another registration may have won the race
+        if _name_taken(user.email, user.username):
+            return False
+        users_db[user.id] = user
+        _index_user(user)
+    try:
+        user_store.save_user(user)
+    except DuplicateUserError:
+        # Another worker registered the same email/username first
+        with users_lock:
+            users_db.pop(user.id, None)
+            _unindex_user(user)
+        return False
+    return True
 
 
-def get_user_by_id(user_id: str) -> Optional[UserInDB]:
-    """Find user by ID"""
-    return users_db.get(user_id)
+def _find_login_user(email_or_username: str) -> Optional[UserRecord]:
+    user = get_user_by_email(email_or_username) or get_user_by_username(email_or_username)
+    if user is None:
+        # Registered by another worker since the last watch_users pass
+        sync_users()
+        user = get_user_by_email(email_or_username) or get_user_by_username(email_or_username)
+    return user
 
 
-def register_user(user_create: UserCreate) -> Optional[User]:
+async def register_user(user_create: UserCreate, progress: Optional[Dict[str, Any]] = None) -> Optional[User]:
     """
     Register a new user
     
     Args:
         user_create: User creation data
+        progress: Starting progress (e.g. carried over from a guest)
         
     Returns:
         Created user object or None if registration fails
+        
+    Raises:
+        PasswordPoolBusy: If the password pool is saturated
     """
-    # Check if user already exists
-    if get_user_by_email(user_create.email):
-        return None
-    if get_user_by_username(user_create.username):
+    # Cheap early exit before spending time on the password hash; names
+    # taken on other workers but not synced here yet are caught by the
+    # store's unique constraint on insert. The insert runs in a thread:
+    # SQLite may wait out another worker's write lock, which must not
+    # stall this worker's event loop
+    if _name_taken(user_create.email, user_create.username):
         return None
     
     # Create new user
     user_id = str(uuid.uuid4())
-    now = datetime.utcnow().isoformat()
+    now = int(time.time())
+    hashed_password = await hash_password_async(user_create.password)
     
-    user_in_db = UserInDB(
+    user_in_db = UserRecord(
         id=user_id,
         username=user_create.username,
         email=user_create.email,
-        hashed_password=hash_password(user_create.password),
+        hashed_password=hashed_password,
         is_guest=False,
         created_at=now,
         last_active=now,
-        progress={
-            "flashcards_completed": [],
-            "soundout_completed": 0,
-            "games_completed": 0,
-            "minimal_pairs_completed": 0,
-            "total_time_spent": 0,
-            "current_streak": 0
-        }
+        progress=progress
     )
     
-    users_db[user_id] = user_in_db
-    save_users()
+    if not await asyncio.to_thread(_insert_user, user_in_db):
+        return None
     
     # Return user without password
-    return User(
-        id=user_in_db.id,
-        username=user_in_db.username,
-        email=user_in_db.email,
-        is_guest=False,
-        created_at=user_in_db.created_at,
-        last_active=user_in_db.last_active,
-        progress=user_in_db.progress
-    )
+    return user_in_db.to_model(User)
 
 
-def authenticate_user(email_or_username: str, password: str) -> Optional[User]:
+async def authenticate_user(email_or_username: str, password: str) -> Optional[User]:
     """
     Authenticate a user with email/username and password
     
@@ -180,39 +468,68 @@ def authenticate_user(email_or_username: str, password: str) -> Optional[User]:
         
     Returns:
         User object if authentication successful, None otherwise
+        
+    Raises:
+        PasswordPoolBusy: If the password pool is saturated
     """
     # Try to find user by email or username
-    user = get_user_by_email(email_or_username)
-    if not user:
-        user = get_user_by_username(email_or_username)
+    user = await asyncio.to_thread(_find_login_user, email_or_username)
     
     if not user:
         return None
     
     # Verify password
-    if not verify_password(password, user.hashed_password):
+    if not await verify_password_async(password, user.hashed_password):
         return None
     
     # Update last active time
-    user.last_active = datetime.utcnow().isoformat()
-    save_users()
+    with user.lock:
+        user.last_active = int(time.time())
+    await asyncio.to_thread(user_store.save_user, user)
+    
+    # Upgrade hashes made at another cost, without delaying this response;
+    # under load it is skipped and retried on a later login
+    if needs_rehash(user.hashed_password) and pool_is_idle():
+        task = asyncio.create_task(rehash_password(user.id, user.hashed_password, password))
+        rehash_tasks.add(task)
+        task.add_done_callback(rehash_tasks.discard)
     
     # Return user without password
-    return User(
-        id=user.id,
-        username=user.username,
-        email=user.email,
-        is_guest=False,
-        created_at=user.created_at,
-        last_active=user.last_active,
-        progress=user.progress
-    )
+    return await asyncio.to_thread(user_with_progress, user)
+
+
+async def rehash_password(user_id: str, old_hash: str, password: str):
+    """
+    Replace a user's hash with one at the configured cost
+    
+    Args:
+        user_id: User ID
+        old_hash: Hash the password was verified against
+        password: The verified plain text password
+    """
+    try:
+        new_hash = await hash_password_async(password)
+    except PasswordPoolBusy:
+        return
+    user = users_db.get(user_id)
+    if user is None:
+        return
+    with user.lock:
+        # Skip if the password changed (or another login rehashed) meanwhile
+        if user.hashed_password != old_hash:
+            return
+        user.hashed_password = new_hash
+    await asyncio.to_thread(user_store.save_user, user)
+    metrics.inc("password_rehashed")
 
 
 def create_guest_user(name: Optional[str] = None) -> User:
     """
     Create a guest user with auto-incremented ID
     
+    Blocks on the ID allocator and the store: call it from a thread, not
+    the event loop.
+    
     Args:
         name: Optional guest name
         
@@ -220,42 +537,29 @@ def create_guest_user(name: Optional[str] = None) -> User:
         Created guest user object
     """
     global guest_counter
-    guest_counter += 1
-    guest_id = f"guest_{guest_counter:05d}"
+    guest_number = id_allocator.next_guest_number()
+    with users_lock:
+        guest_counter = max(guest_counter, guest_number)
+    guest_id = f"guest_{guest_number:05d}"
     
-    now = datetime.utcnow().isoformat()
-    display_name = name if name else f"Guest_{guest_counter:05d}"
+    now = int(time.time())
+    display_name = name if name else f"Guest_{guest_number:05d}"
     
-    guest_user = UserInDB(
+    guest_user = UserRecord(
         id=guest_id,
         username=display_name,
-        email=f"{guest_id}@guest.soundsteps.app",  # Placeholder email for guest
+        email=None,  # Placeholder email, derived from the ID
         hashed_password="",  # No password for guests
         is_guest=True,
         created_at=now,
-        last_active=now,
-        progress={
-            "flashcards_completed": [],
-            "soundout_completed": 0,
-            "games_completed": 0,
-            "minimal_pairs_completed": 0,
-            "total_time_spent": 0,
-            "current_streak": 0
-        }
+        last_active=now
     )
     
-    users_db[guest_id] = guest_user
-    save_users()
+    _evicted(guest_tier.put(guest_user))
+    if user_store.persists_guests:
+        user_store.save_user(guest_user, guest_counter=guest_number)
     
-    return User(
-        id=guest_user.id,
-        username=guest_user.username,
-        email=guest_user.email,
-        is_guest=True,
-        created_at=guest_user.created_at,
-        last_active=guest_user.last_active,
-        progress=guest_user.progress
-    )
+    return guest_user.to_model(User)
 
 
 def update_user_progress(user_id: str, progress_update: Dict[str, Any]) -> bool:
@@ -269,11 +573,89 @@ def update_user_progress(user_id: str, progress_update: Dict[str, Any]) -> bool:
     Returns:
         True if update successful, False otherwise
     """
-    user = users_db.get(user_id)
+    user = get_user_by_id(user_id)
     if not user:
         return False
     
-    user.progress.update(progress_update)
-    user.last_active = datetime.utcnow().isoformat()
-    save_users()
+    # Only this user's lock stripe is taken, so updates to different
+    # users proceed in parallel; the write happens after releasing it
+    with user.lock:
+        user.update_progress(progress_update)
+        user.last_active = int(time.time())
+    _save_user(user)
     return True
+
+
+def user_with_progress(user: UserRecord) -> User:
+    """
+    A user as the API returns them, progress included
+    
+    Progress recorded through /api/progress lives in progress_log, not on
+    the record (which keeps what predates the log), so ingesting events
+    never rewrites the user store. Reads progress.db: call it from a thread.
+    """
+    model = user.to_model(User)
+    aggregate = progress_log.get(user.id)
+    if aggregate.events:
+        model.progress = {**model.progress, **aggregate.legacy_progress()}
+    return model
+
+
+def delete_user(user_id: str) -> bool:
+    """
+    Delete a user and drop them from the indexes
+    
+    Args:
+        user_id: User ID
+        
+    Returns:
+        True if the user existed
+    """
+    with users_lock:
+        user = users_db.pop(user_id, None)
+        if user:
+            _unindex_user(user)
+    if not user:
+        user = guest_tier.discard(user_id)
+        if not user and user_store.persists_guests:
+            user = user_store.load_user(user_id)
+        if not user:
+            return False
+    if not user.is_guest or user_store.persists_guests:
+        user_store.delete_user(user_id)
+    progress_log.delete([user_id])
+    principal_cache.invalidate_user(user_id)
+    return True
+
+
+def _move_guest(guest_id: str, user_id: str):
+    """Carry a guest's progress over to their new account and remove the guest"""
+    progress_log.transfer(guest_id, user_id)
+    delete_user(guest_id)
+
+
+async def upgrade_guest(guest_id: str, user_create: UserCreate) -> Optional[User]:
+    """
+    Turn a guest into a registered user, carrying their progress over
+    
+    Args:
+        guest_id: ID of the guest being upgraded
+        user_create: Registration data for the new account
+        
+    Returns:
+        The registered user, or None if the guest is gone or the
+        username/email is taken
+        
+    Raises:
+        PasswordPoolBusy: If the password pool is saturated
+    """
+    guest = await asyncio.to_thread(get_guest, guest_id)
+    if guest is None:
+        return None
+    user = await register_user(user_create, progress=guest.progress)
+    if user is not None:
+        await asyncio.to_thread(_move_guest, guest_id, user.id)
+        metrics.inc("guests_upgraded")
+        # Now including the progress just moved over
+        user = await asyncio.to_thread(user_with_progress, users_db[user.id])
+    return user
@@ -0,0 +1,195 @@
+"""
+Precompressed Response Helpers
+Builds gzip/brotli variants once and picks one per request by Accept-Encoding
+"""
+
+from fastapi.staticfiles import StaticFiles
+from starlette.datastructures import Headers
+from starlette.responses import FileResponse, Response
+from starlette.types import Scope
+from typing import Dict, Iterable, List, Optional, Tuple
+import anyio
+import gzip
+import os
+
+try:
+    import brotli
+except ImportError:  # brotli is optional; gzip is always available
+    brotli = None
+
+# Bodies smaller than this are not worth compressing
+COMPRESS_MIN_SIZE = int(os.getenv("COMPRESS_MIN_SIZE", "512"))
+
+# Preferred order when the client accepts several encodings equally
+ENCODINGS = ("br", "gzip") if brotli is not None else ("gzip",)
+
+# Suffix of the build-time precompressed sibling file for each encoding
+FILE_SUFFIXES = {"br": ".br", "gzip": ".gz"}
+
+COMPRESSIBLE_EXTENSIONS = {".js", ".css", ".html", ".json", ".svg", ".txt", ".map"}
+
+
+def compress(data: bytes, encoding: str) -> bytes:
+    """Compress data with the strongest settings for an encoding"""
+    if encoding == "br":
+        return brotli.compress(data, quality=11)
+    # mtime=0 keeps the output (and therefore ETags) reproducible
+    return gzip.compress(data, compresslevel=9, mtime=0)
+
+
+def precompress(data: bytes) -> Dict[str, bytes]:
+    """
+    Build every supported compressed variant of a body
+
+    Args:
+        data: Uncompressed body
+
+    Returns:
+        Content-Encoding -> compressed bytes, only for variants that save space
+    """
+    if len(data) < COMPRESS_MIN_SIZE:
+        return {}
+    variants = {}
+    for encoding in ENCODINGS:
+        compressed = compress(data, encoding)
+        if len(compressed) < len(data):
+            variants[encoding] = compressed
+    return variants
+
+
+def choose_encoding(accept_encoding: Optional[str], available: Iterable[str]) -> Optional[str]:
+    """
+    Pick the best available Content-Encoding for an Accept-Encoding header
+
+    Args:
+        accept_encoding: Raw Accept-Encoding request header
+        available: Encodings the server has a variant for
+
+    Returns:
+        The chosen encoding, or None to send the identity body
+    """
+    if not accept_encoding:
+        return None
+
+    weights: Dict[str, float] = {}
+    for part in accept_encoding.split(","):
+        token, _, params = part.strip().partition(";")
+        q = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                q = float(params[2:])
+            except ValueError:
+                q = 0.0
+        weights[token.strip().lower()] = q
+
+    best, best_q = None, 0.0
+    for encoding in ENCODINGS:
+        if encoding not in available:
+            continue
+        q = weights.get(encoding, weights.get("*", 0.0))
+        if q > best_q:
+            best, best_q = encoding, q
+    return best
+
+
+def variant_etag(etag: str, encoding: str) -> str:
+    """Derive the strong ETag of a compressed representation"""
+    if etag.endswith('"'):
+        return etag[:-1] + "-" + encoding + '"'
+    return etag + "-" + encoding
+
+
+def etag_matches(if_none_match: Optional[str], etags: List[str]) -> bool:
+    """
+    Check an If-None-Match header against the ETags of a resource
+
+    Uses the weak comparison RFC 9110 requires for If-None-Match, so a
+    ``W/`` prefix added by a proxy still matches.
+    """
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    for candidate in if_none_match.split(","):
+        candidate = candidate.strip()
+        if candidate.startswith("W/"):
+            candidate = candidate[2:]
+        if candidate in etags:
+            return True
+    return False
+
+
+class PrecompressedStaticFiles(StaticFiles):
+    """
+    StaticFiles that serves gzip/brotli variants without compressing per request
+
+    A variant comes from a ``.gz``/``.br`` sibling written at build time by
+    ``scripts/precompress_static.py`` when one is present and up to date,
+    otherwise it is compressed on first hit and kept in memory until the
+    file changes.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        # (path, encoding) -> (mtime_ns, size, compressed bytes or None)
+        self._variants: Dict[Tuple[str, str], Tuple[int, int, Optional[bytes]]] = {}
+
+    async def get_response(self, path: str, scope: Scope) -> Response:
+        response = await super().get_response(path, scope)
+        if not isinstance(response, FileResponse) or response.status_code != 200:
+            return response
+        if os.path.splitext(response.path)[1].lower() not in COMPRESSIBLE_EXTENSIONS:
+            return response
+
+        response.headers["Vary"] = "Accept-Encoding"
+        request_headers = Headers(scope=scope)
+        encoding = choose_encoding(request_headers.get("accept-encoding"), ENCODINGS)
+        if encoding is None:
+            return response
+
+        variant = await anyio.to_thread.run_sync(self.lookup_variant, response.path, encoding)
+        if variant is None:
+            return response
+
+        headers = {
+            "Content-Type": response.headers["content-type"],
+            "Content-Encoding": encoding,
+            "Vary": "Accept-Encoding",
+            "ETag": variant_etag(response.headers["etag"], encoding),
+            "Last-Modified": response.headers["last-modified"],
+        }
+        if etag_matches(request_headers.get("if-none-match"), [headers["ETag"]]):
+            return Response(status_code=304, headers={
+                key: value for key, value in headers.items() if key != "Content-Type"
+            })
+        if isinstance(variant, str):
+            return FileResponse(variant, headers=headers, method=scope["method"])
+        return Response(content=variant, headers=headers)
+
+    def lookup_variant(self, full_path: str, encoding: str):
+        """
+        Find the compressed variant of a file
+
+        Returns:
+            Path of an up-to-date precompressed sibling, compressed bytes,
+            or None if compression does not help for this file
+        """
+        stat_result = os.stat(full_path)
+        sibling = full_path + FILE_SUFFIXES[encoding]
+        try:
+            if os.stat(sibling).st_mtime_ns >= stat_result.st_mtime_ns:
+                return sibling
+        except OSError:
+            pass
+
+        key = (full_path, encoding)
+        cached = self._variants.get(key)
+        if cached and cached[:2] == (stat_result.st_mtime_ns, stat_result.st_size):
+            return cached[2]
+
+        with open(full_path, "rb") as f:
+            data = f.read()
+        compressed = precompress(data).get(encoding)
+        self._variants[key] = (stat_result.st_mtime_ns, stat_result.st_size, compressed)
+        return compressed
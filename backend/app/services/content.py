@@ -0,0 +1,330 @@
+"""
+Content Catalog Service
+Loads the phonics content files once and serves them from memory
+"""
+
+from typing import Any, Dict, List, Optional, Tuple
+import asyncio
+import hashlib
+import json
+import os
+
+from app.services.grading import GRADED_GAMES, build_answer_key, build_answer_options
+from app.services.http_cache import PreparedBody
+
+DATA_DIR = os.path.join(os.path.dirname(__file__), "../../data")
+
+# Seconds between checks for edited content files (0 disables hot reload)
+RELOAD_INTERVAL = float(os.getenv("CONTENT_RELOAD_INTERVAL", "2"))
+
+# name -> (file name, key used by the list endpoint, fields every item must have)
+CONTENT_FILES = {
+    "flashcards": ("flashcards.json", "cards", ("letter", "word")),
+    "soundout": ("soundout.json", "words", ("word", "phonemes")),
+    "hungry_monster": ("hungry_monster.json", "questions", ("correctAnswer", "options")),
+    "minimal_pairs": ("minimal_pairs.json", "exercises", ("words",)),
+    "mouth_moves": ("mouth_moves.json", "exercises", ("pair", "words")),
+    "homophone_quiz": ("homophone_quiz.json", "questions", ("correctWord", "options")),
+}
+
+ACHIEVEMENTS_FILE = "achievements.json"
+
+# Everything the SPA can request from /api/bootstrap, in payload order
+BOOTSTRAP_MODULES = tuple(CONTENT_FILES) + ("achievements",)
+
+DEFAULT_ACHIEVEMENTS = {
+    "modules": {},
+    "streaks": {},
+    "xpPerLevel": 500
+}
+
+
+class ContentError(Exception):
+    """Raised when a content file is missing or malformed"""
+
+
+class Dataset:
+    """Validated, id-indexed view of one content file"""
+
+    __slots__ = ("name", "items", "by_id", "item_ids", "listing", "listing_body", "item_bodies", "answer_key",
+                 "answer_options")
+
+    def __init__(self, name: str, items: List[Dict[str, Any]], list_key: str):
+        self.name = name
+        self.items = items
+        self.by_id: Dict[int, Dict[str, Any]] = {item["id"]: item for item in items}
+        self.item_ids = tuple(self.by_id)
+        # Pre-built body for the list endpoint
+        self.listing = {list_key: items, "total": len(items)}
+        # Encoded once per content version; ETags change whenever the content does
+        self.listing_body = PreparedBody(self.listing)
+        self.item_bodies = {item["id"]: PreparedBody(item) for item in items}
+        # Expected answers for server-side grading (empty for ungraded content)
+        self.answer_key = build_answer_key(name, items)
+        # Answers offered per item, for telling real confusions from noise
+        self.answer_options = build_answer_options(name, items)
+
+    def get(self, item_id: int) -> Optional[Dict[str, Any]]:
+        """Find item by ID"""
+        return self.by_id.get(item_id)
+
+    def get_body(self, item_id: int) -> Optional[PreparedBody]:
+        """Find the pre-encoded body of an item by ID"""
+        return self.item_bodies.get(item_id)
+
+    def __len__(self) -> int:
+        return len(self.items)
+
+
+class ContentCatalog:
+    """Immutable snapshot of every content file"""
+
+    def __init__(
+        self,
+        datasets: Dict[str, Dataset],
+        achievements: Dict[str, Any],
+        errors: Dict[str, str],
+        stamps: Dict[str, Optional[Tuple[int, int]]]
+    ):
+        self.datasets = datasets
+        self.achievements = achievements
+        self.achievements_body = PreparedBody(achievements)
+        self.errors = errors
+        # File stamps taken before reading, used to detect later edits
+        self.stamps = stamps
+        # Short content version that changes whenever any module changes
+        digest = hashlib.sha256(self.achievements_body.etag.encode())
+        for name in sorted(datasets):
+            digest.update(datasets[name].listing_body.etag.encode())
+        self.version = digest.hexdigest()[:16]
+        # Game name -> answer key, for grading whole rounds in one pass
+        self.answer_keys = {
+            name: datasets[name].answer_key for name in GRADED_GAMES if name in datasets
+        }
+        # Bootstrap bodies keyed by module selection, built on demand
+        self.bootstrap_bodies: Dict[Tuple[str, ...], PreparedBody] = {}
+
+    def get(self, name: str) -> Optional[Dataset]:
+        """Return a dataset, or None if its file failed to load"""
+        return self.datasets.get(name)
+
+    def bootstrap_payload(self, modules: Tuple[str, ...]) -> Dict[str, Any]:
+        """
+        Build the single-request startup payload for the SPA
+
+        Args:
+            modules: Dataset names and/or "achievements" to include
+
+        Returns:
+            Content version plus the list body of every requested module
+        """
+        payload: Dict[str, Any] = {"version": self.version}
+        for name in modules:
+            if name == "achievements":
+                payload[name] = self.achievements
+            elif name in self.datasets:
+                payload[name] = self.datasets[name].listing
+        return payload
+
+    def bootstrap_body(self, modules: Tuple[str, ...]) -> PreparedBody:
+        """Return the encoded bootstrap payload, building it once per selection"""
+        prepared = self.bootstrap_bodies.get(modules)
+        if prepared is None:
+            prepared = PreparedBody(self.bootstrap_payload(modules))
+            self.bootstrap_bodies[modules] = prepared
+        return prepared
+
+
+def _read_json(path: str) -> Any:
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except FileNotFoundError:
+        raise ContentError(f"{os.path.basename(path)} not found")
+    except json.JSONDecodeError as e:
+        raise ContentError(f"{os.path.basename(path)} is not valid JSON: {e}")
+
+
+def validate_items(name: str, data: Any, required: tuple) -> List[Dict[str, Any]]:
+    """
+    Check that a content file is a list of items with unique integer IDs
+
+    Args:
+        name: Dataset name (used in error messages)
+        data: Parsed JSON document
+        required: Fields every item must have besides "id"
+
+    Returns:
+        The validated list of items
+
+    Raises:
+        ContentError: If the document does not match the expected shape
+    """
+    if not isinstance(data, list):
+        raise ContentError(f"{name}: expected a list of items")
+
+    seen = set()
+    for index, item in enumerate(data):
+        if not isinstance(item, dict):
+            raise ContentError(f"{name}[{index}]: expected an object")
+        item_id = item.get("id")
+        if not isinstance(item_id, int) or isinstance(item_id, bool):
+            raise ContentError(f"{name}[{index}]: missing integer id")
+        if item_id in seen:
+            raise ContentError(f"{name}[{index}]: duplicate id {item_id}")
+        seen.add(item_id)
+        missing = [field for field in required if field not in item]
+        if missing:
+            raise ContentError(f"{name}[{index}]: missing {', '.join(missing)}")
+    return data
+
+
+def streak_days(key: str, streak: Dict[str, Any]) -> Optional[int]:
+    """Length of a streak rule: its "days", else the number its key starts with ("7_day")"""
+    days = streak.get("days", key.split("_", 1)[0])
+    try:
+        days = int(days)
+    except (TypeError, ValueError):
+        return None
+    return days if days > 0 else None
+
+
+def validate_achievements(data: Any) -> Dict[str, Any]:
+    """Check the achievements configuration shape"""
+    if not isinstance(data, dict):
+        raise ContentError("achievements: expected an object")
+    if not isinstance(data.get("modules", {}), dict):
+        raise ContentError("achievements: modules must be an object")
+    if not isinstance(data.get("streaks", {}), dict):
+        raise ContentError("achievements: streaks must be an object")
+    for name, module in data.get("modules", {}).items():
+        xp = module.get("xp", 0) if isinstance(module, dict) else None
+        if not isinstance(xp, int) or xp < 0:
+            raise ContentError(f"achievements: module {name!r} needs a non-negative integer xp")
+        achievement = module.get("achievement")
+        if achievement is not None and not (isinstance(achievement, dict) and achievement.get("id")):
+            raise ContentError(f"achievements: module {name!r} has an achievement without an id")
+    for key, streak in data.get("streaks", {}).items():
+        if not isinstance(streak, dict) or streak_days(key, streak) is None:
+            raise ContentError(f"achievements: streak {key!r} needs a length (\"days\" or a key like 7_day)")
+        if not isinstance(streak.get("xp", 0), int) or streak.get("xp", 0) < 0:
+            raise ContentError(f"achievements: streak {key!r} needs a non-negative integer xp")
+    xp_per_level = data.get("xpPerLevel", DEFAULT_ACHIEVEMENTS["xpPerLevel"])
+    if not isinstance(xp_per_level, int) or xp_per_level <= 0:
+        raise ContentError("achievements: xpPerLevel must be a positive integer")
+    return data
+
+
+def content_stamps(data_dir: str = DATA_DIR) -> Dict[str, Optional[Tuple[int, int]]]:
+    """Return (mtime_ns, size) for every content file, or None if missing"""
+    stamps = {}
+    file_names = [entry[0] for entry in CONTENT_FILES.values()] + [ACHIEVEMENTS_FILE]
+    for file_name in file_names:
+        try:
+            st = os.stat(os.path.join(data_dir, file_name))
+            stamps[file_name] = (st.st_mtime_ns, st.st_size)
+        except OSError:
+            stamps[file_name] = None
+    return stamps
+
+
+def build_catalog(
+    data_dir: str = DATA_DIR,
+    previous: Optional[ContentCatalog] = None
+) -> ContentCatalog:
+    """
+    Read and validate every content file
+
+    A file that fails to load is recorded in ``errors`` instead of aborting
+    the whole catalog, so one bad file only affects its own endpoints.
+    When a previous catalog is given, its last good copy of a failing file
+    is kept instead.
+
+    Args:
+        data_dir: Directory holding the content JSON files
+        previous: Catalog currently being served, if any
+
+    Returns:
+        A new content catalog
+    """
+    stamps = content_stamps(data_dir)
+    datasets: Dict[str, Dataset] = {}
+    errors: Dict[str, str] = {}
+
+    for name, (file_name, list_key, required) in CONTENT_FILES.items():
+        try:
+            data = _read_json(os.path.join(data_dir, file_name))
+            items = validate_items(name, data, required)
+            datasets[name] = Dataset(name, items, list_key)
+        except (ContentError, KeyError, TypeError, AttributeError) as e:
+            errors[name] = str(e) if isinstance(e, ContentError) else f"{name}: malformed item ({e!r})"
+            if previous is not None and previous.get(name) is not None:
+                datasets[name] = previous.get(name)
+
+    try:
+        achievements = validate_achievements(
+            _read_json(os.path.join(data_dir, ACHIEVEMENTS_FILE))
+        )
+    except ContentError as e:
+        errors["achievements"] = str(e)
+        achievements = previous.achievements if previous is not None else DEFAULT_ACHIEVEMENTS
+
+    for name, error in errors.items():
+        print(f"Error loading content '{name}': {error}")
+
+    catalog = ContentCatalog(datasets, achievements, errors, stamps)
+    # The full payload is what the SPA asks for on startup, build it up front
+    catalog.bootstrap_body(BOOTSTRAP_MODULES)
+    return catalog
+
+
+# Current catalog, replaced as a whole and never mutated in place
+_catalog: Optional[ContentCatalog] = None
+
+
+def load_catalog() -> ContentCatalog:
+    """Build the catalog from disk and make it current"""
+    global _catalog
+    _catalog = build_catalog()
+    return _catalog
+
+
+def get_catalog() -> ContentCatalog:
+    """Return the current catalog, loading it on first use"""
+    if _catalog is None:
+        return load_catalog()
+    return _catalog
+
+
+def reload_catalog() -> bool:
+    """
+    Rebuild the catalog if any content file changed on disk
+
+    The new catalog is built off to the side and swapped in with a single
+    assignment, so requests see either the old or the new content, never a
+    mix. Files that fail validation keep serving their previous version.
+
+    Returns:
+        True if a new catalog was swapped in
+    """
+    global _catalog
+    current = get_catalog()
+    if content_stamps() == current.stamps:
+        return False
+    _catalog = build_catalog(previous=current)
+    return True
+
+
+async def watch_content(interval: float = RELOAD_INTERVAL):
+    """
+    Background task that polls content file mtimes and hot-reloads them
+
+    Disk access runs in a worker thread so the event loop never blocks on it.
+    """
+    while True:
+        await asyncio.sleep(interval)
+        try:
+            if await asyncio.to_thread(reload_catalog):
+                print("Content catalog reloaded")
+        except Exception as e:
+            print(f"Error reloading content: {e}")
@@ -0,0 +1,155 @@
+"""
+Game Grading Service
+Precomputed answer keys and single-pass grading of whole game rounds
+"""
+
+from typing import Any, Dict, FrozenSet, List, Optional
+
+# Games that can be graded on the server
+GRADED_GAMES = ("hungry_monster", "minimal_pairs", "homophone_quiz", "mouth_moves")
+
+
+def normalize_answer(value: str) -> str:
+    """Compare answers case-insensitively, ignoring phoneme slashes"""
+    return value.strip().strip("/").lower()
+
+
+def build_answer_key(name: str, items: List[Dict[str, Any]]) -> Dict[int, Any]:
+    """
+    Precompute the expected answers of a content file
+
+    Args:
+        name: Dataset name
+        items: Validated content items
+
+    Returns:
+        item ID -> expected answer (hungry_monster, homophone_quiz) or
+        item ID -> {word -> expected answer} (minimal_pairs, mouth_moves);
+        empty for content that is not graded
+    """
+    if name == "hungry_monster":
+        return {item["id"]: item["correctAnswer"] for item in items}
+    if name == "homophone_quiz":
+        return {item["id"]: item["correctWord"] for item in items}
+    if name == "minimal_pairs":
+        # Sorting game: each word belongs in its phoneme's bucket
+        return {
+            item["id"]: {normalize_answer(w["word"]): w["phoneme"] for w in item["words"]}
+            for item in items
+        }
+    if name == "mouth_moves":
+        # Each word of the pair has a target mouth position
+        return {
+            item["id"]: {
+                normalize_answer(word): data.get("mouthPosition", "")
+                for word, data in item["words"].items()
+            }
+            for item in items
+        }
+    return {}
+
+
+def build_answer_options(name: str, items: List[Dict[str, Any]]) -> Dict[int, FrozenSet[str]]:
+    """
+    Normalized answers a learner can pick for each item of a content file
+
+    Wrong answers outside these (typos, made-up strings) are not worth
+    telling apart in the statistics.
+
+    Returns:
+        item ID -> answers offered; empty for content that is not graded
+    """
+    if name == "hungry_monster":
+        return {
+            item["id"]: frozenset(normalize_answer(option["word"]) for option in item["options"])
+            for item in items
+        }
+    if name == "homophone_quiz":
+        return {item["id"]: frozenset(normalize_answer(option) for option in item["options"]) for item in items}
+    if name == "minimal_pairs":
+        # The item's phoneme buckets
+        return {item["id"]: frozenset(normalize_answer(w["phoneme"]) for w in item["words"]) for item in items}
+    if name == "mouth_moves":
+        # Mouth positions of the pair's words
+        return {
+            item["id"]: frozenset(
+                normalize_answer(data.get("mouthPosition", "")) for data in item["words"].values()
+            )
+            for item in items
+        }
+    return {}
+
+
+def grade_answer(
+    answer_key: Dict[int, Any],
+    item_id: int,
+    selected: str,
+    word: Optional[str] = None
+) -> Optional[Dict[str, Any]]:
+    """
+    Grade one answer against an answer key
+
+    Args:
+        answer_key: Answer key of the item's game
+        item_id: Question/exercise ID
+        selected: Answer given by the learner
+        word: Word being placed, for games graded per word
+
+    Returns:
+        Result dict, or None if the item (or word) does not exist
+    """
+    expected = answer_key.get(item_id)
+    if isinstance(expected, dict):
+        if word is None:
+            return None
+        expected = expected.get(normalize_answer(word))
+    if expected is None:
+        return None
+
+    return {
+        "correct": normalize_answer(selected) == normalize_answer(expected),
+        "correctAnswer": expected,
+        "selectedAnswer": selected
+    }
+
+
+def grade_round(answer_keys: Dict[str, Dict[int, Any]], answers: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """
+    Grade a whole round of answers, across game types, in one pass
+
+    Args:
+        answer_keys: Game name -> answer key
+        answers: Dicts with game, item_id, answer and optional word
+
+    Returns:
+        Per-answer results (in submission order) and the round score
+    """
+    results = []
+    correct = graded = 0
+
+    for answer in answers:
+        result = grade_answer(
+            answer_keys.get(answer["game"], {}),
+            answer["item_id"],
+            answer["answer"],
+            answer.get("word")
+        )
+        entry = {"game": answer["game"], "item_id": answer["item_id"]}
+        if answer.get("word") is not None:
+            entry["word"] = answer["word"]
+        if result is None:
+            entry["error"] = "Item not found"
+        else:
+            entry.update(result)
+            graded += 1
+            correct += result["correct"]
+        results.append(entry)
+
+    return {
+        "results": results,
+        "score": {
+            "correct": correct,
+            "total": graded,
+            "percent": round(100 * correct / graded) if graded else 0
+        }
+    }
@@ -0,0 +1,132 @@
+"""
+Guest Tier
+Bounded in-memory home of guest accounts, kept apart from registered
+users and evicted after an idle period
+"""
+
+from collections import OrderedDict
+from typing import Callable, List, Optional
+import os
+import threading
+import time
+
+from app.models.user_record import UserRecord
+from app.services import metrics
+
+# Guests held in memory per worker; the least recently active go first
+GUEST_TIER_SIZE = int(os.getenv("GUEST_TIER_SIZE", "20000"))
+# Seconds without activity after which a guest is dropped
+GUEST_IDLE_TTL = float(os.getenv("GUEST_IDLE_TTL", str(6 * 3600)))
+# Seconds between sweeps for idle guests
+GUEST_SWEEP_INTERVAL = float(os.getenv("GUEST_SWEEP_INTERVAL", "300"))
+
+
+class GuestTier:
+    """
+    guest ID -> (guest, last seen), ordered least recently seen first
+
+    Ordering by last access makes both LRU overflow and idle eviction
+    pop from the front, so neither scans guests that stay.
+    """
+
+    def __init__(self, max_size: int = GUEST_TIER_SIZE, clock: Callable[[], float] = time.time):
+        self.max_size = max_size
+        self.clock = clock
+        self._entries: "OrderedDict[str, List]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __contains__(self, guest_id: str) -> bool:
+        # Without marking the guest active
+        return guest_id in self._entries
+
+    def peek(self, guest_id: str) -> Optional[UserRecord]:
+        """Return a guest without marking them active"""
+        entry = self._entries.get(guest_id)
+        return entry[0] if entry is not None else None
+
+    def get(self, guest_id: str) -> Optional[UserRecord]:
+        """Return a guest and mark them active"""
+        with self._lock:
+            entry = self._entries.get(guest_id)
+            if entry is None:
+                return None
+            entry[1] = self.clock()
+            self._entries.move_to_end(guest_id)
+            return entry[0]
+
+    def touch(self, guest_id: str) -> bool:
+        """Mark a guest active; False if they are not in the tier"""
+        return self.get(guest_id) is not None
+
+    def put(self, guest: UserRecord, last_seen: Optional[float] = None) -> List[str]:
+        """
+        Add or replace a guest
+
+        Args:
+            guest: Guest account
+            last_seen: Epoch seconds of their last activity (default: now)
+
+        Returns:
+            IDs of guests evicted to stay within max_size
+        """
+        evicted = []
+        with self._lock:
+            self._entries[guest.id] = [guest, self.clock() if last_seen is None else last_seen]
+            self._entries.move_to_end(guest.id)
+            if last_seen is not None:
+                # Older activity belongs further forward; restore the order
+                self._reorder(guest.id)
+            while len(self._entries) > self.max_size:
+                evicted.append(self._entries.popitem(last=False)[0])
+            metrics.set_gauge("guest_tier_size", len(self._entries))
+        if evicted:
+            metrics.inc("guests_evicted_overflow", len(evicted))
+        return evicted
+
+    def _reorder(self, guest_id: str):
+        """Move an entry back before newer ones (lock held; rare: loading only)"""
+        last_seen = self._entries[guest_id][1]
+        newer = []
+        for other_id in reversed(self._entries):
+            if other_id == guest_id:
+                continue
+            if self._entries[other_id][1] <= last_seen:
+                break
+            newer.append(other_id)
+        for other_id in reversed(newer):
+            self._entries.move_to_end(other_id)
+
+    def replace(self, guest: UserRecord):
+        """Swap in a newer copy of a guest, if present, keeping their activity"""
+        with self._lock:
+            entry = self._entries.get(guest.id)
+            if entry is not None:
+                entry[0] = guest
+
+    def discard(self, guest_id: str) -> Optional[UserRecord]:
+        with self._lock:
+            entry = self._entries.pop(guest_id, None)
+            metrics.set_gauge("guest_tier_size", len(self._entries))
+        return entry[0] if entry else None
+
+    def evict_idle(self, idle_before: float) -> List[str]:
+        """Drop guests not seen since a time; return their IDs"""
+        evicted = []
+        with self._lock:
+            while self._entries:
+                guest_id, (_, last_seen) = next(iter(self._entries.items()))
+                if last_seen >= idle_before:
+                    break
+                self._entries.popitem(last=False)
+                evicted.append(guest_id)
+            metrics.set_gauge("guest_tier_size", len(self._entries))
+        if evicted:
+            metrics.inc("guests_evicted_idle", len(evicted))
+        return evicted
+
+    def values(self) -> List[UserRecord]:
+        with self._lock:
+            return [entry[0] for entry in self._entries.values()]
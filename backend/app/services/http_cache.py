@@ -0,0 +1,73 @@
+"""
+HTTP Caching Helpers
+Pre-encoded and precompressed JSON bodies, strong ETags and conditional
+(If-None-Match) responses for read-only content
+"""
+
+from fastapi import Request, Response
+from typing import Any
+import hashlib
+import orjson
+import os
+
+from app.services.compression import choose_encoding, etag_matches, precompress, variant_etag
+
+# Browsers may reuse content for this long before revalidating with the ETag
+CONTENT_MAX_AGE = int(os.getenv("CONTENT_MAX_AGE", "60"))
+CONTENT_CACHE_CONTROL = f"public, max-age={CONTENT_MAX_AGE}, must-revalidate"
+
+
+class PreparedBody:
+    """
+    JSON body encoded to bytes once, with the strong ETag of those bytes
+    and its gzip/brotli variants
+    """
+
+    __slots__ = ("body", "etag", "encoded")
+
+    def __init__(self, payload: Any):
+        self.body = orjson.dumps(payload)
+        self.etag = '"' + hashlib.sha256(self.body).hexdigest()[:32] + '"'
+        # Content-Encoding -> (compressed body, ETag of that representation)
+        self.encoded = {
+            encoding: (data, variant_etag(self.etag, encoding))
+            for encoding, data in precompress(self.body).items()
+        }
+
+    def etags(self):
+        """Every ETag a client may hold for this content version"""
+        return [self.etag] + [etag for _, etag in self.encoded.values()]
+
+
+def cached_json(
+    request: Request,
+    prepared: PreparedBody,
+    cache_control: str = CONTENT_CACHE_CONTROL
+) -> Response:
+    """
+    Return pre-encoded content with caching headers, or 304 if the client
+    copy is current
+
+    The body bytes are sent as-is, skipping jsonable_encoder and json.dumps,
+    and a precompressed variant is picked by Accept-Encoding when available.
+
+    Args:
+        request: Incoming request (for If-None-Match)
+        prepared: Pre-encoded body and its ETag
+        cache_control: Cache-Control header value
+
+    Returns:
+        304 Not Modified with no body, or a JSON response
+    """
+    body, etag = prepared.body, prepared.etag
+    headers = {"Cache-Control": cache_control, "Vary": "Accept-Encoding"}
+    encoding = choose_encoding(request.headers.get("accept-encoding"), prepared.encoded)
+    if encoding is not None:
+        body, etag = prepared.encoded[encoding]
+        headers["Content-Encoding"] = encoding
+    headers["ETag"] = etag
+
+    if etag_matches(request.headers.get("if-none-match"), prepared.etags()):
+        headers.pop("Content-Encoding", None)
+        return Response(status_code=304, headers=headers)
+    return Response(content=body, media_type="application/json", headers=headers)
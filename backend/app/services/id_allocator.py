@@ -0,0 +1,63 @@
+"""
+Guest ID Allocation
+Hands out guest numbers that are unique across worker processes and,
+when GUEST_ID_SERVICE_URL is set, across nodes
+"""
+
+from urllib.parse import urlencode
+from urllib.request import Request, urlopen
+import json
+import os
+
+from app.services.user_store import UserStore
+
+# Shared counter service (scripts/id_service.py is a local stand-in); when
+# unset, the user store's own counter is used, which covers one node
+GUEST_ID_SERVICE_URL = os.getenv("GUEST_ID_SERVICE_URL", "").rstrip("/")
+GUEST_ID_SERVICE_TIMEOUT = float(os.getenv("GUEST_ID_SERVICE_TIMEOUT", "2"))
+
+
+class StoreIDAllocator:
+    """Guest numbers from the user store's counter"""
+
+    def __init__(self, store: UserStore):
+        self.store = store
+
+    def next_guest_number(self) -> int:
+        return self.store.allocate_guest_number()
+
+
+class ServiceIDAllocator:
+    """
+    Guest numbers from a counter service shared by every node
+
+    The service is sent the highest number this node has seen (floor), so
+    pointing an existing deployment at a fresh service cannot reissue IDs.
+    """
+
+    def __init__(self, url: str, floor: int = 0, timeout: float = GUEST_ID_SERVICE_TIMEOUT):
+        self.url = url
+        self.floor = floor
+        self.timeout = timeout
+
+    def next_guest_number(self) -> int:
+        query = urlencode({"floor": self.floor})
+        request = Request(f"{self.url}/next/guest?{query}", method="POST")
+        with urlopen(request, timeout=self.timeout) as response:
+            return json.load(response)["value"]
+
+
+def create_id_allocator(store: UserStore, floor: int = 0):
+    """
+    Build the configured guest ID allocator
+
+    Args:
+        store: User store to fall back on
+        floor: Highest guest number already in use
+
+    Returns:
+        An object with next_guest_number()
+    """
+    if GUEST_ID_SERVICE_URL:
+        return ServiceIDAllocator(GUEST_ID_SERVICE_URL, floor)
+    return StoreIDAllocator(store)
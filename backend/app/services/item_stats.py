@@ -0,0 +1,382 @@
+"""
+Item Statistics Service
+Streaming per-item statistics for the graded games (attempts, accuracy,
+response time, the wrong answers given), and difficulty buckets that
+adaptive rounds are drawn from.
+
+A graded answer adds to counters held in memory. Every
+ITEM_STATS_FLUSH_INTERVAL the worker adds its counts to item_stats in
+progress.db in one transaction, then reads back the rows any worker
+changed since it last looked. An item whose difficulty crossed a bucket
+edge moves bucket then, in O(1). Picking a round reads only the buckets
+and the learner's aggregate, never the answer history.
+"""
+
+from bisect import bisect_right
+from math import ceil
+from typing import Any, Dict, List, Optional, Tuple
+import asyncio
+import os
+import random
+import sqlite3
+import threading
+
+from app.services import metrics
+from app.services.auth import progress_log
+from app.services.content import CONTENT_FILES, Dataset, get_catalog
+from app.services.grading import normalize_answer
+from app.services.progress import PROGRESS_DB_PATH
+
+# Graded game -> progress module its answers are recorded under (the
+# learner's accuracy there sizes their rounds)
+GAME_MODULES = {
+    "hungry_monster": "monster",
+    "minimal_pairs": "pairs",
+    "homophone_quiz": "homophoneQuiz",
+    "mouth_moves": "mouthMoves",
+}
+
+# Seconds between flushes of this worker's counts (and reads of everyone's)
+ITEM_STATS_FLUSH_INTERVAL = float(os.getenv("ITEM_STATS_FLUSH_INTERVAL", "2"))
+
+# Items and learners with few answers are pulled toward PRIOR_ACCURACY as
+# if they had PRIOR_ATTEMPTS answers at it
+PRIOR_ATTEMPTS = 5
+PRIOR_ACCURACY = 0.7
+
+# A correct answer slower than SLOW_ANSWER_SECONDS counts as half right
+SLOW_ANSWER_SECONDS = 10
+SLOW_PENALTY = 0.5
+
+# Upper edges of the difficulty buckets (smoothed error rate), easiest first
+BUCKET_EDGES = (0.15, 0.3, 0.45, 0.6)
+BUCKETS = len(BUCKET_EDGES) + 1
+
+# Round size from the weakest learner to the strongest, and the share of
+# a round drawn from the learner's own bucket (the rest from its
+# neighbors, easier first)
+ROUND_MIN = 5
+ROUND_MAX = 10
+ROUND_TARGET_SHARE = 0.6
+
+# Wrong answers listed per item in the statistics. Answers the item does
+# not offer are all counted as OTHER_ANSWER, so clients cannot add rows
+TOP_CONFUSIONS = 3
+OTHER_ANSWER = "(other)"
+
+
+def smoothed_accuracy(correct: float, attempts: int) -> float:
+    return (correct + PRIOR_ATTEMPTS * PRIOR_ACCURACY) / (attempts + PRIOR_ATTEMPTS)
+
+
+def learner_skill(aggregate, game: str) -> float:
+    """
+    0 (struggling, at or below half right) to 1 (always right) from a
+    learner's answers in the game's module, as kept in their progress
+    aggregate (a ProgressAggregate, or None for anonymous callers)
+    """
+    stats = aggregate.modules.get(GAME_MODULES.get(game, game), {}) if aggregate is not None else {}
+    accuracy = smoothed_accuracy(stats.get("correct", 0), stats.get("answers", 0))
+    return min(1.0, max(0.0, (accuracy - 0.5) / 0.5))
+
+
+class ItemCounters:
+    """Running totals for one item"""
+
+    __slots__ = ("attempts", "correct", "slow_correct", "seconds", "timed")
+
+    def __init__(self):
+        self.attempts = self.correct = self.slow_correct = self.timed = 0
+        self.seconds = 0.0
+
+    def add(self, attempts: int, correct: int, slow_correct: int, seconds: float, timed: int):
+        self.attempts += attempts
+        self.correct += correct
+        self.slow_correct += slow_correct
+        self.seconds += seconds
+        self.timed += timed
+
+    def difficulty(self) -> float:
+        """Smoothed share of answers that were wrong (slow ones half wrong)"""
+        return 1 - smoothed_accuracy(self.correct - SLOW_PENALTY * self.slow_correct, self.attempts)
+
+
+class DifficultyBuckets:
+    """One game's items grouped by difficulty; placing or moving an item is O(1)"""
+
+    def __init__(self, dataset: Dataset):
+        self.dataset = dataset
+        self.members: List[List[int]] = [[] for _ in range(BUCKETS)]
+        # Item ID -> (bucket, index in its member list)
+        self.where: Dict[int, Tuple[int, int]] = {}
+
+    def place(self, item_id: int, difficulty: float):
+        bucket = bisect_right(BUCKET_EDGES, difficulty)
+        current = self.where.get(item_id)
+        if current is not None:
+            if current[0] == bucket:
+                return
+            self.remove(item_id)
+        self.where[item_id] = (bucket, len(self.members[bucket]))
+        self.members[bucket].append(item_id)
+
+    def remove(self, item_id: int):
+        bucket, index = self.where.pop(item_id)
+        members = self.members[bucket]
+        last = members.pop()
+        if last != item_id:
+            members[index] = last
+            self.where[last] = (bucket, index)
+
+    def __len__(self) -> int:
+        return len(self.where)
+
+
+class ItemStats:
+    """
+    Per-item counters and difficulty buckets for every graded game, shared
+    by all workers through progress.db
+
+    item_stats holds the totals; `version` marks the flush that last
+    changed a row, so a worker reads back only rows changed since its
+    last refresh. item_confusions counts each wrong answer given per
+    item (and word, for games graded per word), among the answers the
+    item offers; anything else shares one OTHER_ANSWER row.
+    """
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS item_stats (
+            game TEXT NOT NULL,
+            item_id INTEGER NOT NULL,
+            attempts INTEGER NOT NULL,
+            correct INTEGER NOT NULL,
+            slow_correct INTEGER NOT NULL,
+            seconds REAL NOT NULL,
+            timed INTEGER NOT NULL,
+            version INTEGER NOT NULL,
+            PRIMARY KEY (game, item_id)
+        );
+        CREATE INDEX IF NOT EXISTS item_stats_by_version ON item_stats (version);
+        CREATE TABLE IF NOT EXISTS item_confusions (
+            game TEXT NOT NULL,
+            item_id INTEGER NOT NULL,
+            word TEXT NOT NULL,
+            answer TEXT NOT NULL,
+            count INTEGER NOT NULL,
+            PRIMARY KEY (game, item_id, word, answer)
+        );
+    """
+
+    def __init__(self, path: str = PROGRESS_DB_PATH):
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA busy_timeout=5000")
+        self._conn.executescript(self.SCHEMA)
+        # Guards the in-memory state; the connection is used under _db_lock
+        self._lock = threading.Lock()
+        self._db_lock = threading.Lock()
+        self._counters: Dict[str, Dict[int, ItemCounters]] = {}
+        self._buckets: Dict[str, DifficultyBuckets] = {}
+        # Counts not yet flushed: (game, item ID) -> [attempts, correct,
+        # slow_correct, seconds, timed]; (game, item ID, word, answer) -> count
+        self._pending: Dict[Tuple[str, int], List] = {}
+        self._pending_confusions: Dict[Tuple[str, int, str, str], int] = {}
+        self._version = 0
+        self.refresh()
+
+    def observe(self, game: str, item_id: int, correct: bool, answer: Optional[str] = None,
+                word: Optional[str] = None, seconds: Optional[float] = None):
+        """Count one graded answer (held in memory until the next flush)"""
+        slow = correct and seconds is not None and seconds > SLOW_ANSWER_SECONDS
+        with self._lock:
+            pending = self._pending.get((game, item_id))
+            if pending is None:
+                pending = self._pending[(game, item_id)] = [0, 0, 0, 0.0, 0]
+            pending[0] += 1
+            pending[1] += correct
+            pending[2] += slow
+            if seconds is not None:
+                pending[3] += seconds
+                pending[4] += 1
+            if not correct and answer is not None:
+                key = (game, item_id, normalize_answer(word or ""), self._confusion(game, item_id, answer))
+                self._pending_confusions[key] = self._pending_confusions.get(key, 0) + 1
+
+    @staticmethod
+    def _confusion(game: str, item_id: int, answer: str) -> str:
+        """A wrong answer as counted: one of the item's options, or OTHER_ANSWER"""
+        dataset = get_catalog().get(game)
+        options = dataset.answer_options.get(item_id, ()) if dataset is not None else ()
+        if normalize_answer(answer) in options:
+            return answer.strip().lower()
+        return OTHER_ANSWER
+
+    def flush(self) -> int:
+        """Add this worker's counts to the shared totals, then refresh; returns items written"""
+        with self._lock:
+            pending, self._pending = self._pending, {}
+            confusions, self._pending_confusions = self._pending_confusions, {}
+        if pending or confusions:
+            with self._db_lock:
+                self._conn.execute("BEGIN IMMEDIATE")
+                try:
+                    version = self._conn.execute(
+                        "SELECT COALESCE(MAX(version), 0) + 1 FROM item_stats"
+                    ).fetchone()[0]
+                    self._conn.executemany(
+                        "INSERT INTO item_stats (game, item_id, attempts, correct, slow_correct, seconds, timed, version)"
+                        " VALUES (?, ?, ?, ?, ?, ?, ?, ?) ON CONFLICT (game, item_id) DO UPDATE SET"
+                        " attempts = attempts + excluded.attempts, correct = correct + excluded.correct,"
+                        " slow_correct = slow_correct + excluded.slow_correct,"
+                        " seconds = seconds + excluded.seconds, timed = timed + excluded.timed,"
+                        " version = excluded.version",
+                        [(game, item_id, *counts, version) for (game, item_id), counts in pending.items()]
+                    )
+                    self._conn.executemany(
+                        "INSERT INTO item_confusions (game, item_id, word, answer, count) VALUES (?, ?, ?, ?, ?)"
+                        " ON CONFLICT (game, item_id, word, answer) DO UPDATE SET count = count + excluded.count",
+                        [(*key, count) for key, count in confusions.items()]
+                    )
+                    self._conn.execute("COMMIT")
+                except Exception:
+                    self._conn.execute("ROLLBACK")
+                    # Keep the counts for the next flush
+                    with self._lock:
+                        for key, counts in pending.items():
+                            kept = self._pending.setdefault(key, [0, 0, 0, 0.0, 0])
+                            for i, value in enumerate(counts):
+                                kept[i] += value
+                        for key, count in confusions.items():
+                            self._pending_confusions[key] = self._pending_confusions.get(key, 0) + count
+                    raise
+            metrics.inc("item_stats_flushed", len(pending))
+        self.refresh()
+        return len(pending)
+
+    def refresh(self):
+        """Read rows changed since the last refresh and move their items between buckets"""
+        with self._db_lock:
+            rows = self._conn.execute(
+                "SELECT game, item_id, attempts, correct, slow_correct, seconds, timed, version"
+                " FROM item_stats WHERE version > ?", (self._version,)
+            ).fetchall()
+        if not rows:
+            return
+        with self._lock:
+            for game, item_id, attempts, correct, slow_correct, seconds, timed, version in rows:
+                counters = self._counters.setdefault(game, {}).get(item_id)
+                if counters is None:
+                    counters = self._counters[game][item_id] = ItemCounters()
+                # Rows hold totals; replace rather than add
+                counters.attempts = counters.correct = counters.slow_correct = counters.timed = 0
+                counters.seconds = 0.0
+                counters.add(attempts, correct, slow_correct, seconds, timed)
+                buckets = self._buckets.get(game)
+                if buckets is not None and item_id in buckets.where:
+                    buckets.place(item_id, counters.difficulty())
+                self._version = max(self._version, version)
+
+    def _difficulty(self, game: str, item_id: int) -> float:
+        counters = self._counters.get(game, {}).get(item_id)
+        return counters.difficulty() if counters is not None else ItemCounters().difficulty()
+
+    def _buckets_for(self, dataset: Dataset) -> DifficultyBuckets:
+        """A game's buckets, rebuilt only when its content changed (lock held)"""
+        buckets = self._buckets.get(dataset.name)
+        if buckets is None or buckets.dataset is not dataset:
+            buckets = self._buckets[dataset.name] = DifficultyBuckets(dataset)
+            for item in dataset.items:
+                buckets.place(item["id"], self._difficulty(dataset.name, item["id"]))
+        return buckets
+
+    def select(self, dataset: Dataset, skill: float, count: Optional[int] = None,
+               rng: random.Random = random) -> Dict[str, Any]:
+        """
+        A round for a learner: mostly items from the bucket matching their
+        skill, topped up from the buckets either side (easier first),
+        ordered easiest to hardest
+
+        Args:
+            dataset: The game's content
+            skill: From learner_skill (0 struggling to 1 always right)
+            count: Items wanted (default: ROUND_MIN to ROUND_MAX by skill)
+
+        Returns:
+            The items under the listing's key, their total, and how the
+            round was picked
+        """
+        size = count or ROUND_MIN + round((ROUND_MAX - ROUND_MIN) * skill)
+        target = round(skill * (BUCKETS - 1))
+        with self._lock:
+            buckets = self._buckets_for(dataset)
+            size = min(size, len(buckets))
+            chosen = rng.sample(buckets.members[target], min(len(buckets.members[target]), ceil(size * ROUND_TARGET_SHARE)))
+            for step in range(1, BUCKETS):
+                for bucket in (target - step, target + step):
+                    if 0 <= bucket < BUCKETS and len(chosen) < size:
+                        members = buckets.members[bucket]
+                        chosen += rng.sample(members, min(len(members), size - len(chosen)))
+            if len(chosen) < size:
+                picked = set(chosen)
+                rest = [item_id for item_id in buckets.members[target] if item_id not in picked]
+                chosen += rng.sample(rest, size - len(chosen))
+            difficulty = {item_id: self._difficulty(dataset.name, item_id) for item_id in chosen}
+            sizes = [len(members) for members in buckets.members]
+        chosen.sort(key=difficulty.__getitem__)
+        items = [dataset.get(item_id) for item_id in chosen]
+        return {
+            CONTENT_FILES[dataset.name][1]: items,
+            "total": len(items),
+            "adaptive": {"skill": round(skill, 3), "bucket": target, "buckets": sizes},
+        }
+
+    def describe(self, dataset: Dataset) -> List[Dict[str, Any]]:
+        """Statistics of every item of a game, in content order"""
+        with self._db_lock:
+            rows = self._conn.execute(
+                "SELECT item_id, word, answer, count FROM item_confusions WHERE game = ? ORDER BY count DESC",
+                (dataset.name,)
+            ).fetchall()
+        confusions: Dict[int, List[Dict[str, Any]]] = {}
+        for item_id, word, answer, count in rows:
+            listed = confusions.setdefault(item_id, [])
+            if len(listed) < TOP_CONFUSIONS:
+                listed.append({"word": word or None, "answer": answer, "count": count})
+        with self._lock:
+            buckets = self._buckets_for(dataset)
+            described = []
+            for item in dataset.items:
+                counters = self._counters.get(dataset.name, {}).get(item["id"]) or ItemCounters()
+                described.append({
+                    "item_id": item["id"],
+                    "attempts": counters.attempts,
+                    "accuracy": round(counters.correct / counters.attempts, 4) if counters.attempts else 0.0,
+                    "mean_seconds": round(counters.seconds / counters.timed, 2) if counters.timed else None,
+                    "difficulty": round(counters.difficulty(), 4),
+                    "bucket": buckets.where[item["id"]][0],
+                    "confusions": confusions.get(item["id"], []),
+                })
+        return described
+
+    def close(self):
+        with self._db_lock:
+            self._conn.close()
+
+
+item_stats = ItemStats()
+
+
+async def adaptive_round(dataset: Dataset, user_id: Optional[str], count: Optional[int] = None) -> Dict[str, Any]:
+    """A round picked for a learner's skill (an average learner's if anonymous)"""
+    aggregate = await asyncio.to_thread(progress_log.get, user_id) if user_id is not None else None
+    return item_stats.select(dataset, learner_skill(aggregate, dataset.name), count)
+
+
+async def watch_item_stats(interval: float = ITEM_STATS_FLUSH_INTERVAL):
+    """Flush and refresh item statistics every interval seconds"""
+    while True:
+        await asyncio.sleep(interval)
+        try:
+            await asyncio.to_thread(item_stats.flush)
+        except Exception as e:
+            print(f"Error flushing item statistics: {e}")
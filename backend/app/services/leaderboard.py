@@ -0,0 +1,495 @@
+"""
+Leaderboard Service
+XP rankings held in memory as order-statistics skip lists: a score
+change, a learner's rank and a page of the standings each cost O(log n)
+(plus the page length). Global and per-class boards, all time and for
+the current UTC day and ISO week. Every worker builds its boards from
+progress.db and then follows the board log ProgressLog writes, so all
+workers converge on the same standings
+"""
+
+from datetime import date, timedelta
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+import random
+import sqlite3
+import threading
+import time
+
+from app.services import metrics
+from app.services.progress import DAY, PROGRESS_DB_PATH
+
+PERIODS = ("all", "week", "day")
+SCOPES = ("global", "class")
+
+# Board log rows older than this are deleted (they only matter to the
+# current week's boards); checked every LEADERBOARD_PRUNE_INTERVAL
+BOARD_LOG_RETENTION = 8 * DAY
+LEADERBOARD_PRUNE_INTERVAL = 3600
+
+# Skip list shape: a node gets level k+1 with probability 1/4 of level k
+# (about 1.33 links per node, ~log4(n) levels)
+MAX_LEVEL = 24
+LEVEL_PROBABILITY = 0.25
+
+EPOCH = date(1970, 1, 1)
+
+
+class _Node:
+    __slots__ = ("key", "next", "width")
+
+    def __init__(self, key, level: int):
+        self.key = key
+        self.next: List[Optional["_Node"]] = [None] * level
+        # width[i]: how many positions next[i] is ahead (to one past the
+        # end when next[i] is None), which is what makes ranks O(log n)
+        self.width = [1] * level
+
+
+class RankedSkipList:
+    """
+    Sorted set of unique keys with positional access (an indexable skip
+    list): insert, remove, rank and select are O(log n) expected
+    """
+
+    def __init__(self, rng: Optional[random.Random] = None):
+        self._head = _Node(None, MAX_LEVEL)
+        self._head.width = [1] * MAX_LEVEL
+        self._levels = 1
+        self._size = 0
+        self._random = (rng or random.Random()).random
+
+    def __len__(self) -> int:
+        return self._size
+
+    def _random_level(self) -> int:
+        level = 1
+        while level < MAX_LEVEL and self._random() < LEVEL_PROBABILITY:
+            level += 1
+        return level
+
+    def _path(self, key) -> Tuple[List[_Node], List[int]]:
+        """Last node before key on each level, and its position"""
+        chain = [self._head] * MAX_LEVEL
+        positions = [0] * MAX_LEVEL
+        node, position = self._head, 0
+        for level in range(self._levels - 1, -1, -1):
+            following = node.next[level]
+            while following is not None and following.key < key:
+                position += node.width[level]
+                node = following
+                following = node.next[level]
+            chain[level] = node
+            positions[level] = position
+        return chain, positions
+
+    def insert(self, key):
+        """Add a key (which must not be present)"""
+        chain, positions = self._path(key)
+        level = self._random_level()
+        if level > self._levels:
+            for above in range(self._levels, level):
+                self._head.width[above] = self._size + 1
+            self._levels = level
+        node = _Node(key, level)
+        position = positions[0] + 1
+        for i in range(level):
+            before = chain[i]
+            node.next[i] = before.next[i]
+            before.next[i] = node
+            node.width[i] = before.width[i] - (position - positions[i]) + 1
+            before.width[i] = position - positions[i]
+        for i in range(level, self._levels):
+            chain[i].width[i] += 1
+        self._size += 1
+
+    def remove(self, key) -> bool:
+        """Drop a key; False if it was not present"""
+        chain, _ = self._path(key)
+        node = chain[0].next[0]
+        if node is None or node.key != key:
+            return False
+        for i in range(len(node.next)):
+            before = chain[i]
+            before.width[i] += node.width[i] - 1
+            before.next[i] = node.next[i]
+        for i in range(len(node.next), self._levels):
+            chain[i].width[i] -= 1
+        self._size -= 1
+        return True
+
+    def rank(self, key) -> Optional[int]:
+        """1-based position of a key, or None if absent"""
+        node, position = self._head, 0
+        for level in range(self._levels - 1, -1, -1):
+            following = node.next[level]
+            while following is not None and following.key <= key:
+                position += node.width[level]
+                node = following
+                following = node.next[level]
+        return position if node is not self._head and node.key == key else None
+
+    def iter_from(self, position: int) -> Iterator:
+        """Keys from a 1-based position onwards, in order"""
+        if position < 1:
+            position = 1
+        node, reached = self._head, 0
+        for level in range(self._levels - 1, -1, -1):
+            while node.next[level] is not None and reached + node.width[level] <= position:
+                reached += node.width[level]
+                node = node.next[level]
+        if reached != position:
+            # Past the end
+            return
+        while node is not None:
+            yield node.key
+            node = node.next[0]
+
+    @classmethod
+    def from_sorted(cls, keys, rng: Optional[random.Random] = None) -> "RankedSkipList":
+        """Build from keys already in order, in O(n)"""
+        skip_list = cls(rng)
+        head = skip_list._head
+        last = [head] * MAX_LEVEL
+        last_position = [0] * MAX_LEVEL
+        position = 0
+        for key in keys:
+            position += 1
+            level = skip_list._random_level()
+            node = _Node(key, level)
+            for i in range(level):
+                last[i].next[i] = node
+                last[i].width[i] = position - last_position[i]
+                last[i] = node
+                last_position[i] = position
+            skip_list._levels = max(skip_list._levels, level)
+        for i in range(MAX_LEVEL):
+            last[i].width[i] = position + 1 - last_position[i]
+        skip_list._size = position
+        return skip_list
+
+
+class Board:
+    """
+    One ranking: user ID -> XP, ordered by XP (highest first, ties by user
+    ID). `window` is the day or week number the scores belong to (None
+    for all time)
+    """
+
+    __slots__ = ("ranks", "scores", "window")
+
+    def __init__(self, window: Optional[int] = None, scores: Optional[Dict[str, int]] = None):
+        self.window = window
+        self.scores: Dict[str, int] = {user_id: xp for user_id, xp in (scores or {}).items() if xp > 0}
+        self.ranks = RankedSkipList.from_sorted(sorted((-xp, user_id) for user_id, xp in self.scores.items()))
+
+    def __len__(self) -> int:
+        return len(self.scores)
+
+    def set(self, user_id: str, xp: int):
+        old = self.scores.get(user_id)
+        if old == xp:
+            return
+        if old is not None:
+            self.ranks.remove((-old, user_id))
+        if xp > 0:
+            self.scores[user_id] = xp
+            self.ranks.insert((-xp, user_id))
+        elif old is not None:
+            del self.scores[user_id]
+
+    def add(self, user_id: str, xp: int):
+        self.set(user_id, self.scores.get(user_id, 0) + xp)
+
+    def remove(self, user_id: str) -> int:
+        """Take a learner off the board; returns the XP they had"""
+        xp = self.scores.get(user_id, 0)
+        self.set(user_id, 0)
+        return xp
+
+    def rank(self, user_id: str) -> Optional[int]:
+        xp = self.scores.get(user_id)
+        return None if xp is None else self.ranks.rank((-xp, user_id))
+
+    def page(self, offset: int, limit: int) -> List[Tuple[int, str, int]]:
+        """(rank, user ID, XP) for ranks offset+1 .. offset+limit"""
+        entries = []
+        for rank, (negative_xp, user_id) in enumerate(self.ranks.iter_from(offset + 1), offset + 1):
+            if len(entries) >= limit:
+                break
+            entries.append((rank, user_id, -negative_xp))
+        return entries
+
+
+def window_of(period: str, at: float) -> Optional[int]:
+    """UTC day or ISO week number an instant falls in (None for all time)"""
+    if period == "all":
+        return None
+    day = int(at // DAY)
+    # Day 0 (1970-01-01) was a Thursday; weeks start on Monday
+    return day if period == "day" else (day + 3) // 7
+
+
+def window_label(period: str, window: Optional[int]) -> Optional[str]:
+    """2026-10-18 for a day, 2026-W42 for a week"""
+    if window is None:
+        return None
+    start = EPOCH + timedelta(days=window if period == "day" else window * 7 - 3)
+    if period == "day":
+        return start.isoformat()
+    iso_year, iso_week, _ = start.isocalendar()
+    return f"{iso_year}-W{iso_week:02d}"
+
+
+class Leaderboard:
+    """
+    Global and per-class boards for each period, kept current from
+    board_log
+
+    Built once from progress.db (all-time XP from the aggregates, this
+    week's and today's from the week's board_log rows), then every query
+    first applies board_log rows added since: PRAGMA data_version only
+    changes when another connection has committed, so a quiet database
+    costs one pragma. Day and week boards start empty when the UTC day or
+    ISO week turns over.
+    """
+
+    def __init__(self, path: str = PROGRESS_DB_PATH, clock: Callable[[], float] = time.time):
+        self.path = path
+        self.clock = clock
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._lock = threading.Lock()
+        with self._lock:
+            self._conn.execute("PRAGMA busy_timeout=5000")
+            self._rebuild()
+        self._last_prune = time.monotonic()
+
+    def _rebuild(self):
+        """Load every board from the database (lock held)"""
+        start = time.perf_counter()
+        now = self.clock()
+        day, week = window_of("day", now), window_of("week", now)
+        self._data_version = self._conn.execute("PRAGMA data_version").fetchone()[0]
+        self._conn.execute("BEGIN")
+        try:
+            all_time = dict(self._conn.execute("SELECT user_id, xp FROM aggregates WHERE xp > 0"))
+            self._members: Dict[str, str] = dict(self._conn.execute("SELECT user_id, class_code FROM class_members"))
+            rows = self._conn.execute(
+                "SELECT kind, user_id, xp, at, target FROM board_log WHERE at >= ? ORDER BY seq",
+                ((week * 7 - 3) * DAY,)
+            ).fetchall()
+            self._cursor = self._last_seq()
+        finally:
+            self._conn.execute("COMMIT")
+
+        # Replay the week into plain dicts, then build each board in one pass
+        windows = {"week": (week, {}), "day": (day, {})}
+        for kind, user_id, xp, at, target in rows:
+            for period, (window, scores) in windows.items():
+                if kind == "xp":
+                    if window_of(period, at) == window:
+                        scores[user_id] = scores.get(user_id, 0) + xp
+                elif kind in ("move", "delete") and user_id in scores:
+                    moved = scores.pop(user_id)
+                    if kind == "move":
+                        scores[target] = scores.get(target, 0) + moved
+        self._global = {"all": Board(None, all_time)}
+        for period, (window, scores) in windows.items():
+            self._global[period] = Board(window, scores)
+
+        by_class: Dict[str, List[str]] = {}
+        for user_id, class_code in self._members.items():
+            by_class.setdefault(class_code, []).append(user_id)
+        self._classes: Dict[str, Dict[str, Board]] = {}
+        for class_code, user_ids in by_class.items():
+            self._classes[class_code] = {
+                period: Board(board.window, {user_id: board.scores.get(user_id, 0) for user_id in user_ids})
+                for period, board in self._global.items()
+            }
+        metrics.set_gauge("leaderboard_learners", len(self._global["all"]))
+        metrics.observe("leaderboard_rebuild", time.perf_counter() - start)
+
+    def _last_seq(self) -> int:
+        row = self._conn.execute("SELECT seq FROM sqlite_sequence WHERE name = 'board_log'").fetchone()
+        return row[0] if row else 0
+
+    def _sync(self):
+        """Apply board_log rows committed since the last look (lock held)"""
+        data_version = self._conn.execute("PRAGMA data_version").fetchone()[0]
+        if data_version != self._data_version:
+            self._data_version = data_version
+            self._conn.execute("BEGIN")
+            try:
+                rows = self._conn.execute(
+                    "SELECT kind, user_id, xp, at, target FROM board_log WHERE seq > ? ORDER BY seq",
+                    (self._cursor,)
+                ).fetchall()
+                last_seq = self._last_seq()
+            finally:
+                self._conn.execute("COMMIT")
+            if len(rows) != last_seq - self._cursor or any(row[0] == "rescore" for row in rows):
+                # Rows were pruned before this worker saw them, or everyone's
+                # all-time XP was recomputed under new achievement rules
+                self._rebuild()
+            else:
+                for row in rows:
+                    self._apply(*row)
+                self._cursor = last_seq
+        self._maybe_prune()
+
+    def _apply(self, kind: str, user_id: str, xp: int, at: float, target: Optional[str]):
+        if kind == "xp":
+            class_boards = self._classes.get(self._members.get(user_id))
+            for period in PERIODS:
+                window = window_of(period, at)
+                for boards in (self._global, class_boards):
+                    board = self._current(boards, period, window) if boards else None
+                    if board is not None:
+                        board.add(user_id, xp)
+        elif kind == "delete":
+            self._leave_class(user_id)
+            for board in self._global.values():
+                board.remove(user_id)
+        elif kind == "move":
+            class_code = self._members.get(target) or self._members.get(user_id)
+            self._leave_class(user_id)
+            self._leave_class(target)
+            for board in self._global.values():
+                board.add(target, board.remove(user_id))
+            if class_code:
+                self._join_class(target, class_code)
+        elif kind == "class":
+            self._leave_class(user_id)
+            if target:
+                self._join_class(user_id, target)
+        metrics.set_gauge("leaderboard_learners", len(self._global["all"]))
+
+    def _current(self, boards: Dict[str, Board], period: str, window: Optional[int]) -> Optional[Board]:
+        """A period's board for a window: fresh if the window is newer, None if older"""
+        board = boards[period]
+        if window is not None and window > board.window:
+            board = boards[period] = Board(window)
+        return board if board.window == window else None
+
+    def _join_class(self, user_id: str, class_code: str):
+        self._members[user_id] = class_code
+        boards = self._classes.get(class_code)
+        if boards is None:
+            boards = self._classes[class_code] = {
+                period: Board(board.window) for period, board in self._global.items()
+            }
+        for period, board in self._global.items():
+            class_board = self._current(boards, period, board.window)
+            if class_board is not None:
+                class_board.set(user_id, board.scores.get(user_id, 0))
+
+    def _leave_class(self, user_id: str):
+        class_code = self._members.pop(user_id, None)
+        if class_code is not None:
+            for board in self._classes[class_code].values():
+                board.remove(user_id)
+
+    def _maybe_prune(self):
+        """Drop board_log rows too old to matter to any board (lock held)"""
+        if time.monotonic() - self._last_prune < LEADERBOARD_PRUNE_INTERVAL:
+            return
+        self._last_prune = time.monotonic()
+        self._conn.execute("BEGIN IMMEDIATE")
+        try:
+            self._conn.execute("DELETE FROM board_log WHERE at < ?", (self.clock() - BOARD_LOG_RETENTION,))
+            self._conn.execute("COMMIT")
+        except Exception:
+            self._conn.execute("ROLLBACK")
+            raise
+
+    def _board(self, scope: str, period: str, user_id: str) -> Tuple[Optional[Board], Optional[str]]:
+        """The board a query reads, and the caller's class code (lock held)"""
+        class_code = self._members.get(user_id)
+        boards = self._global if scope == "global" else self._classes.get(class_code)
+        if boards is None:
+            return None, None
+        window = window_of(period, self.clock())
+        board = self._current(boards, period, window)
+        return (board if board is not None else Board(window)), class_code
+
+    def _result(self, scope: str, period: str, user_id: str, board: Board, class_code: Optional[str],
+                entries: List[Tuple[int, str, int]]) -> Dict:
+        return {
+            "scope": scope,
+            "period": period,
+            "window": window_label(period, board.window),
+            "class_code": class_code,
+            "total": len(board),
+            "entries": entries,
+            "me": {"rank": board.rank(user_id), "xp": board.scores.get(user_id, 0)},
+        }
+
+    def standings(self, scope: str, period: str, user_id: str, offset: int = 0, limit: int = 10) -> Optional[Dict]:
+        """
+        A page of a board (top K from offset 0) and the caller's own rank
+
+        Args:
+            scope: "global", or "class" for the caller's class
+            period: "all", "week" or "day"
+            user_id: The caller
+
+        Returns:
+            Board details with entries as (rank, user ID, XP), or None if
+            scope is "class" and the caller is in no class
+        """
+        with self._lock:
+            self._sync()
+            board, class_code = self._board(scope, period, user_id)
+            if board is None:
+                return None
+            return self._result(scope, period, user_id, board, class_code, board.page(offset, limit))
+
+    def neighbors(self, scope: str, period: str, user_id: str, count: int = 5) -> Optional[Dict]:
+        """
+        The caller's rank with up to count learners either side (the
+        bottom of the board if the caller has no XP there yet)
+        """
+        with self._lock:
+            self._sync()
+            board, class_code = self._board(scope, period, user_id)
+            if board is None:
+                return None
+            rank = board.rank(user_id)
+            if rank is None:
+                entries = board.page(max(0, len(board) - count), count)
+            else:
+                entries = board.page(max(0, rank - 1 - count), 2 * count + 1)
+            return self._result(scope, period, user_id, board, class_code, entries)
+
+    def positions(self, user_ids: Iterable[str], top: int = 5) -> Dict:
+        """
+        All-time global rank and XP of many learners in one pass (for the
+        push relay), the top of the board, and a version that changes
+        whenever a board may have
+        """
+        with self._lock:
+            self._sync()
+            board = self._global["all"]
+            return {
+                "version": self._cursor,
+                "total": len(board),
+                "top": board.page(0, top),
+                "ranks": {user_id: (board.rank(user_id), board.scores.get(user_id, 0)) for user_id in user_ids},
+            }
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+_leaderboard: Optional[Leaderboard] = None
+_leaderboard_lock = threading.Lock()
+
+
+def get_leaderboard() -> Leaderboard:
+    """This worker's leaderboard, built on first use"""
+    global _leaderboard
+    if _leaderboard is None:
+        with _leaderboard_lock:
+            if _leaderboard is None:
+                _leaderboard = Leaderboard()
+    return _leaderboard
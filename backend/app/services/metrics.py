@@ -0,0 +1,96 @@
+"""
+Metrics Registry
+Lightweight in-process counters, gauges and timings, exposed at /metrics
+"""
+
+from contextlib import contextmanager
+from typing import Dict
+import threading
+import time
+
+# Recent samples kept per timing for percentile estimates
+SAMPLE_SIZE = 1024
+
+
+class Timing:
+    """Running count/total/max plus a ring of recent samples"""
+
+    __slots__ = ("count", "total", "max", "samples", "_next")
+
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+        self.samples = []
+        self._next = 0
+
+    def observe(self, seconds: float):
+        self.count += 1
+        self.total += seconds
+        if seconds > self.max:
+            self.max = seconds
+        if len(self.samples) < SAMPLE_SIZE:
+            self.samples.append(seconds)
+        else:
+            self.samples[self._next] = seconds
+            self._next = (self._next + 1) % SAMPLE_SIZE
+
+    def snapshot(self) -> Dict[str, float]:
+        ordered = sorted(self.samples)
+
+        def percentile(p):
+            return ordered[min(len(ordered) - 1, int(p * len(ordered)))] * 1000 if ordered else 0.0
+
+        return {
+            "count": self.count,
+            "avg_ms": self.total / self.count * 1000 if self.count else 0.0,
+            "p50_ms": percentile(0.50),
+            "p99_ms": percentile(0.99),
+            "max_ms": self.max * 1000
+        }
+
+
+_lock = threading.Lock()
+_counters: Dict[str, float] = {}
+_gauges: Dict[str, float] = {}
+_timings: Dict[str, Timing] = {}
+
+
+def inc(name: str, value: float = 1):
+    """Add to a counter"""
+    with _lock:
+        _counters[name] = _counters.get(name, 0) + value
+
+
+def set_gauge(name: str, value: float):
+    """Set a gauge to its current value"""
+    _gauges[name] = value
+
+
+def observe(name: str, seconds: float):
+    """Record one duration"""
+    with _lock:
+        timing = _timings.get(name)
+        if timing is None:
+            timing = _timings[name] = Timing()
+        timing.observe(seconds)
+
+
+@contextmanager
+def timed(name: str):
+    """Record the duration of a block"""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        observe(name, time.perf_counter() - start)
+
+
+def snapshot() -> Dict[str, Dict]:
+    """Return every metric of this worker process"""
+    with _lock:
+        return {
+            "counters": dict(_counters),
+            "gauges": dict(_gauges),
+            "timings": {name: timing.snapshot() for name, timing in _timings.items()}
+        }
@@ -4,22 +4,57 @@ Handles password hashing and verification using bcrypt directly
 (Fixing passlib compatibility issues with bcrypt 4.1+)
 """
 
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional
+import asyncio
+import math
+import os
+import time
+
 import bcrypt
 
+from app.services import metrics
+
+# bcrypt cost factor for new hashes (each step doubles the CPU per login);
+# hashes stored at another cost are upgraded on the user's next login.
+# Pick one with scripts/bench_bcrypt.py
+BCRYPT_ROUNDS = int(os.getenv("BCRYPT_ROUNDS", "12"))
+
+# bcrypt releases the GIL while hashing, so a thread pool keeps the event
+# loop free and still uses several cores
+PASSWORD_WORKERS = int(os.getenv("PASSWORD_WORKERS", str(min(4, os.cpu_count() or 1))))
+# Password jobs allowed to wait for a free thread before new ones get a 503
+PASSWORD_QUEUE_LIMIT = int(os.getenv("PASSWORD_QUEUE_LIMIT", "16"))
+
+_executor = ThreadPoolExecutor(max_workers=PASSWORD_WORKERS, thread_name_prefix="password")
+# Jobs submitted and not yet finished; only touched from the event loop thread
+_pending = 0
+# Moving average of one bcrypt call, for Retry-After estimates
+_average_seconds = 0.25
+
+
+class PasswordPoolBusy(Exception):
+    """The password pool's queue is full; retry after retry_after seconds"""
+
+    def __init__(self, retry_after: int):
+        super().__init__(f"Password pool busy, retry after {retry_after}s")
+        self.retry_after = retry_after
+
 
-def hash_password(password: str) -> str:
+def hash_password(password: str, rounds: Optional[int] = None) -> str:
     """
     Hash a plain text password using bcrypt
     
     Args:
         password: Plain text password
+        rounds: bcrypt cost factor (defaults to BCRYPT_ROUNDS)
         
     Returns:
         Hashed password string
     """
     # Truncate password to 72 bytes (bcrypt limit)
     password_bytes = password.encode('utf-8')[:72]
-    salt = bcrypt.gensalt()
+    salt = bcrypt.gensalt(rounds=rounds or BCRYPT_ROUNDS)
     hashed = bcrypt.hashpw(password_bytes, salt)
     return hashed.decode('utf-8')
 
@@ -42,3 +77,75 @@ def verify_password(plain_password: str, hashed_password: str) -> bool:
         return bcrypt.checkpw(password_bytes, hashed_bytes)
     except Exception:
         return False
+
+
+def hash_rounds(hashed_password: str) -> Optional[int]:
+    """Cost factor of a bcrypt hash ("$2b$12$..." -> 12), None if unparsable"""
+    parts = hashed_password.split("$")
+    if len(parts) < 4 or not parts[2].isdigit():
+        return None
+    return int(parts[2])
+
+
+def needs_rehash(hashed_password: str) -> bool:
+    """True if a hash was made at a cost other than BCRYPT_ROUNDS"""
+    return hash_rounds(hashed_password) != BCRYPT_ROUNDS
+
+
+def pool_is_idle() -> bool:
+    """True if a password job would start without queueing"""
+    return _pending < PASSWORD_WORKERS
+
+
+def _retry_after() -> int:
+    """Seconds until the current backlog should have drained"""
+    return max(1, math.ceil(_pending / PASSWORD_WORKERS * _average_seconds))
+
+
+async def _offload(name: str, func, *args):
+    """Run a bcrypt call in the password pool, shedding load when it is full"""
+    global _pending
+    if _pending >= PASSWORD_WORKERS + PASSWORD_QUEUE_LIMIT:
+        metrics.inc("password_rejected")
+        raise PasswordPoolBusy(_retry_after())
+
+    submitted = time.perf_counter()
+
+    def run():
+        global _average_seconds
+        started = time.perf_counter()
+        metrics.observe("password_queue_wait", started - submitted)
+        try:
+            return func(*args)
+        finally:
+            elapsed = time.perf_counter() - started
+            metrics.observe(f"password_{name}", elapsed)
+            _average_seconds = 0.9 * _average_seconds + 0.1 * elapsed
+
+    _pending += 1
+    metrics.set_gauge("password_pending", _pending)
+    try:
+        return await asyncio.get_running_loop().run_in_executor(_executor, run)
+    finally:
+        _pending -= 1
+        metrics.set_gauge("password_pending", _pending)
+
+
+async def hash_password_async(password: str) -> str:
+    """
+    hash_password in the password pool
+
+    Raises:
+        PasswordPoolBusy: If too many password jobs are already queued
+    """
+    return await _offload("hash", hash_password, password)
+
+
+async def verify_password_async(plain_password: str, hashed_password: str) -> bool:
+    """
+    verify_password in the password pool
+
+    Raises:
+        PasswordPoolBusy: If too many password jobs are already queued
+    """
+    return await _offload("verify", verify_password, plain_password, hashed_password)
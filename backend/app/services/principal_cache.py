@@ -0,0 +1,133 @@
+"""
+Principal Cache
+Bounded LRU/TTL cache of verified JWT claims and the caller's user
+projection, so repeat requests skip JWT verification and user lookup
+"""
+
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Set, Tuple
+import hashlib
+import os
+import threading
+import time
+
+from app.models.user import Principal
+from app.services import metrics
+
+PRINCIPAL_CACHE_SIZE = int(os.getenv("PRINCIPAL_CACHE_SIZE", "10000"))
+# Upper bound on an entry's life; entries also never outlive the token's exp
+PRINCIPAL_CACHE_TTL = float(os.getenv("PRINCIPAL_CACHE_TTL", "300"))
+
+
+def token_digest(token: str) -> bytes:
+    """Cache key for a token, so raw tokens are not kept in memory"""
+    return hashlib.blake2b(token.encode(), digest_size=16).digest()
+
+
+class PrincipalCache:
+    """
+    token digest -> (claims, principal, expiry)
+
+    A reverse index user ID -> digests lets a change to a user's record
+    drop every cached token of that user.
+
+    A put races with invalidations: the principal may have been built from
+    a record that changed meanwhile. Each invalidation takes a stamp from
+    a counter, and a put is dropped only if its own user was invalidated
+    after the counter was read, so writes to other users never keep an
+    entry out. Revocations need no stamp; hits check the denylist.
+    """
+
+    def __init__(self, max_size: int = PRINCIPAL_CACHE_SIZE, ttl: float = PRINCIPAL_CACHE_TTL):
+        self.max_size = max_size
+        self.ttl = ttl
+        self._entries: "OrderedDict[bytes, Tuple[Dict[str, Any], Principal, float]]" = OrderedDict()
+        self._by_user: Dict[str, Set[bytes]] = {}
+        # Invalidations arrive from threadpool threads as well as the event loop
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        # Stamp of the latest invalidation; read before building a principal
+        self.version = 0
+        # User ID -> stamp of their last invalidation, oldest first, at most
+        # max_size of them; puts read before a forgotten stamp are dropped
+        self._invalidated: "OrderedDict[str, int]" = OrderedDict()
+        self._forgotten = 0
+
+    def get(self, token: str) -> Optional[Tuple[Dict[str, Any], Principal]]:
+        """Return (claims, principal) for a token, or None on a miss"""
+        key = token_digest(token)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[2] <= time.time():
+                self._remove(key)
+                entry = None
+            if entry is None:
+                self.misses += 1
+            else:
+                self._entries.move_to_end(key)
+                self.hits += 1
+            self._record()
+        return None if entry is None else (entry[0], entry[1])
+
+    def put(self, token: str, claims: Dict[str, Any], principal: Principal, version: int):
+        """
+        Cache a verified token until the TTL or its exp, whichever is sooner
+
+        Args:
+            version: self.version read before the user was looked up
+        """
+        expires_at = time.time() + self.ttl
+        if "exp" in claims:
+            expires_at = min(expires_at, float(claims["exp"]))
+        key = token_digest(token)
+        with self._lock:
+            if self._invalidated.get(principal.id, self._forgotten) > version:
+                # The user changed while the principal was built
+                return
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = (claims, principal, expires_at)
+            self._by_user.setdefault(principal.id, set()).add(key)
+            while len(self._entries) > self.max_size:
+                self._remove(next(iter(self._entries)))
+            metrics.set_gauge("principal_cache_size", len(self._entries))
+
+    def invalidate_user(self, user_id: str):
+        """Drop every cached token of a user whose record changed"""
+        with self._lock:
+            self.version += 1
+            self._invalidated[user_id] = self.version
+            self._invalidated.move_to_end(user_id)
+            while len(self._invalidated) > self.max_size:
+                self._forgotten = self._invalidated.popitem(last=False)[1]
+            for key in list(self._by_user.get(user_id, ())):
+                self._remove(key)
+
+    def invalidate_token(self, token: str):
+        """Drop a revoked token"""
+        with self._lock:
+            key = token_digest(token)
+            if key in self._entries:
+                self._remove(key)
+
+    def clear(self):
+        with self._lock:
+            self.version += 1
+            self._invalidated.clear()
+            self._forgotten = self.version
+            self._entries.clear()
+            self._by_user.clear()
+
+    def _remove(self, key: bytes):
+        """Remove an entry (lock held)"""
+        _, principal, _ = self._entries.pop(key)
+        keys = self._by_user.get(principal.id)
+        if keys is not None:
+            keys.discard(key)
+            if not keys:
+                del self._by_user[principal.id]
+
+    def _record(self):
+        lookups = self.hits + self.misses
+        metrics.set_gauge("principal_cache_hit_ratio", round(self.hits / lookups, 4))
@@ -0,0 +1,840 @@
+"""
+Progress Service
+Append-only log of learning events with a running aggregate per learner.
+Each event updates the learner's aggregate row in the same transaction
+that appends it, so the dashboard is one primary-key read no matter how
+long the history is; the log itself is never replayed to answer a read
+"""
+
+from typing import Any, Dict, Iterable, List, NamedTuple, Optional, Sequence, Tuple
+import json
+import os
+import sqlite3
+import threading
+import time
+
+from app.models.progress import ProgressEvent
+from app.models.user_record import MAX_FLASHCARD_BIT
+from app.services import metrics
+from app.services.achievements import AchievementRules, Trigger, get_rules, json_path
+from app.services.content import get_catalog
+from app.services.reviews import (
+    REVIEW_BATCH_SIZE, REVIEW_CLAIM_TIMEOUT, REVIEW_DUE_COUNT_MAX, REVIEW_OVERDUE_GRACE, REVIEW_SPREAD_DAYS, Schedule, review,
+    review_grade,
+)
+
+DATA_DIR = os.path.join(os.path.dirname(__file__), "../../data")
+PROGRESS_DB_PATH = os.getenv("PROGRESS_DB_PATH", os.path.join(DATA_DIR, "progress.db"))
+
+DAY = 86400
+# Events stamped further back than this (offline batches, wrong clocks)
+# are counted as happening when received
+MAX_BACKDATE = 7 * DAY
+
+
+def _day(at: float, utc_offset_minutes: int) -> int:
+    """Day number of an instant on the learner's calendar"""
+    return int((at + utc_offset_minutes * 60) // DAY)
+
+
+def _date(day: Optional[int]) -> Optional[str]:
+    return time.strftime("%Y-%m-%d", time.gmtime(day * DAY)) if day is not None else None
+
+
+def _ratio(part: int, whole: int) -> float:
+    return round(part / whole, 4) if whole else 0.0
+
+
+def _new_module() -> Dict[str, Any]:
+    return {
+        "views": 0, "answers": 0, "correct": 0, "time_spent": 0.0,
+        "completions": 0, "xp_days": 0, "last_completed_day": None, "seq": 0,
+    }
+
+
+class ProgressAggregate:
+    """
+    Running totals for one learner, advanced one event at a time
+
+    Every update is O(1) in the length of the history: counters are
+    added to, the streak compares the event's day with the last active
+    day, and flashcards viewed are bits in an int.
+
+    `seq` is the log position of the last event applied, and each module
+    remembers the seq of its own last change; a client holding seq as its
+    sync cursor only needs the modules changed after it.
+
+    XP and achievements are not decided here: apply() reports what the
+    event did and services/achievements.py awards for it.
+    """
+
+    __slots__ = (
+        "user_id", "events", "views", "answers", "correct", "time_spent", "xp",
+        "streak", "best_streak", "last_day", "last_event_at", "utc_offset", "flashcards", "modules", "seq",
+        "achievements",
+    )
+
+    def __init__(self, user_id: str):
+        self.user_id = user_id
+        self.events = self.views = self.answers = self.correct = self.xp = 0
+        self.streak = self.best_streak = 0
+        self.time_spent = 0.0
+        self.last_day: Optional[int] = None
+        self.last_event_at = 0.0
+        self.utc_offset = 0
+        self.flashcards = 0
+        self.modules: Dict[str, Dict[str, Any]] = {}
+        self.seq = 0
+        # Achievement ID -> epoch second it was unlocked
+        self.achievements: Dict[str, int] = {}
+
+    def apply(self, event: ProgressEvent, at: float, day: int, seq: int = 0) -> List[Trigger]:
+        """
+        Add one event to the totals
+
+        Args:
+            seq: The event's position in the log
+
+        Returns:
+            The triggers the event fired, for the achievement rules
+        """
+        triggers = []
+        self.events += 1
+        self.seq = max(self.seq, seq)
+        self.last_event_at = max(self.last_event_at, at)
+        if self._active_on(day):
+            triggers.append(("streak", self.streak))
+        stats = self.modules.get(event.module)
+        if stats is None:
+            stats = self.modules[event.module] = _new_module()
+        stats["seq"] = max(stats.get("seq", 0), seq)
+        self.time_spent += event.seconds
+        stats["time_spent"] += event.seconds
+
+        if event.type == "card_view":
+            self.views += 1
+            stats["views"] += 1
+            if event.module == "flashcards" and event.item_id is not None and event.item_id < MAX_FLASHCARD_BIT:
+                self.flashcards |= 1 << event.item_id
+        elif event.type == "answer":
+            self.answers += 1
+            stats["answers"] += 1
+            if event.correct:
+                self.correct += 1
+                stats["correct"] += 1
+        elif event.type == "module_complete":
+            stats["completions"] += 1
+            # Module XP once per module per day, as the client has always awarded it
+            if stats["last_completed_day"] is None or day > stats["last_completed_day"]:
+                stats["last_completed_day"] = day
+                stats["xp_days"] = stats.get("xp_days", 0) + 1
+                triggers.append(("module_complete", event.module))
+        return triggers
+
+    def _active_on(self, day: int) -> bool:
+        """Extend, keep or restart the daily streak; True if it changed"""
+        if self.last_day is None or day > self.last_day + 1:
+            self.streak = 1
+        elif day == self.last_day + 1:
+            self.streak += 1
+        else:
+            # Same day, or a late event from an earlier one
+            return False
+        self.last_day = day
+        self.best_streak = max(self.best_streak, self.streak)
+        return True
+
+    def current_streak(self, now: float) -> int:
+        """The streak as of now: broken once a whole day passes without activity"""
+        if self.last_day is None or _day(now, self.utc_offset) > self.last_day + 1:
+            return 0
+        return self.streak
+
+    def dashboard(self, rules: AchievementRules, now: Optional[float] = None, since: int = 0) -> Dict[str, Any]:
+        """
+        Summary for the dashboard (fields of models.progress.ProgressDashboard)
+
+        Args:
+            rules: The achievement rules (for levels and achievement details)
+            since: Only include modules changed after this seq (a sync cursor)
+        """
+        now = time.time() if now is None else now
+        xp_per_level = rules.xp_per_level
+        modules = {
+            name: {
+                "views": stats["views"],
+                "answers": stats["answers"],
+                "correct": stats["correct"],
+                "accuracy": _ratio(stats["correct"], stats["answers"]),
+                "time_spent": stats["time_spent"],
+                "completions": stats["completions"],
+                "last_completed": _date(stats["last_completed_day"]),
+            }
+            for name, stats in self.modules.items()
+            if not since or stats.get("seq", 0) > since
+        }
+        return {
+            "cursor": self.seq,
+            "events": self.events,
+            "xp": self.xp,
+            "level": rules.level(self.xp),
+            "xp_per_level": xp_per_level,
+            "level_progress": _ratio(self.xp % xp_per_level, xp_per_level),
+            "current_streak": self.current_streak(now),
+            "best_streak": self.best_streak,
+            "last_active_day": _date(self.last_day),
+            "answers": self.answers,
+            "correct": self.correct,
+            "accuracy": _ratio(self.correct, self.answers),
+            "time_spent": self.time_spent,
+            "cards_viewed": bin(self.flashcards).count("1"),
+            "modules": modules,
+            "achievements": rules.describe(self.achievements),
+        }
+
+    def legacy_progress(self) -> Dict[str, Any]:
+        """The progress fields kept on the user record, derived from the totals"""
+        ids, bits, card_id = [], self.flashcards, 0
+        while bits:
+            if bits & 1:
+                ids.append(card_id)
+            bits >>= 1
+            card_id += 1
+        modules = self.modules
+        return {
+            "flashcards_completed": ids,
+            "soundout_completed": modules.get("soundout", {}).get("correct", 0),
+            "games_completed": modules.get("monster", {}).get("completions", 0),
+            "minimal_pairs_completed": modules.get("pairs", {}).get("correct", 0),
+            "total_time_spent": int(self.time_spent),
+            "current_streak": self.streak,
+        }
+
+    COLUMNS = (
+        "events", "views", "answers", "correct", "time_spent", "xp", "streak",
+        "best_streak", "last_day", "last_event_at", "utc_offset", "flashcards", "modules", "seq", "achievements",
+    )
+
+    def to_row(self) -> Tuple:
+        return (
+            self.user_id, self.events, self.views, self.answers, self.correct, self.time_spent,
+            self.xp, self.streak, self.best_streak, self.last_day, self.last_event_at,
+            self.utc_offset, format(self.flashcards, "x"), json.dumps(self.modules, separators=(",", ":")),
+            self.seq, json.dumps(self.achievements, separators=(",", ":")),
+        )
+
+    @classmethod
+    def from_row(cls, user_id: str, row: Optional[Tuple]) -> "ProgressAggregate":
+        aggregate = cls(user_id)
+        if row is not None:
+            (aggregate.events, aggregate.views, aggregate.answers, aggregate.correct,
+             aggregate.time_spent, aggregate.xp, aggregate.streak, aggregate.best_streak,
+             aggregate.last_day, aggregate.last_event_at, aggregate.utc_offset, flashcards, modules,
+             aggregate.seq, achievements) = row
+            aggregate.flashcards = int(flashcards, 16)
+            aggregate.modules = json.loads(modules)
+            aggregate.achievements = json.loads(achievements)
+        return aggregate
+
+
+class Recorded(NamedTuple):
+    """Outcome of ProgressLog.record"""
+    aggregate: ProgressAggregate
+    applied: int
+    duplicates: int
+    xp_awarded: int
+    completed: List[str]
+    unlocked: List[str]
+    # Positions of events skipped for naming a module with no achievements entry
+    rejected: List[int]
+
+
+class ProgressLog:
+    """
+    Event log and aggregates in SQLite (WAL), shared by every worker
+
+    An upload appends its events and rewrites the learner's aggregate row
+    inside one BEGIN IMMEDIATE transaction, so concurrent uploads for the
+    same learner (from any worker) are applied one after the other and
+    the aggregate always equals the fold of the logged events.
+
+    Events may carry a client-generated idempotency key, unique per
+    learner: an event whose key is already logged is skipped, so a
+    client can resend its whole queue after a lost response without
+    counting anything (XP included) twice.
+
+    Every change to a learner's XP or standing (XP awarded, history moved
+    or deleted, class joined or left, everyone rescored under new rules)
+    is also appended to board_log, which each worker's leaderboard follows
+    (services/leaderboard.py).
+
+    XP changes and unlocks are also put in push_log, the outbox every
+    worker's push relay follows to notify the learner's open streams
+    (services/push.py).
+
+    Flashcard and sound-out items shown or answered are rescheduled in
+    the same transaction (reviews, SM-2 per services/reviews.py), indexed
+    by learner and due time for "what is due now", and by due time alone
+    for the nightly pass over overdue items.
+
+    XP and achievements follow the rules of achievements.json; meta holds
+    the fingerprint of the rules the stored totals were computed with,
+    and a change of rules recomputes everyone first (apply_rules).
+    """
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS events (
+            seq INTEGER PRIMARY KEY AUTOINCREMENT,
+            user_id TEXT NOT NULL,
+            type TEXT NOT NULL,
+            module TEXT NOT NULL,
+            item_id INTEGER,
+            correct INTEGER,
+            seconds REAL NOT NULL,
+            at REAL NOT NULL,
+            key TEXT
+        );
+        CREATE INDEX IF NOT EXISTS events_by_user ON events (user_id, seq);
+        CREATE TABLE IF NOT EXISTS aggregates (
+            user_id TEXT PRIMARY KEY,
+            events INTEGER NOT NULL,
+            views INTEGER NOT NULL,
+            answers INTEGER NOT NULL,
+            correct INTEGER NOT NULL,
+            time_spent REAL NOT NULL,
+            xp INTEGER NOT NULL,
+            streak INTEGER NOT NULL,
+            best_streak INTEGER NOT NULL,
+            last_day INTEGER,
+            last_event_at REAL NOT NULL,
+            utc_offset INTEGER NOT NULL,
+            flashcards TEXT NOT NULL,
+            modules TEXT NOT NULL,
+            seq INTEGER NOT NULL DEFAULT 0,
+            achievements TEXT NOT NULL DEFAULT '{}'
+        );
+        CREATE TABLE IF NOT EXISTS class_members (
+            user_id TEXT PRIMARY KEY,
+            class_code TEXT NOT NULL
+        );
+        CREATE TABLE IF NOT EXISTS board_log (
+            seq INTEGER PRIMARY KEY AUTOINCREMENT,
+            kind TEXT NOT NULL,
+            user_id TEXT NOT NULL,
+            xp INTEGER NOT NULL DEFAULT 0,
+            at REAL NOT NULL,
+            target TEXT
+        );
+        CREATE INDEX IF NOT EXISTS board_log_by_time ON board_log (at);
+        CREATE TABLE IF NOT EXISTS push_log (
+            seq INTEGER PRIMARY KEY AUTOINCREMENT,
+            user_id TEXT NOT NULL,
+            at REAL NOT NULL,
+            payload TEXT NOT NULL
+        );
+        CREATE TABLE IF NOT EXISTS reviews (
+            user_id TEXT NOT NULL,
+            deck TEXT NOT NULL,
+            item_id INTEGER NOT NULL,
+            ease REAL NOT NULL,
+            interval INTEGER NOT NULL,
+            reps INTEGER NOT NULL,
+            lapses INTEGER NOT NULL,
+            due REAL NOT NULL,
+            reviewed_at REAL NOT NULL,
+            PRIMARY KEY (user_id, deck, item_id)
+        );
+        CREATE INDEX IF NOT EXISTS reviews_due ON reviews (user_id, deck, due);
+        CREATE INDEX IF NOT EXISTS reviews_by_due ON reviews (due);
+        CREATE TABLE IF NOT EXISTS meta (
+            key TEXT PRIMARY KEY,
+            value TEXT NOT NULL
+        );
+    """
+
+    # Columns added since the first schema: table -> (column, definition)
+    ADDED_COLUMNS = (
+        ("events", "key", "TEXT"),
+        ("aggregates", "seq", "INTEGER NOT NULL DEFAULT 0"),
+        ("aggregates", "achievements", "TEXT NOT NULL DEFAULT '{}'"),
+    )
+
+    def __init__(self, path: str = PROGRESS_DB_PATH):
+        self.path = path
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._lock = threading.Lock()
+        # Fingerprint of the rules this process last saw the totals follow
+        self._rules_applied: Optional[str] = None
+        with self._lock:
+            self._conn.execute("PRAGMA busy_timeout=5000")
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+            self._conn.executescript(self.SCHEMA)
+            for table, column, definition in self.ADDED_COLUMNS:
+                columns = {row[1] for row in self._conn.execute(f"PRAGMA table_info({table})")}
+                if column not in columns:
+                    self._conn.execute(f"ALTER TABLE {table} ADD COLUMN {column} {definition}")
+            self._conn.execute(
+                "CREATE UNIQUE INDEX IF NOT EXISTS events_by_key ON events (user_id, key) WHERE key IS NOT NULL"
+            )
+
+    def _load(self, user_id: str) -> ProgressAggregate:
+        row = self._conn.execute(
+            f"SELECT {', '.join(ProgressAggregate.COLUMNS)} FROM aggregates WHERE user_id = ?", (user_id,)
+        ).fetchone()
+        return ProgressAggregate.from_row(user_id, row)
+
+    def get(self, user_id: str) -> ProgressAggregate:
+        """A learner's aggregate (all zero if they have no events)"""
+        with self._lock:
+            return self._load(user_id)
+
+    def record(
+        self,
+        user_id: str,
+        events: List[ProgressEvent],
+        utc_offset_minutes: int = 0,
+        now: Optional[float] = None
+    ) -> Recorded:
+        """
+        Append events and fold them into the learner's aggregate
+
+        Args:
+            user_id: Learner the events belong to
+            events: Events (applied in order of their timestamps); keyed
+                events already logged, or repeated in the batch, are skipped
+            utc_offset_minutes: Learner's offset from UTC (where days start)
+            now: Epoch seconds the batch was received (default: current time)
+
+        Returns:
+            The updated aggregate, events applied and skipped as duplicates,
+            XP awarded, modules completed for XP, achievements unlocked and
+            the positions of events naming a module with no achievements
+            entry (skipped, so one stale module name does not cost the rest
+            of the batch)
+        """
+        now = time.time() if now is None else now
+        rules = get_rules()
+        catalog = get_catalog()
+        rejected = [i for i, event in enumerate(events) if event.module not in rules.module_xp]
+        if rejected:
+            skipped = set(rejected)
+            events = [event for i, event in enumerate(events) if i not in skipped]
+            metrics.inc("progress_events_rejected", len(rejected))
+
+        with metrics.timed("progress_record"), self._lock:
+            if rules.fingerprint != self._rules_applied:
+                self._apply_rules(rules, now)
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                aggregate = self._load(user_id)
+                aggregate.utc_offset = utc_offset_minutes
+                fresh = self._unseen(user_id, events)
+                xp_awarded, completed, unlocked = 0, [], []
+                # Applied in time order, so a batch spanning midnight counts both days
+                stamped = sorted(
+                    ((now if event.at is None else min(now, max(event.at, now - MAX_BACKDATE)), event)
+                     for event in fresh),
+                    key=lambda pair: pair[0]
+                )
+                for at, event in stamped:
+                    seq = self._conn.execute(
+                        "INSERT INTO events (user_id, type, module, item_id, correct, seconds, at, key) "
+                        "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                        (user_id, event.type, event.module, event.item_id,
+                         None if event.correct is None else int(event.correct), event.seconds, at, event.key)
+                    ).lastrowid
+                    triggers = aggregate.apply(event, at, _day(at, utc_offset_minutes), seq)
+                    grade = review_grade(event)
+                    if grade is not None:
+                        deck = catalog.get(event.module)
+                        if deck is not None and deck.get(event.item_id) is not None:
+                            self._review(user_id, event.module, event.item_id, grade, at)
+                    if not triggers:
+                        continue
+                    xp, new = rules.evaluate(aggregate.achievements, triggers, at)
+                    if ("module_complete", event.module) in triggers:
+                        completed.append(event.module)
+                    unlocked += new
+                    if xp:
+                        aggregate.xp += xp
+                        xp_awarded += xp
+                        self._log_board("xp", user_id, xp=xp, at=at)
+                if xp_awarded or unlocked:
+                    self._conn.execute(
+                        "INSERT INTO push_log (user_id, at, payload) VALUES (?, ?, ?)",
+                        (user_id, now, json.dumps({
+                            "xp": aggregate.xp,
+                            "level": rules.level(aggregate.xp),
+                            "unlocked": rules.describe({
+                                achievement_id: aggregate.achievements[achievement_id] for achievement_id in unlocked
+                            }),
+                        }))
+                    )
+                if fresh:
+                    self._conn.execute(
+                        f"INSERT OR REPLACE INTO aggregates (user_id, {', '.join(ProgressAggregate.COLUMNS)}) "
+                        f"VALUES ({', '.join('?' * (len(ProgressAggregate.COLUMNS) + 1))})",
+                        aggregate.to_row()
+                    )
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+        metrics.inc("progress_events", len(fresh))
+        if len(fresh) < len(events):
+            metrics.inc("progress_events_duplicate", len(events) - len(fresh))
+        if unlocked:
+            metrics.inc("achievements_unlocked", len(unlocked))
+        return Recorded(aggregate, len(fresh), len(events) - len(fresh), xp_awarded, completed, unlocked, rejected)
+
+    def _unseen(self, user_id: str, events: List[ProgressEvent]) -> List[ProgressEvent]:
+        """Events whose key is new for the learner, first of each key only (lock held)"""
+        keys = list({event.key for event in events if event.key is not None})
+        seen = set()
+        # Stay under SQLite's bound parameter limit
+        for i in range(0, len(keys), 500):
+            chunk = keys[i:i + 500]
+            seen.update(key for key, in self._conn.execute(
+                f"SELECT key FROM events WHERE user_id = ? AND key IN ({', '.join('?' * len(chunk))})",
+                (user_id, *chunk)
+            ))
+        fresh = []
+        for event in events:
+            if event.key is not None:
+                if event.key in seen:
+                    continue
+                seen.add(event.key)
+            fresh.append(event)
+        return fresh
+
+    def _review(self, user_id: str, deck: str, item_id: int, grade: int, at: float):
+        """Reschedule one item after a review (transaction open, lock held)"""
+        row = self._conn.execute(
+            f"SELECT {', '.join(Schedule._fields)} FROM reviews WHERE user_id = ? AND deck = ? AND item_id = ?",
+            (user_id, deck, item_id)
+        ).fetchone()
+        schedule = review(Schedule(*row) if row else None, grade, at)
+        if schedule is not None:
+            self._conn.execute(
+                f"INSERT OR REPLACE INTO reviews (user_id, deck, item_id, {', '.join(Schedule._fields)}) "
+                f"VALUES ({', '.join('?' * (len(Schedule._fields) + 3))})",
+                (user_id, deck, item_id, *schedule)
+            )
+
+    def review_queue(
+        self, user_id: str, deck: str, limit: int, item_ids: Sequence[int] = (), now: Optional[float] = None
+    ) -> Dict[str, Any]:
+        """
+        A learner's due items in a deck, read from the due-time index, and
+        the first items they never reviewed. Every query stops after a
+        bounded number of rows, however long the learner's history
+
+        Args:
+            item_ids: The deck's item IDs in deck order (new items are
+                picked from these)
+
+        Returns:
+            due: Up to limit (item ID, Schedule) pairs due by now, most overdue first
+            due_total: How many items are due, up to REVIEW_DUE_COUNT_MAX
+            new: Up to limit of item_ids with no schedule, in deck order
+            next_due: When the next item not yet due comes due (None if none)
+        """
+        now = time.time() if now is None else now
+        with self._lock:
+            due = [
+                (item_id, Schedule(*schedule)) for item_id, *schedule in self._conn.execute(
+                    f"SELECT item_id, {', '.join(Schedule._fields)} FROM reviews "
+                    "WHERE user_id = ? AND deck = ? AND due <= ? ORDER BY due LIMIT ?",
+                    (user_id, deck, now, limit)
+                )
+            ]
+            due_total, = self._conn.execute(
+                "SELECT COUNT(*) FROM (SELECT 1 FROM reviews WHERE user_id = ? AND deck = ? AND due <= ? LIMIT ?)",
+                (user_id, deck, now, REVIEW_DUE_COUNT_MAX)
+            ).fetchone()
+            next_due, = self._conn.execute(
+                "SELECT MIN(due) FROM reviews WHERE user_id = ? AND deck = ? AND due > ?", (user_id, deck, now)
+            ).fetchone()
+            # Anti-join: one primary key probe per deck item, stopping once
+            # limit are found (json_each yields the array in order, so no
+            # ORDER BY, which would probe every item before the LIMIT)
+            new = [item_id for item_id, in self._conn.execute(
+                "SELECT deck_items.value FROM json_each(?) AS deck_items WHERE NOT EXISTS ("
+                "SELECT 1 FROM reviews WHERE user_id = ? AND deck = ? AND item_id = deck_items.value"
+                ") LIMIT ?",
+                (json.dumps(list(item_ids)), user_id, deck, limit)
+            )]
+        return {"due": due, "due_total": due_total, "new": new, "next_due": next_due}
+
+    def reschedule_overdue(self, now: Optional[float] = None, batch_size: int = REVIEW_BATCH_SIZE) -> int:
+        """
+        Nightly pass: halve the interval of every item overdue by more than
+        REVIEW_OVERDUE_GRACE and spread them over the next
+        REVIEW_SPREAD_DAYS days. Runs once per UTC day across workers: the
+        first caller claims the day in meta and marks it done once every
+        batch has committed; later calls return 0. A claim that is not
+        finished within REVIEW_CLAIM_TIMEOUT is taken over, and since moved
+        rows fall due from tomorrow on, the new pass picks up where the
+        old one stopped.
+
+        Rows are found through the due index and moved out of the overdue
+        range batch by batch, each batch its own short transaction, so the
+        pass reads only overdue rows and recording carries on between
+        batches.
+
+        Returns:
+            Items rescheduled
+        """
+        now = time.time() if now is None else now
+        today = int(now // DAY)
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                row = self._conn.execute("SELECT value FROM meta WHERE key = 'reviews_rescheduled'").fetchone()
+                claim = self._conn.execute("SELECT value FROM meta WHERE key = 'reviews_rescheduling'").fetchone()
+                if row is not None and int(row[0]) >= today:
+                    self._conn.execute("COMMIT")
+                    return 0
+                if claim is not None:
+                    # "<day>:<claimed at>" of a pass in progress on some worker
+                    claimed_day, claimed_at = claim[0].split(":")
+                    if int(claimed_day) >= today and float(claimed_at) > now - REVIEW_CLAIM_TIMEOUT:
+                        self._conn.execute("COMMIT")
+                        return 0
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO meta (key, value) VALUES ('reviews_rescheduling', ?)",
+                    (f"{today}:{now}",)
+                )
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+
+        cutoff = now - REVIEW_OVERDUE_GRACE
+        tomorrow = (today + 1) * DAY
+        moved = 0
+        with metrics.timed("review_batch"):
+            while True:
+                with self._lock:
+                    self._conn.execute("BEGIN IMMEDIATE")
+                    try:
+                        before = self._conn.total_changes
+                        self._conn.execute(
+                            "UPDATE reviews SET interval = MAX(1, interval / 2), "
+                            "due = ? + ? * (ABS(RANDOM()) % ?) "
+                            "WHERE rowid IN (SELECT rowid FROM reviews WHERE due < ? ORDER BY due LIMIT ?)",
+                            (tomorrow, DAY, REVIEW_SPREAD_DAYS, cutoff, batch_size)
+                        )
+                        changed = self._conn.total_changes - before
+                        self._conn.execute("COMMIT")
+                    except Exception:
+                        self._conn.execute("ROLLBACK")
+                        raise
+                moved += changed
+                if changed < batch_size:
+                    break
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO meta (key, value) VALUES ('reviews_rescheduled', ?)", (str(today),)
+                )
+                self._conn.execute("DELETE FROM meta WHERE key = 'reviews_rescheduling'")
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+        metrics.inc("reviews_rescheduled", moved)
+        return moved
+
+    def _log_board(self, kind: str, user_id: str, xp: int = 0, at: Optional[float] = None,
+                   target: Optional[str] = None):
+        """Append a leaderboard change (transaction open, lock held)"""
+        self._conn.execute(
+            "INSERT INTO board_log (kind, user_id, xp, at, target) VALUES (?, ?, ?, ?, ?)",
+            (kind, user_id, xp, time.time() if at is None else at, target)
+        )
+
+    def apply_rules(self, rules: Optional[AchievementRules] = None) -> int:
+        """
+        Bring every learner's XP and achievements in line with the rules
+        (default: the current catalog's); nothing to do if they already
+        are. Waits out another worker's recompute rather than failing on
+        its write lock. Returns how many learners changed
+        """
+        rules = rules or get_rules()
+        while True:
+            try:
+                with self._lock:
+                    return self._apply_rules(rules, time.time())
+            except sqlite3.OperationalError as e:
+                if "locked" not in str(e):
+                    raise
+
+    def _apply_rules(self, rules: AchievementRules, now: float) -> int:
+        """Recompute everyone if the stored totals follow other rules (lock held)"""
+        changed = 0
+        if self._stored_rules() != rules.fingerprint:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                # Checked again with the write lock held: another worker may have just done it
+                if self._stored_rules() != rules.fingerprint:
+                    with metrics.timed("achievements_recompute"):
+                        changed = self._recompute(rules, now)
+                    self._conn.execute(
+                        "INSERT OR REPLACE INTO meta (key, value) VALUES ('rules', ?)", (rules.fingerprint,)
+                    )
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+        self._rules_applied = rules.fingerprint
+        if changed:
+            print(f"Achievement rules changed: recomputed {changed} learners")
+        return changed
+
+    def _stored_rules(self) -> Optional[str]:
+        row = self._conn.execute("SELECT value FROM meta WHERE key = 'rules'").fetchone()
+        return row[0] if row else None
+
+    def _recompute(self, rules: AchievementRules, now: float) -> int:
+        """
+        Re-derive every learner's achievements and XP from their totals,
+        each column in one UPDATE over the whole table (transaction open)
+        """
+        if self._conn.execute("SELECT 1 FROM meta WHERE key = 'xp_days'").fetchone() is None:
+            # Totals from before modules counted their XP days (the key is
+            # nowhere in them): count the days with a completion in the log
+            # instead. Needed once; every module has the count since
+            self._conn.execute(
+                "CREATE TEMP TABLE legacy_aggregates AS SELECT user_id FROM aggregates "
+                "WHERE instr(modules, '\"xp_days\"') = 0 AND modules != '{}'"
+            )
+            for module in rules.module_xp:
+                self._conn.execute(
+                    "UPDATE aggregates SET modules = json_set(modules, ?, ("
+                    "  SELECT COUNT(DISTINCT CAST((at + aggregates.utc_offset * 60) / ? AS INTEGER)) FROM events"
+                    "  WHERE events.user_id = aggregates.user_id AND module = ? AND type = 'module_complete'"
+                    ")) WHERE user_id IN legacy_aggregates AND json_type(modules, ?) = 'object'",
+                    (json_path(module, "xp_days"), DAY, module, json_path(module))
+                )
+            self._conn.execute("DROP TABLE legacy_aggregates")
+            self._conn.execute("INSERT INTO meta (key, value) VALUES ('xp_days', '1')")
+
+        # Keep each earned achievement's unlock time, stamp new ones now, and
+        # drop ones no longer earned or defined (null values, then filtered)
+        paths, params = [], []
+        for achievement_id, condition, condition_params in rules.unlocks:
+            path = json_path(achievement_id)
+            paths.append(f"?, CASE WHEN {condition} THEN COALESCE(json_extract(achievements, ?), ?) END")
+            params += [path, *condition_params, path, int(now)]
+        ids = list(rules.achievements)
+        earned = (
+            f"json_set(achievements, {', '.join(paths)})" if paths else "achievements"
+        )
+        before = self._conn.total_changes
+        self._conn.execute(
+            "UPDATE aggregates SET achievements = fresh.achievements, xp = fresh.xp FROM ("
+            f"  SELECT user_id, ({rules.xp_sql}) AS xp, ("
+            "    SELECT json_group_object(key, value) FROM json_each("
+            f"      {earned}"
+            f"    ) WHERE type != 'null' AND key IN ({', '.join('?' * len(ids))})"
+            "  ) AS achievements FROM aggregates"
+            ") AS fresh WHERE aggregates.user_id = fresh.user_id "
+            "AND (aggregates.xp != fresh.xp OR aggregates.achievements != fresh.achievements)",
+            (*rules.xp_params, *params, *ids)
+        )
+        changed = self._conn.total_changes - before
+        if changed:
+            # One row for everyone: each worker's leaderboard rebuilds from the aggregates
+            self._log_board("rescore", "*", at=now)
+        return changed
+
+    def transfer(self, from_id: str, to_id: str):
+        """
+        Give a learner's history to another (new) user, e.g. a guest who
+        registered; their class comes along unless the new user has one
+        """
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                self._conn.execute("UPDATE events SET user_id = ? WHERE user_id = ?", (to_id, from_id))
+                self._conn.execute("DELETE FROM reviews WHERE user_id = ?", (to_id,))
+                self._conn.execute("UPDATE reviews SET user_id = ? WHERE user_id = ?", (to_id, from_id))
+                self._conn.execute("DELETE FROM aggregates WHERE user_id = ?", (to_id,))
+                self._conn.execute("UPDATE aggregates SET user_id = ? WHERE user_id = ?", (to_id, from_id))
+                self._conn.execute(
+                    "UPDATE OR IGNORE class_members SET user_id = ? WHERE user_id = ?", (to_id, from_id)
+                )
+                self._conn.execute("DELETE FROM class_members WHERE user_id = ?", (from_id,))
+                self._log_board("move", from_id, target=to_id)
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+
+    def delete(self, user_ids: Iterable[str]) -> int:
+        """Forget learners' events, aggregates and classes; returns how many had progress"""
+        params = [(user_id,) for user_id in user_ids]
+        if not params:
+            return 0
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                self._conn.executemany("DELETE FROM events WHERE user_id = ?", params)
+                self._conn.executemany("DELETE FROM reviews WHERE user_id = ?", params)
+                before = self._conn.total_changes
+                self._conn.executemany("DELETE FROM aggregates WHERE user_id = ?", params)
+                deleted = self._conn.total_changes - before
+                self._conn.executemany("DELETE FROM class_members WHERE user_id = ?", params)
+                for user_id, in params:
+                    self._log_board("delete", user_id)
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+        return deleted
+
+    def idle_guests(self, idle_before: float) -> List[str]:
+        """Guests with no event since idle_before, or in a class without any (candidates for purging)"""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT user_id FROM aggregates WHERE user_id LIKE 'guest\\_%' ESCAPE '\\' AND last_event_at < ? "
+                "UNION SELECT user_id FROM class_members WHERE user_id LIKE 'guest\\_%' ESCAPE '\\' "
+                "AND user_id NOT IN (SELECT user_id FROM aggregates)",
+                (idle_before,)
+            ).fetchall()
+        return [user_id for user_id, in rows]
+
+    def class_of(self, user_id: str) -> Optional[str]:
+        """Code of the class a learner is in, if any"""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT class_code FROM class_members WHERE user_id = ?", (user_id,)
+            ).fetchone()
+        return row[0] if row else None
+
+    def set_class(self, user_id: str, class_code: Optional[str]):
+        """Put a learner in a class (one at a time), or take them out with None"""
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                if class_code is None:
+                    self._conn.execute("DELETE FROM class_members WHERE user_id = ?", (user_id,))
+                else:
+                    self._conn.execute(
+                        "INSERT INTO class_members (user_id, class_code) VALUES (?, ?) "
+                        "ON CONFLICT(user_id) DO UPDATE SET class_code = excluded.class_code",
+                        (user_id, class_code)
+                    )
+                self._log_board("class", user_id, target=class_code)
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
@@ -0,0 +1,331 @@
+"""
+Push Service
+Server-Sent Events to a learner's open tabs: their XP and level as soon as
+any worker records a change, each achievement they unlock, and their
+all-time rank plus the top of the board, checked every
+PUSH_LEADERBOARD_INTERVAL and sent only when it changed.
+
+Workers share messages through push_log in progress.db, an outbox
+ProgressLog writes in the same transaction as the progress it announces.
+Each worker's relay polls it (a PRAGMA data_version check while nothing
+changed) and hands rows to the streams open on that worker. It stands in
+for a broker (Redis pub/sub or similar) while all workers share a host.
+"""
+
+from typing import Any, Dict, Iterator, List, Optional, Set, Tuple
+import asyncio
+import json
+import os
+import sqlite3
+import time
+
+import orjson
+from starlette.responses import Response
+from starlette.types import Receive, Scope, Send
+
+from app.services import metrics
+from app.services.auth import display_names
+from app.services.leaderboard import get_leaderboard
+from app.services.progress import PROGRESS_DB_PATH
+
+# Seconds between keep-alive comments on an idle stream (proxies and
+# browsers drop connections that stay silent for long)
+PUSH_HEARTBEAT = float(os.getenv("PUSH_HEARTBEAT", "15"))
+
+# Seconds between push_log polls, and between leaderboard checks
+PUSH_POLL_INTERVAL = float(os.getenv("PUSH_POLL_INTERVAL", "0.25"))
+PUSH_LEADERBOARD_INTERVAL = float(os.getenv("PUSH_LEADERBOARD_INTERVAL", "5"))
+
+# Open streams allowed per worker and per user (a tab each)
+PUSH_MAX_STREAMS = int(os.getenv("PUSH_MAX_STREAMS", "10000"))
+PUSH_MAX_STREAMS_PER_USER = int(os.getenv("PUSH_MAX_STREAMS_PER_USER", "5"))
+
+# A stream whose client stops reading for this long is dropped
+PUSH_SEND_TIMEOUT = float(os.getenv("PUSH_SEND_TIMEOUT", "30"))
+
+# Streams end after this many seconds and the client reconnects, so a
+# restart never waits on them for long and tokens are re-checked
+PUSH_MAX_AGE = float(os.getenv("PUSH_MAX_AGE", "900"))
+
+# Milliseconds the browser waits before reconnecting
+PUSH_RETRY_MS = 3000
+
+# push_log rows older than this many seconds are deleted
+PUSH_LOG_RETENTION = 600
+PUSH_PRUNE_INTERVAL = 60
+
+# Learners in the top of the board sent to every stream
+PUSH_TOP = 5
+
+
+class PushCapacityError(Exception):
+    """Raised when a worker or a user already has every stream allowed open"""
+
+
+def encode(event: str, data: Any) -> bytes:
+    """One event-stream message"""
+    return b"event: " + event.encode() + b"\ndata: " + orjson.dumps(data) + b"\n\n"
+
+
+class Stream:
+    """
+    One open event stream
+
+    Messages wait keyed by what they describe, and a newer message
+    replaces an unsent one with the same key: a client that reads slowly
+    (or not at all) gets the latest state once it catches up and never
+    builds a backlog. At most one progress, one standing, one top of the
+    board and one message per achievement are pending.
+    """
+
+    __slots__ = ("user_id", "pending", "wake", "standing", "closed")
+
+    def __init__(self, user_id: str):
+        self.user_id = user_id
+        self.pending: Dict[str, bytes] = {}
+        self.wake = asyncio.Event()
+        # Last (rank, xp) sent
+        self.standing: Optional[Tuple[Optional[int], int]] = None
+        self.closed = False
+
+    def offer(self, key: str, message: bytes):
+        self.pending.pop(key, None)  # re-insert so messages go out in order of their latest update
+        self.pending[key] = message
+        self.wake.set()
+
+    def take(self) -> bytes:
+        chunk = b"".join(self.pending.values())
+        self.pending.clear()
+        self.wake.clear()
+        return chunk
+
+
+class PushHub:
+    """This worker's open streams by user; used from the event loop only"""
+
+    def __init__(self):
+        self._streams: Dict[str, Set[Stream]] = {}
+        self.count = 0
+        # Top of the board last sent: (rank, user ID, XP), the entries
+        # clients get and the message for learners not in it
+        self.top: Optional[List[Tuple[int, str, int]]] = None
+        self.top_entries: List[Dict[str, Any]] = []
+        self.top_total = 0
+        self.top_message = b""
+        # Leaderboard version the standings were last checked at
+        self.version: Optional[int] = None
+
+    def open(self, user_id: str) -> Stream:
+        """
+        Register a stream for a user
+
+        Raises:
+            PushCapacityError: If the worker or the user is at the limit
+        """
+        if self.count >= PUSH_MAX_STREAMS:
+            metrics.inc("push_rejected")
+            raise PushCapacityError("Too many open streams")
+        streams = self._streams.setdefault(user_id, set())
+        if len(streams) >= PUSH_MAX_STREAMS_PER_USER:
+            metrics.inc("push_rejected")
+            raise PushCapacityError("Too many open streams for this user")
+        stream = Stream(user_id)
+        streams.add(stream)
+        self.count += 1
+        metrics.set_gauge("push_streams", self.count)
+        return stream
+
+    def close(self, stream: Stream):
+        streams = self._streams.get(stream.user_id)
+        if streams is None or stream not in streams:
+            return
+        streams.discard(stream)
+        if not streams:
+            del self._streams[stream.user_id]
+        self.count -= 1
+        metrics.set_gauge("push_streams", self.count)
+
+    def streams(self, user_id: Optional[str] = None) -> Iterator[Stream]:
+        """A user's streams, or every stream"""
+        if user_id is not None:
+            yield from self._streams.get(user_id, ())
+            return
+        for streams in self._streams.values():
+            yield from streams
+
+    def user_ids(self) -> List[str]:
+        return list(self._streams)
+
+    def publish(self, user_id: str, key: str, event: str, data: Any):
+        """Queue a message on each of a user's streams"""
+        streams = self._streams.get(user_id)
+        if streams:
+            message = encode(event, data)
+            for stream in streams:
+                stream.offer(key, message)
+
+
+push_hub = PushHub()
+
+
+class PushRelay:
+    """
+    Follows push_log: each poll returns the rows committed since the last
+    one, by any worker. Starts at the end of the log (a stream reflects
+    what happens after it opened; the client loads current state itself).
+    """
+
+    def __init__(self, path: str = PROGRESS_DB_PATH):
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA busy_timeout=5000")
+        self._data_version = None
+        self._cursor = self._conn.execute("SELECT COALESCE(MAX(seq), 0) FROM push_log").fetchone()[0]
+        self._pruned_at = time.monotonic()
+
+    def poll(self) -> List[Tuple[str, Dict[str, Any]]]:
+        """(user ID, message) for each new row, oldest first"""
+        data_version = self._conn.execute("PRAGMA data_version").fetchone()[0]
+        if data_version == self._data_version:
+            return []
+        self._data_version = data_version
+        rows = self._conn.execute(
+            "SELECT seq, user_id, payload FROM push_log WHERE seq > ? ORDER BY seq", (self._cursor,)
+        ).fetchall()
+        if rows:
+            self._cursor = rows[-1][0]
+        if time.monotonic() - self._pruned_at >= PUSH_PRUNE_INTERVAL:
+            self._pruned_at = time.monotonic()
+            self._conn.execute("DELETE FROM push_log WHERE at < ?", (time.time() - PUSH_LOG_RETENTION,))
+        return [(user_id, json.loads(payload)) for _, user_id, payload in rows]
+
+    def close(self):
+        self._conn.close()
+
+
+def deliver(hub: PushHub, user_id: str, message: Dict[str, Any]):
+    """Queue one push_log row on the user's streams"""
+    hub.publish(user_id, "progress", "progress", {"xp": message["xp"], "level": message["level"]})
+    for achievement in message.get("unlocked", ()):
+        hub.publish(user_id, "achievement:" + achievement["id"], "achievement", achievement)
+
+
+def top_message(hub: PushHub, user_id: str) -> bytes:
+    """The top of the board as one user sees it"""
+    if not any(leader == user_id for _, leader, _ in hub.top):
+        return hub.top_message
+    entries = [{**entry, "is_me": leader == user_id} for entry, (_, leader, _) in zip(hub.top_entries, hub.top)]
+    return encode("leaderboard", {"entries": entries, "total": hub.top_total})
+
+
+async def push_standings(hub: PushHub):
+    """
+    Send each stream its rank when it changed, and the top of the board
+    when that changed; a new stream gets both. Nothing is looked up while
+    the leaderboard has not moved and no stream is new.
+    """
+    leaderboard = get_leaderboard()
+    fresh = [stream for stream in hub.streams() if stream.standing is None]
+    if not fresh:
+        version = (await asyncio.to_thread(leaderboard.positions, (), PUSH_TOP))["version"]
+        if version == hub.version:
+            return
+    positions = await asyncio.to_thread(leaderboard.positions, hub.user_ids(), PUSH_TOP)
+    hub.version = positions["version"]
+
+    if positions["top"] != hub.top:
+        hub.top = positions["top"]
+        hub.top_total = positions["total"]
+        names = await asyncio.to_thread(display_names, [user_id for _, user_id, _ in hub.top])
+        hub.top_entries = [
+            {"rank": rank, "username": names.get(user_id, "Learner"), "xp": xp, "is_me": False}
+            for rank, user_id, xp in hub.top
+        ]
+        hub.top_message = encode("leaderboard", {"entries": hub.top_entries, "total": hub.top_total})
+        fresh = hub.streams()
+    for stream in fresh:
+        stream.offer("leaderboard", top_message(hub, stream.user_id))
+
+    for user_id, standing in positions["ranks"].items():
+        message = None
+        for stream in hub.streams(user_id):
+            if stream.standing != standing:
+                stream.standing = standing
+                if message is None:
+                    rank, xp = standing
+                    message = encode("standing", {"rank": rank, "xp": xp, "total": positions["total"]})
+                stream.offer("standing", message)
+
+
+async def watch_push(hub: PushHub = push_hub):
+    """Relay push_log rows and leaderboard changes to this worker's streams"""
+    relay = await asyncio.to_thread(PushRelay)
+    next_standings = 0.0
+    try:
+        while True:
+            await asyncio.sleep(PUSH_POLL_INTERVAL)
+            try:
+                for user_id, message in await asyncio.to_thread(relay.poll):
+                    deliver(hub, user_id, message)
+                if hub.count and time.monotonic() >= next_standings:
+                    next_standings = time.monotonic() + PUSH_LEADERBOARD_INTERVAL
+                    with metrics.timed("push_standings"):
+                        await push_standings(hub)
+            except Exception as e:
+                print(f"Error relaying pushes: {e}")
+    finally:
+        relay.close()
+
+
+class EventStreamResponse(Response):
+    """
+    A text/event-stream response that drains a Stream until the client
+    disconnects, stops reading (PUSH_SEND_TIMEOUT) or the stream reaches
+    PUSH_MAX_AGE. Idle streams get a comment every PUSH_HEARTBEAT.
+    """
+
+    media_type = "text/event-stream"
+
+    def __init__(self, stream: Stream, hub: PushHub = push_hub):
+        self.stream = stream
+        self.hub = hub
+        self.status_code = 200
+        self.background = None
+        self.init_headers({
+            "Cache-Control": "no-store",
+            # nginx: pass events through instead of buffering the response
+            "X-Accel-Buffering": "no",
+        })
+
+    async def _watch_disconnect(self, receive: Receive):
+        while (await receive())["type"] != "http.disconnect":
+            pass
+        self.stream.closed = True
+        self.stream.wake.set()
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        stream = self.stream
+        watcher = asyncio.ensure_future(self._watch_disconnect(receive))
+        deadline = time.monotonic() + PUSH_MAX_AGE
+        try:
+            await send({"type": "http.response.start", "status": self.status_code, "headers": self.raw_headers})
+            chunk = b"retry: %d\n\n" % PUSH_RETRY_MS
+            while not stream.closed:
+                if chunk:
+                    await asyncio.wait_for(
+                        send({"type": "http.response.body", "body": chunk, "more_body": True}), PUSH_SEND_TIMEOUT
+                    )
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    await send({"type": "http.response.body", "body": b"", "more_body": False})
+                    break
+                try:
+                    await asyncio.wait_for(stream.wake.wait(), min(PUSH_HEARTBEAT, remaining))
+                    chunk = stream.take()
+                except asyncio.TimeoutError:
+                    chunk = b": ping\n\n"
+        except asyncio.TimeoutError:
+            # The client stopped reading; dropping it frees the buffered messages
+            metrics.inc("push_stalled")
+        finally:
+            watcher.cancel()
+            self.hub.close(stream)
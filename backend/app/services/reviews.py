@@ -0,0 +1,158 @@
+"""
+Review Scheduler
+SM-2 spaced repetition for the flashcard and sound-out decks. Each review
+of an item grades the learner's recall from 0 to 5. Good recall pushes the
+item's next due time further out, and a lapse brings it back to tomorrow.
+ProgressLog keeps the schedules in progress.db next to the events that
+drive them, indexed by due time. Reading what is due now is an index range
+per learner, and the nightly pass only touches overdue rows.
+"""
+
+from typing import Any, Dict, NamedTuple, Optional
+import asyncio
+import os
+import time
+
+from app.models.progress import ProgressEvent
+from app.services.content import Dataset
+
+DAY = 86400
+
+# Modules whose items are scheduled (each named like its content dataset)
+DECKS = ("flashcards", "soundout")
+
+# SM-2 ease factor: where every item starts, and the floor lapses stop at
+DEFAULT_EASE = 2.5
+MIN_EASE = 1.3
+
+# Recall grades (0-5) of events that carry no grade of their own: an
+# answer, right or wrong, and an item only shown (it passes, but at 4 the
+# ease stays as it is; a view shows the answer rather than testing it).
+# Grades below PASS_GRADE are lapses
+GRADE_CORRECT = 4
+GRADE_WRONG = 1
+GRADE_VIEW = 4
+PASS_GRADE = 3
+
+# Nightly pass: items overdue by more than REVIEW_OVERDUE_GRACE seconds
+# (a learner who stayed away) get half their interval and are spread over
+# the next REVIEW_SPREAD_DAYS days instead of all falling due on the day
+# the learner returns. It runs once per UTC day, after REVIEW_BATCH_HOUR,
+# REVIEW_BATCH_SIZE rows per transaction
+REVIEW_OVERDUE_GRACE = float(os.getenv("REVIEW_OVERDUE_GRACE", str(DAY)))
+REVIEW_SPREAD_DAYS = int(os.getenv("REVIEW_SPREAD_DAYS", "7"))
+REVIEW_BATCH_HOUR = int(os.getenv("REVIEW_BATCH_HOUR", "3"))
+REVIEW_BATCH_SIZE = int(os.getenv("REVIEW_BATCH_SIZE", "2000"))
+# Seconds between checks whether today's pass is due
+REVIEW_BATCH_CHECK = 600
+# A worker's claim on today's pass lapses after this many seconds without
+# finishing (it crashed or failed), so another worker resumes the pass
+REVIEW_CLAIM_TIMEOUT = float(os.getenv("REVIEW_CLAIM_TIMEOUT", "1800"))
+
+# Due items are counted up to this many (a learner back after months need
+# not have thousands of rows counted on every request)
+REVIEW_DUE_COUNT_MAX = 999
+
+
+class Schedule(NamedTuple):
+    """Where one learner stands with one item"""
+    ease: float
+    # Days between the last review and the next
+    interval: int
+    # Passing reviews in a row
+    reps: int
+    lapses: int
+    due: float
+    reviewed_at: float
+
+
+def review_grade(event: ProgressEvent) -> Optional[int]:
+    """The recall grade an event gives a deck item, or None if it reviews nothing"""
+    if event.module not in DECKS or event.item_id is None:
+        return None
+    if event.type == "answer":
+        return GRADE_CORRECT if event.correct else GRADE_WRONG
+    if event.type == "card_view":
+        return GRADE_VIEW
+    return None
+
+
+def review(schedule: Optional[Schedule], grade: int, at: float) -> Optional[Schedule]:
+    """
+    Apply one review (SM-2)
+
+    A passing review of an item that is not due yet is a look ahead, not
+    a test of recall (the same card viewed again in one sitting, or viewed
+    and then answered), and leaves the schedule alone; so does another
+    miss of an item already back to relearning.
+
+    Args:
+        schedule: The item's schedule, or None if it was never reviewed
+        grade: Recall from 0 (none) to 5 (perfect)
+        at: When the review happened
+
+    Returns:
+        The new schedule, or None if the review changed nothing
+    """
+    if schedule is None:
+        schedule = Schedule(DEFAULT_EASE, 0, 0, 0, at, at)
+    elif at < schedule.due and (grade >= PASS_GRADE or schedule.reps == 0):
+        return None
+    ease = max(MIN_EASE, schedule.ease + 0.1 - (5 - grade) * (0.08 + (5 - grade) * 0.02))
+    if grade < PASS_GRADE:
+        return Schedule(ease, 1, 0, schedule.lapses + 1, at + DAY, at)
+    if schedule.reps == 0:
+        interval = 1
+    elif schedule.reps == 1:
+        interval = 6
+    else:
+        interval = max(schedule.interval + 1, round(schedule.interval * ease))
+    return Schedule(ease, interval, schedule.reps + 1, schedule.lapses, at + interval * DAY, at)
+
+
+def next_items(dataset: Dataset, queue: Dict[str, Any], count: int) -> Dict[str, Any]:
+    """
+    The next items to study: due items, most overdue first, then items
+    never reviewed in deck order (as the queue found them), up to count
+
+    Args:
+        dataset: The deck's content
+        queue: The learner's queue from ProgressLog.review_queue
+        count: Items wanted
+    """
+    items = []
+    for item_id, schedule in queue["due"]:
+        item = dataset.get(item_id)
+        if item is not None:
+            items.append({"item": item, "review": schedule._asdict()})
+    new = 0
+    for item_id in queue["new"]:
+        item = dataset.get(item_id)
+        if len(items) >= count:
+            break
+        if item is not None:
+            items.append({"item": item, "review": None})
+            new += 1
+    return {
+        "deck": dataset.name,
+        "items": items[:count],
+        "due": queue["due_total"],
+        "new": new,
+        "next_due": queue["next_due"],
+    }
+
+
+async def watch_reviews(log, interval: float = REVIEW_BATCH_CHECK):
+    """
+    Run the nightly pass once per UTC day after REVIEW_BATCH_HOUR; every
+    worker checks and the first to claim the day runs it
+    """
+    while True:
+        await asyncio.sleep(interval)
+        try:
+            if time.time() % DAY >= REVIEW_BATCH_HOUR * 3600:
+                moved = await asyncio.to_thread(log.reschedule_overdue)
+                if moved:
+                    print(f"Rescheduled {moved} overdue reviews")
+        except Exception as e:
+            print(f"Error rescheduling reviews: {e}")
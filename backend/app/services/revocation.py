@@ -0,0 +1,210 @@
+"""
+Token Revocation
+Persistent denylist of revoked token IDs (jti) with an in-memory Bloom
+filter in front, so checking a token that was never revoked costs a few
+hash probes and no I/O
+"""
+
+from typing import Optional
+import hashlib
+import math
+import os
+import sqlite3
+import threading
+import time
+
+from app.services import metrics
+
+DATA_DIR = os.path.join(os.path.dirname(__file__), "../../data")
+REVOCATION_DB_PATH = os.getenv("REVOCATION_DB_PATH", os.path.join(DATA_DIR, "revoked.db"))
+# Revoked tokens the filter is sized for before it is rebuilt larger
+REVOCATION_BLOOM_CAPACITY = int(os.getenv("REVOCATION_BLOOM_CAPACITY", "100000"))
+REVOCATION_BLOOM_ERROR_RATE = 0.001
+# Seconds between purges of entries whose token has expired anyway
+REVOCATION_PURGE_INTERVAL = 3600
+
+
+class BloomFilter:
+    """Fixed-size Bloom filter over strings (double hashing on one blake2b)"""
+
+    __slots__ = ("capacity", "size", "hashes", "bits", "count")
+
+    def __init__(self, capacity: int, error_rate: float = REVOCATION_BLOOM_ERROR_RATE):
+        self.capacity = capacity
+        self.size = max(64, math.ceil(-capacity * math.log(error_rate) / math.log(2) ** 2))
+        self.hashes = max(1, round(self.size / capacity * math.log(2)))
+        self.bits = bytearray((self.size + 7) // 8)
+        self.count = 0
+
+    def _positions(self, value: str):
+        digest = hashlib.blake2b(value.encode(), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], "little")
+        h2 = int.from_bytes(digest[8:], "little") | 1
+        return [(h1 + i * h2) % self.size for i in range(self.hashes)]
+
+    def add(self, value: str):
+        for position in self._positions(value):
+            self.bits[position >> 3] |= 1 << (position & 7)
+        self.count += 1
+
+    def __contains__(self, value: str) -> bool:
+        bits = self.bits
+        return all(bits[position >> 3] & (1 << (position & 7)) for position in self._positions(value))
+
+
+class TokenDenylist:
+    """
+    Revoked JTIs in SQLite (shared by every worker), mirrored into a Bloom
+    filter per worker
+
+    Each check first applies other workers' revocations: PRAGMA
+    data_version only changes when another connection has committed, so
+    the usual case reads no rows. A Bloom hit is confirmed against the
+    database, which is only reached for revoked tokens and the rare false
+    positive. Rows are purged once their token has expired, and a purge
+    makes every worker rebuild its filter.
+    """
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS revoked_tokens (
+            seq INTEGER PRIMARY KEY AUTOINCREMENT,
+            jti TEXT NOT NULL UNIQUE,
+            expires_at INTEGER NOT NULL
+        );
+        CREATE INDEX IF NOT EXISTS revoked_tokens_expiry ON revoked_tokens (expires_at);
+        CREATE TABLE IF NOT EXISTS meta (
+            key TEXT PRIMARY KEY,
+            value INTEGER NOT NULL
+        );
+    """
+
+    def __init__(self, path: str = REVOCATION_DB_PATH, capacity: int = REVOCATION_BLOOM_CAPACITY):
+        self.path = path
+        self.capacity = capacity
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._lock = threading.Lock()
+        with self._lock:
+            self._conn.execute("PRAGMA busy_timeout=5000")
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+            self._conn.executescript(self.SCHEMA)
+            self._rebuild()
+        self._last_purge = time.monotonic()
+
+    def _generation(self) -> int:
+        row = self._conn.execute("SELECT value FROM meta WHERE key = 'generation'").fetchone()
+        return row[0] if row else 0
+
+    def _rebuild(self):
+        """Load every live entry into a fresh filter (lock held)"""
+        self._data_version = self._conn.execute("PRAGMA data_version").fetchone()[0]
+        self._conn.execute("BEGIN")
+        try:
+            self._generation_seen = self._generation()
+            rows = self._conn.execute(
+                "SELECT seq, jti FROM revoked_tokens WHERE expires_at > ?", (int(time.time()),)
+            ).fetchall()
+            self._cursor = self._conn.execute(
+                "SELECT COALESCE(MAX(seq), 0) FROM revoked_tokens"
+            ).fetchone()[0]
+        finally:
+            self._conn.execute("COMMIT")
+        bloom = BloomFilter(max(self.capacity, 2 * len(rows)))
+        for _, jti in rows:
+            bloom.add(jti)
+        self._bloom = bloom
+        metrics.set_gauge("revoked_tokens", bloom.count)
+
+    def _sync(self):
+        """Apply revocations and purges committed by other workers (lock held)"""
+        data_version = self._conn.execute("PRAGMA data_version").fetchone()[0]
+        if data_version == self._data_version:
+            return
+        self._data_version = data_version
+        if self._generation() != self._generation_seen:
+            self._rebuild()
+            return
+        rows = self._conn.execute(
+            "SELECT seq, jti FROM revoked_tokens WHERE seq > ?", (self._cursor,)
+        ).fetchall()
+        for seq, jti in rows:
+            self._add(jti)
+            self._cursor = max(self._cursor, seq)
+
+    def _add(self, jti: str):
+        self._bloom.add(jti)
+        if self._bloom.count > self._bloom.capacity:
+            # Past capacity the false positive rate climbs; start a larger one
+            self._rebuild()
+        metrics.set_gauge("revoked_tokens", self._bloom.count)
+
+    def refresh(self):
+        """Apply other workers' revocations now (the periodic user sync calls this)"""
+        with self._lock:
+            self._sync()
+
+    def revoke(self, jti: str, expires_at: int):
+        """
+        Deny a token ID until its expiry
+
+        Args:
+            jti: Token ID
+            expires_at: The token's exp (epoch seconds)
+        """
+        with self._lock:
+            self._conn.execute(
+                "INSERT INTO revoked_tokens (jti, expires_at) VALUES (?, ?) ON CONFLICT(jti) DO NOTHING",
+                (jti, int(expires_at))
+            )
+            self._add(jti)
+            self._maybe_purge()
+        metrics.inc("tokens_revoked")
+
+    def might_be_revoked(self, jti: Optional[str]) -> bool:
+        """
+        False if a token ID is certainly not revoked, as of the last sync:
+        the Bloom filter alone, no lock and no I/O. Confirm a True with
+        is_revoked
+        """
+        return bool(jti) and jti in self._bloom
+
+    def is_revoked(self, jti: Optional[str]) -> bool:
+        """True if a token ID has been revoked (by any worker)"""
+        if not jti:
+            return False
+        with self._lock:
+            self._sync()
+            if jti not in self._bloom:
+                return False
+            metrics.inc("revocation_bloom_positive")
+            row = self._conn.execute(
+                "SELECT 1 FROM revoked_tokens WHERE jti = ? AND expires_at > ?", (jti, int(time.time()))
+            ).fetchone()
+        return row is not None
+
+    def _maybe_purge(self):
+        """Drop entries whose tokens have expired anyway (lock held)"""
+        if time.monotonic() - self._last_purge < REVOCATION_PURGE_INTERVAL:
+            return
+        self._last_purge = time.monotonic()
+        self._conn.execute("BEGIN IMMEDIATE")
+        try:
+            purged = self._conn.execute(
+                "DELETE FROM revoked_tokens WHERE expires_at <= ?", (int(time.time()),)
+            ).rowcount
+            if purged:
+                self._conn.execute(
+                    "INSERT INTO meta (key, value) VALUES ('generation', 1) "
+                    "ON CONFLICT(key) DO UPDATE SET value = value + 1"
+                )
+            self._conn.execute("COMMIT")
+        except Exception:
+            self._conn.execute("ROLLBACK")
+            raise
+        if purged:
+            self._rebuild()
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
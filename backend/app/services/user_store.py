@@ -0,0 +1,782 @@
+"""
+User Persistence Backends
+Pluggable storage behind services/auth.py: the original JSON file, the
+JSON file with a write-behind journal, or an embedded SQLite database
+(WAL mode) with row-level writes
+"""
+
+from typing import Dict, Optional, Tuple
+import json
+import os
+import uuid
+import sqlite3
+import threading
+import time
+
+from app.models.user_record import UserRecord, to_iso
+from app.services import metrics
+
+DATA_DIR = os.path.join(os.path.dirname(__file__), "../../data")
+
+# "json" rewrites users.json on every change, "journal" appends changes in
+# the background and compacts them into users.json, "sqlite" updates single rows
+USER_STORE = os.getenv("USER_STORE", "json")
+USERS_DB_PATH = os.getenv("USERS_DB_PATH", os.path.join(DATA_DIR, "users.db"))
+
+# Write-behind journal tuning (USER_STORE=journal)
+JOURNAL_FLUSH_INTERVAL = float(os.getenv("JOURNAL_FLUSH_INTERVAL", "1.0"))
+JOURNAL_FSYNC = os.getenv("JOURNAL_FSYNC", "true").lower() in ("1", "true", "yes")
+JOURNAL_COMPACT_BYTES = int(os.getenv("JOURNAL_COMPACT_BYTES", str(4 * 1024 * 1024)))
+JOURNAL_COMPACT_INTERVAL = float(os.getenv("JOURNAL_COMPACT_INTERVAL", "300"))
+
+# Guest numbers the JSON backends reserve per write of the counter, so
+# memory-only guests cost one file write per block instead of one each
+GUEST_ID_BLOCK = int(os.getenv("GUEST_ID_BLOCK", "100"))
+
+# Changes kept in the SQLite change log for other workers to catch up on;
+# a worker that falls further behind reloads every user
+CHANGE_LOG_SIZE = int(os.getenv("USER_CHANGE_LOG_SIZE", "100000"))
+
+
+class DuplicateUserError(Exception):
+    """Another user already holds this email or username"""
+
+
+class UserStore:
+    """Interface every persistence backend implements"""
+
+    # Whether guest accounts are written to storage. Backends shared between
+    # workers must, so any worker can resolve a guest's token; the JSON
+    # backends keep guests in memory only
+    persists_guests = False
+
+    def load(self, include_guests: bool = True) -> Tuple[Dict[str, UserRecord], int]:
+        """Return all users (optionally without guests) keyed by ID and the guest counter"""
+        raise NotImplementedError
+
+    def load_user(self, user_id: str) -> Optional[UserRecord]:
+        """Return one stored user"""
+        raise NotImplementedError
+
+    def purge_guests(self, idle_before: float) -> int:
+        """
+        Delete stored guests last active before a time
+
+        Args:
+            idle_before: Epoch seconds
+
+        Returns:
+            Number of guests deleted
+        """
+        raise NotImplementedError
+
+    def save_user(self, user: UserRecord, guest_counter: Optional[int] = None):
+        """Persist a created or changed user (and the guest counter, if given)"""
+        raise NotImplementedError
+
+    def delete_user(self, user_id: str):
+        """Remove a user"""
+        raise NotImplementedError
+
+    def save_guest_counter(self, value: int):
+        """Persist the guest counter"""
+        raise NotImplementedError
+
+    def save_all(self, users: Dict[str, UserRecord], guest_counter: int):
+        """Replace the stored state with a full snapshot"""
+        raise NotImplementedError
+
+    def allocate_guest_number(self) -> int:
+        """Atomically reserve the next guest number"""
+        raise NotImplementedError
+
+    def change_cursor(self) -> int:
+        """Position in the change feed; take it before load()"""
+        return 0
+
+    def changes_since(self, cursor: int) -> Tuple[Optional[Dict[str, Optional[UserRecord]]], int]:
+        """
+        Users changed by other processes since a cursor
+
+        Returns:
+            (user ID -> user, or None if deleted; None if everything must be
+            reloaded) and the new cursor. Single-process backends never
+            report changes.
+        """
+        return {}, cursor
+
+    def close(self):
+        """Flush anything pending and release resources"""
+
+
+def _fsync_dir(path: str):
+    """Make a rename in a directory durable (a no-op on Windows)"""
+    if os.name == "nt":
+        return
+    fd = os.open(path, os.O_RDONLY)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+
+class JSONUserStore(UserStore):
+    """
+    Original users.json persistence
+
+    Every write serializes all users, so it costs O(total users). The file
+    is written to a temp file and renamed so a crash cannot truncate it.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._users: Dict[str, UserRecord] = {}
+        self._guest_counter = 0
+        # Highest guest number reserved on disk (see GUEST_ID_BLOCK)
+        self._reserved = 0
+        self._counter_lock = threading.Lock()
+        # Requests write from threadpool threads; one rewrite at a time
+        self._write_lock = threading.Lock()
+
+    def load(self, include_guests: bool = True) -> Tuple[Dict[str, UserRecord], int]:
+        # users.json is the only copy of its guests, so they are always returned
+        if os.path.exists(self.path):
+            try:
+                with open(self.path, 'r') as f:
+                    data = json.load(f)
+                    self._users = {uid: UserRecord.from_dict(user_data) for uid, user_data in data.get('users', {}).items()}
+                    self._guest_counter = data.get('guest_counter', 0)
+                    self._reserved = self._guest_counter
+            except Exception as e:
+                print(f"Error loading users: {e}")
+        return dict(self._users), self._guest_counter
+
+    def load_user(self, user_id: str) -> Optional[UserRecord]:
+        return self._users.get(user_id)
+
+    def _counter_value(self) -> int:
+        """Guest counter to store: never below a reserved block"""
+        return max(self._guest_counter, self._reserved)
+
+    def _write(self, users: Optional[Dict[str, UserRecord]] = None):
+        # dict() copies atomically under the GIL, so other threads can keep
+        # adding and removing users while this one serializes; each record
+        # is read under its own lock, so none is caught mid-update
+        users = dict(self._users if users is None else users)
+        try:
+            with self._write_lock:
+                os.makedirs(os.path.dirname(self.path), exist_ok=True)
+                tmp_path = self.path + ".tmp"
+                with open(tmp_path, 'w') as f:
+                    data = {
+                        'users': {uid: user.to_dict() for uid, user in users.items()},
+                        'guest_counter': self._counter_value()
+                    }
+                    json.dump(data, f, indent=2)
+                    # On disk before the rename, so a crash leaves the old
+                    # snapshot or the new one, never an empty file
+                    f.flush()
+                    os.fsync(f.fileno())
+                os.replace(tmp_path, self.path)
+                _fsync_dir(os.path.dirname(self.path))
+            return True
+        except Exception as e:
+            print(f"Error saving users: {e}")
+            return False
+
+    def save_user(self, user: UserRecord, guest_counter: Optional[int] = None):
+        self._users[user.id] = user
+        if guest_counter is not None:
+            with self._counter_lock:
+                self._guest_counter = max(self._guest_counter, guest_counter)
+        self._write()
+
+    def delete_user(self, user_id: str):
+        self._users.pop(user_id, None)
+        self._write()
+
+    def save_guest_counter(self, value: int):
+        self._guest_counter = value
+        self._write()
+
+    def save_all(self, users: Dict[str, UserRecord], guest_counter: int):
+        self._users = dict(users)
+        self._guest_counter = guest_counter
+        self._write()
+
+    def allocate_guest_number(self) -> int:
+        # Only atomic within this process: the JSON backends are single-worker.
+        # Numbers are reserved a block at a time so a restart never reissues
+        # the number of a memory-only guest whose token is still out there
+        with self._counter_lock:
+            self._guest_counter += 1
+            number = self._guest_counter
+            reserve = number > self._reserved
+            if reserve:
+                self._reserved = number + GUEST_ID_BLOCK - 1
+        if reserve:
+            self._persist_counter()
+        return number
+
+    def _persist_counter(self):
+        self._write()
+
+    def purge_guests(self, idle_before: float) -> int:
+        stale = [
+            user_id for user_id, user in dict(self._users).items()
+            if user.is_guest and user.last_active < idle_before
+        ]
+        for user_id in stale:
+            self._users.pop(user_id, None)
+        if stale:
+            self._write()
+        return len(stale)
+
+
+class JournaledJSONUserStore(JSONUserStore):
+    """
+    users.json with write-behind persistence
+
+    Mutations only mark the user dirty, so the request path does no I/O and
+    repeated changes to one user between flushes coalesce into one record.
+    A background thread appends the dirty records to an append-only journal
+    every JOURNAL_FLUSH_INTERVAL seconds (one fsync per batch), and compacts
+    the journal into a fresh users.json snapshot once it grows past
+    JOURNAL_COMPACT_BYTES or JOURNAL_COMPACT_INTERVAL elapses. Startup
+    loads the snapshot and replays the journal on top.
+
+    Changes made within the last flush interval are lost on a hard crash;
+    a clean shutdown flushes them via close().
+    """
+
+    def __init__(
+        self,
+        path: str,
+        flush_interval: float = JOURNAL_FLUSH_INTERVAL,
+        fsync: bool = JOURNAL_FSYNC,
+        compact_bytes: int = JOURNAL_COMPACT_BYTES,
+        compact_interval: float = JOURNAL_COMPACT_INTERVAL
+    ):
+        super().__init__(path)
+        self.journal_path = path + ".journal"
+        self.flush_interval = flush_interval
+        self.fsync = fsync
+        self.compact_bytes = compact_bytes
+        self.compact_interval = compact_interval
+        # user ID -> user to write, or None for a deletion
+        self._dirty: Dict[str, Optional[UserRecord]] = {}
+        self._counter_dirty = False
+        # Shared with allocate_guest_number so counter updates cannot interleave
+        self._dirty_lock = self._counter_lock
+        # Serializes flushes and compactions (flusher thread vs. close())
+        self._flush_lock = threading.Lock()
+        self._journal = None
+        self._last_compaction = time.monotonic()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def load(self, include_guests: bool = True) -> Tuple[Dict[str, UserRecord], int]:
+        super().load()
+        replayed = self._replay()
+        if replayed:
+            print(f"Replayed {replayed} journal records")
+        self._journal = open(self.journal_path, "a", encoding="utf-8")
+        metrics.set_gauge("user_journal_bytes", self._journal.tell())
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="user-journal", daemon=True)
+            self._thread.start()
+        return dict(self._users), self._guest_counter
+
+    def _replay(self) -> int:
+        """Apply journal records written after the last snapshot"""
+        if not os.path.exists(self.journal_path):
+            return 0
+        count = 0
+        with open(self.journal_path, "r", encoding="utf-8") as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except json.JSONDecodeError:
+                    # A torn final line from a crash mid-append; ignore it
+                    continue
+                if record.get("op") == "put":
+                    self._users[record["user"]["id"]] = UserRecord.from_dict(record["user"])
+                elif record.get("op") == "del":
+                    self._users.pop(record["id"], None)
+                if "guest_counter" in record:
+                    self._guest_counter = max(self._guest_counter, record["guest_counter"])
+                    self._reserved = self._guest_counter
+                count += 1
+        return count
+
+    def save_user(self, user: UserRecord, guest_counter: Optional[int] = None):
+        with self._dirty_lock:
+            self._users[user.id] = user
+            self._dirty[user.id] = user
+            if guest_counter is not None:
+                self._guest_counter = max(self._guest_counter, guest_counter)
+                self._counter_dirty = True
+
+    def delete_user(self, user_id: str):
+        with self._dirty_lock:
+            self._users.pop(user_id, None)
+            self._dirty[user_id] = None
+
+    def save_guest_counter(self, value: int):
+        with self._dirty_lock:
+            self._guest_counter = value
+            self._counter_dirty = True
+
+    def _persist_counter(self):
+        with self._dirty_lock:
+            self._counter_dirty = True
+
+    def purge_guests(self, idle_before: float) -> int:
+        with self._dirty_lock:
+            stale = [
+                user_id for user_id, user in dict(self._users).items()
+                if user.is_guest and user.last_active < idle_before
+            ]
+            for user_id in stale:
+                self._users.pop(user_id, None)
+                self._dirty[user_id] = None
+        return len(stale)
+
+    def save_all(self, users: Dict[str, UserRecord], guest_counter: int):
+        with self._flush_lock:
+            with self._dirty_lock:
+                self._users = dict(users)
+                self._guest_counter = guest_counter
+                self._dirty.clear()
+                self._counter_dirty = False
+            self._compact()
+
+    def flush(self):
+        """Append all pending changes to the journal"""
+        with self._flush_lock:
+            with self._dirty_lock:
+                dirty, self._dirty = self._dirty, {}
+                counter_dirty, self._counter_dirty = self._counter_dirty, False
+                guest_counter = self._counter_value()
+            if not dirty and not counter_dirty:
+                return
+
+            start = time.perf_counter()
+            lines = []
+            for user_id, user in dirty.items():
+                if user is None:
+                    record = {"op": "del", "id": user_id}
+                else:
+                    record = {"op": "put", "user": user.to_dict()}
+                lines.append(json.dumps(record, separators=(",", ":")))
+            if counter_dirty:
+                lines.append(json.dumps({"op": "counter", "guest_counter": guest_counter}))
+            self._journal.write("\n".join(lines) + "\n")
+            self._journal.flush()
+            if self.fsync:
+                os.fsync(self._journal.fileno())
+
+            metrics.observe("user_journal_flush", time.perf_counter() - start)
+            metrics.inc("user_journal_records", len(lines))
+            metrics.set_gauge("user_journal_bytes", self._journal.tell())
+
+    def _compact(self):
+        """Write a full snapshot and start an empty journal (flush lock held)"""
+        start = time.perf_counter()
+        if not self._write() or self._journal is None:
+            # Keep the journal: it still holds changes the snapshot lacks
+            return
+        # _write made the snapshot durable, so the journal may go
+        self._journal.truncate(0)
+        self._journal.seek(0)
+        if self.fsync:
+            os.fsync(self._journal.fileno())
+        self._last_compaction = time.monotonic()
+        metrics.observe("user_journal_compaction", time.perf_counter() - start)
+        metrics.set_gauge("user_journal_bytes", 0)
+
+    def _maybe_compact(self):
+        size = self._journal.tell()
+        due = time.monotonic() - self._last_compaction >= self.compact_interval
+        if size >= self.compact_bytes or (due and size > 0):
+            with self._flush_lock:
+                self._compact()
+
+    def _run(self):
+        while not self._stop.wait(self.flush_interval):
+            try:
+                self.flush()
+                self._maybe_compact()
+            except Exception as e:
+                print(f"Error flushing user journal: {e}")
+
+    def close(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        if self._journal is not None:
+            self.flush()
+            self._journal.close()
+            self._journal = None
+
+
+class SQLiteUserStore(UserStore):
+    """
+    Embedded SQLite persistence in WAL mode
+
+    Each user is one row, so a write costs O(1) in the number of users and
+    is atomic. Email and registered usernames are enforced unique by
+    indexes as a second line of defence behind the in-memory checks.
+
+    The database is shared by every worker process. Each write also appends
+    the user ID to a change log, so a worker can tell (via PRAGMA
+    data_version, which only moves on other connections' commits) that
+    someone else wrote and pull in just the changed rows. Guest numbers
+    come from a counter incremented inside a write transaction.
+    """
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS users (
+            id TEXT PRIMARY KEY,
+            username TEXT NOT NULL,
+            email TEXT NOT NULL,
+            email_key TEXT NOT NULL,
+            hashed_password TEXT NOT NULL,
+            is_guest INTEGER NOT NULL DEFAULT 0,
+            created_at TEXT NOT NULL,
+            last_active TEXT NOT NULL,
+            progress TEXT NOT NULL DEFAULT '{}'
+        );
+        CREATE UNIQUE INDEX IF NOT EXISTS users_email_key ON users (email_key);
+        CREATE UNIQUE INDEX IF NOT EXISTS users_username
+            ON users (username) WHERE is_guest = 0;
+        CREATE INDEX IF NOT EXISTS users_guest_activity
+            ON users (last_active) WHERE is_guest = 1;
+        CREATE TABLE IF NOT EXISTS meta (
+            key TEXT PRIMARY KEY,
+            value INTEGER NOT NULL
+        );
+        CREATE TABLE IF NOT EXISTS changes (
+            seq INTEGER PRIMARY KEY AUTOINCREMENT,
+            user_id TEXT NOT NULL,
+            origin TEXT NOT NULL
+        );
+    """
+
+    # Change log entry meaning "reload everything" (written by save_all)
+    ALL_USERS = "*"
+
+    persists_guests = True
+
+    # Guests deleted per transaction by purge_guests, keeping write locks short
+    PURGE_BATCH = 5000
+
+    COLUMNS = "id, username, email, email_key, hashed_password, is_guest, created_at, last_active, progress"
+    SELECT_COLUMNS = "id, username, email, hashed_password, is_guest, created_at, last_active, progress"
+
+    UPSERT = (
+        f"INSERT INTO users ({COLUMNS}) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?) "
+        "ON CONFLICT(id) DO UPDATE SET username = excluded.username, email = excluded.email, "
+        "email_key = excluded.email_key, hashed_password = excluded.hashed_password, "
+        "is_guest = excluded.is_guest, last_active = excluded.last_active, progress = excluded.progress"
+    )
+
+    def __init__(self, path: str):
+        self.path = path
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        # One shared connection; the lock serializes access from threadpool workers
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._lock = threading.Lock()
+        # Tags this process's change log entries so it can skip its own writes
+        self._origin = uuid.uuid4().hex
+        self._data_version = None
+        self._writes = 0
+        with self._lock:
+            self._conn.execute("PRAGMA busy_timeout=5000")
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+            self._conn.executescript(self.SCHEMA)
+
+    @staticmethod
+    def _row(user: UserRecord) -> tuple:
+        return (
+            user.id,
+            user.username,
+            user.email,
+            user.email.strip().lower(),
+            user.hashed_password,
+            int(user.is_guest),
+            to_iso(user.created_at),
+            to_iso(user.last_active),
+            json.dumps(user.progress, separators=(",", ":"))
+        )
+
+    @staticmethod
+    def _user(row: tuple) -> UserRecord:
+        return UserRecord.from_dict({
+            "id": row[0],
+            "username": row[1],
+            "email": row[2],
+            "hashed_password": row[3],
+            "is_guest": bool(row[4]),
+            "created_at": row[5],
+            "last_active": row[6],
+            "progress": json.loads(row[7])
+        })
+
+    def load(self, include_guests: bool = True) -> Tuple[Dict[str, UserRecord], int]:
+        where = "" if include_guests else " WHERE is_guest = 0"
+        with self._lock:
+            rows = self._conn.execute(f"SELECT {self.SELECT_COLUMNS} FROM users{where}").fetchall()
+            counter = self._conn.execute(
+                "SELECT value FROM meta WHERE key = 'guest_counter'"
+            ).fetchone()
+        users = {row[0]: self._user(row) for row in rows}
+        return users, counter[0] if counter else 0
+
+    def load_user(self, user_id: str) -> Optional[UserRecord]:
+        with self._lock:
+            row = self._conn.execute(
+                f"SELECT {self.SELECT_COLUMNS} FROM users WHERE id = ?", (user_id,)
+            ).fetchone()
+        return self._user(row) if row else None
+
+    def purge_guests(self, idle_before: float) -> int:
+        purged = 0
+        while True:
+            with self._lock:
+                self._conn.execute("BEGIN IMMEDIATE")
+                try:
+                    ids = [row[0] for row in self._conn.execute(
+                        "SELECT id FROM users WHERE is_guest = 1 AND last_active < ? LIMIT ?",
+                        (to_iso(int(idle_before)), self.PURGE_BATCH)
+                    )]
+                    self._conn.executemany("DELETE FROM users WHERE id = ?", ((i,) for i in ids))
+                    for user_id in ids:
+                        self._log_change(user_id)
+                    self._conn.execute("COMMIT")
+                except Exception:
+                    self._conn.execute("ROLLBACK")
+                    raise
+            purged += len(ids)
+            if len(ids) < self.PURGE_BATCH:
+                return purged
+
+    def _log_change(self, user_id: str):
+        """Record a write for other workers (inside the write transaction)"""
+        self._conn.execute(
+            "INSERT INTO changes (user_id, origin) VALUES (?, ?)", (user_id, self._origin)
+        )
+        self._writes += 1
+        if self._writes % 1000 == 0:
+            self._conn.execute(
+                "DELETE FROM changes WHERE seq <= (SELECT MAX(seq) FROM changes) - ?",
+                (CHANGE_LOG_SIZE,)
+            )
+
+    def save_user(self, user: UserRecord, guest_counter: Optional[int] = None):
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                # Upsert by ID only: a clash on email/username must raise,
+                # not silently replace the other user's row
+                self._conn.execute(self.UPSERT, self._row(user))
+                if guest_counter is not None:
+                    self._set_guest_counter(guest_counter)
+                self._log_change(user.id)
+                self._conn.execute("COMMIT")
+            except sqlite3.IntegrityError as e:
+                self._conn.execute("ROLLBACK")
+                raise DuplicateUserError(str(e)) from e
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+
+    def delete_user(self, user_id: str):
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                self._conn.execute("DELETE FROM users WHERE id = ?", (user_id,))
+                self._log_change(user_id)
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+
+    def _set_guest_counter(self, value: int):
+        # Never move backwards: another worker may already have allocated more
+        self._conn.execute(
+            "INSERT INTO meta (key, value) VALUES ('guest_counter', ?) "
+            "ON CONFLICT(key) DO UPDATE SET value = MAX(value, excluded.value)",
+            (value,)
+        )
+
+    def save_guest_counter(self, value: int):
+        with self._lock:
+            self._set_guest_counter(value)
+
+    def save_all(self, users: Dict[str, UserRecord], guest_counter: int):
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                self._conn.execute("DELETE FROM users")
+                self._conn.executemany(
+                    f"INSERT INTO users ({self.COLUMNS}) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                    (self._row(user) for user in users.values())
+                )
+                self._conn.execute(
+                    "INSERT INTO meta (key, value) VALUES ('guest_counter', ?) "
+                    "ON CONFLICT(key) DO UPDATE SET value = excluded.value",
+                    (guest_counter,)
+                )
+                self._log_change(self.ALL_USERS)
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+
+    def allocate_guest_number(self) -> int:
+        with self._lock:
+            # IMMEDIATE takes the write lock up front, so no other worker can
+            # read the same counter value in between
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                self._conn.execute(
+                    "INSERT INTO meta (key, value) VALUES ('guest_counter', 1) "
+                    "ON CONFLICT(key) DO UPDATE SET value = value + 1"
+                )
+                value = self._conn.execute(
+                    "SELECT value FROM meta WHERE key = 'guest_counter'"
+                ).fetchone()[0]
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+        return value
+
+    def change_cursor(self) -> int:
+        with self._lock:
+            self._data_version = self._conn.execute("PRAGMA data_version").fetchone()[0]
+            return self._conn.execute("SELECT COALESCE(MAX(seq), 0) FROM changes").fetchone()[0]
+
+    def changes_since(self, cursor: int) -> Tuple[Optional[Dict[str, Optional[UserRecord]]], int]:
+        with self._lock:
+            # Cheap check first: unchanged unless another connection committed
+            data_version = self._conn.execute("PRAGMA data_version").fetchone()[0]
+            if data_version == self._data_version:
+                return {}, cursor
+            self._data_version = data_version
+
+            self._conn.execute("BEGIN")
+            try:
+                oldest = self._conn.execute("SELECT MIN(seq) FROM changes").fetchone()[0]
+                rows = self._conn.execute(
+                    "SELECT seq, user_id, origin FROM changes WHERE seq > ? ORDER BY seq", (cursor,)
+                ).fetchall()
+                if not rows:
+                    return {}, cursor
+                new_cursor = rows[-1][0]
+                if oldest is not None and oldest > cursor + 1:
+                    # Entries we never saw were pruned
+                    return None, new_cursor
+                changed = {user_id for _, user_id, origin in rows if origin != self._origin}
+                if self.ALL_USERS in changed:
+                    return None, new_cursor
+                users: Dict[str, Optional[UserRecord]] = dict.fromkeys(changed)
+                for user_id in changed:
+                    row = self._conn.execute(
+                        f"SELECT {self.SELECT_COLUMNS} FROM users WHERE id = ?", (user_id,)
+                    ).fetchone()
+                    if row is not None:
+                        users[user_id] = self._user(row)
+            finally:
+                self._conn.execute("COMMIT")
+        return users, new_cursor
+
+    def seed_from_json(self, json_path: str) -> int:
+        """
+        Import users.json into an empty database
+
+        Safe to call from every worker at startup: the check and the import
+        happen in one write transaction, so only the first worker imports.
+
+        Returns:
+            Number of users imported
+        """
+        if not os.path.exists(json_path):
+            return 0
+        users, guest_counter = JSONUserStore(json_path).load()
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                seeded = self._conn.execute("SELECT value FROM meta WHERE key = 'seeded'").fetchone()
+                if seeded or self._conn.execute("SELECT 1 FROM users LIMIT 1").fetchone():
+                    self._conn.execute("ROLLBACK")
+                    return 0
+                self._conn.executemany(
+                    f"INSERT INTO users ({self.COLUMNS}) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                    (self._row(user) for user in users.values())
+                )
+                self._set_guest_counter(guest_counter)
+                self._conn.execute("INSERT INTO meta (key, value) VALUES ('seeded', 1)")
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+        return len(users)
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+    def count(self) -> int:
+        """Number of stored users"""
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM users").fetchone()[0]
+
+
+def create_user_store(kind: Optional[str] = None, json_path: Optional[str] = None) -> UserStore:
+    """
+    Build the configured persistence backend
+
+    Args:
+        kind: "json", "journal" or "sqlite" (defaults to the USER_STORE env var)
+        json_path: users.json location for the JSON backend
+
+    Returns:
+        A user store
+    """
+    kind = kind or USER_STORE
+    json_path = json_path or os.path.join(DATA_DIR, "users.json")
+    if kind == "sqlite":
+        store = SQLiteUserStore(USERS_DB_PATH)
+        # First start after switching over: bring the existing users along
+        seeded = store.seed_from_json(json_path)
+        if seeded:
+            print(f"Imported {seeded} users from {json_path}")
+        return store
+    if kind == "journal":
+        return JournaledJSONUserStore(json_path)
+    if kind == "json":
+        return JSONUserStore(json_path)
+    raise ValueError(f"Unknown USER_STORE '{kind}' (expected 'json', 'journal' or 'sqlite')")
+
+
+def migrate_json_to_sqlite(json_path: str, db_path: str) -> int:
+    """
+    Copy every user and the guest counter from users.json into SQLite
+
+    Existing rows in the database are replaced, so the migration can be
+    re-run safely until the switch-over.
+
+    Args:
+        json_path: Source users.json
+        db_path: Target SQLite database (created if missing)
+
+    Returns:
+        Number of users migrated
+    """
+    users, guest_counter = JSONUserStore(json_path).load()
+    SQLiteUserStore(db_path).save_all(users, guest_counter)
+    return len(users)
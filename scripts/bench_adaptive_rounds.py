@@ -0,0 +1,178 @@
+#!/usr/bin/env python3
+"""
+===============================================================
+SoundSteps Adaptive Round Benchmark
+===============================================================
+Streams simulated graded answers for a synthetic Hungry Monster
+question bank (each question with a hidden true difficulty,
+answered by learners of mixed skill) through the item statistics
+service on a throwaway progress.db and reports:
+
+- observe: cost of counting one graded answer
+- flush:   one worker's counts added to progress.db and read back,
+           with items moved between difficulty buckets
+- select:  latency of an adaptive round for a learner
+- scan:    per-item accuracy recomputed from the whole answer
+           history, what picking a round costs without the counts
+- buckets: how well the buckets order questions by their true
+           difficulty
+
+The real databases are never touched.
+
+Usage:
+    python3 scripts/bench_adaptive_rounds.py [--items 2000]
+                                             [--answers 1000000]
+                                             [--flush-every 20000]
+                                             [--queries 2000]
+===============================================================
+"""
+
+import argparse
+import math
+import os
+import random
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+SCRIPT_DIR = Path(__file__).parent
+PROJECT_ROOT = SCRIPT_DIR.parent
+BACKEND_DIR = PROJECT_ROOT / "backend"
+
+sys.path.insert(0, str(BACKEND_DIR))
+
+GAME = "hungry_monster"
+
+
+def question_bank(items: int, rng: random.Random):
+    """Synthetic questions and each one's true difficulty (0 easy to 1 hard)"""
+    questions = []
+    difficulty = {}
+    for item_id in range(1, items + 1):
+        word = f"word{item_id}"
+        questions.append({
+            "id": item_id, "sound": "/a/", "correctAnswer": word,
+            "options": [word, f"decoy{item_id}a", f"decoy{item_id}b"],
+        })
+        difficulty[item_id] = rng.betavariate(2, 3)
+    return questions, difficulty
+
+
+def answer(skill: float, difficulty: float, rng: random.Random):
+    """(correct, seconds) for a learner of skill answering an item"""
+    chance = 1 / (1 + math.exp(-6 * (skill - difficulty)))
+    correct = rng.random() < chance
+    seconds = rng.lognormvariate(math.log(3 + 10 * difficulty), 0.4)
+    return correct, seconds
+
+
+def latencies(func, queries: int):
+    """p50 and p99 of func() in microseconds"""
+    samples = []
+    for _ in range(queries):
+        start = time.perf_counter()
+        func()
+        samples.append(time.perf_counter() - start)
+    samples.sort()
+    return samples[len(samples) // 2] * 1e6, samples[int(len(samples) * 0.99)] * 1e6
+
+
+def spearman(pairs):
+    """Rank correlation of (x, y) pairs"""
+    def ranks(values):
+        order = sorted(range(len(values)), key=values.__getitem__)
+        result = [0] * len(values)
+        for rank, index in enumerate(order):
+            result[index] = rank
+        return result
+    xs = ranks([x for x, _ in pairs])
+    ys = ranks([y for _, y in pairs])
+    n = len(pairs)
+    return 1 - 6 * sum((x - y) ** 2 for x, y in zip(xs, ys)) / (n * (n * n - 1))
+
+
+def main(items: int, answers: int, flush_every: int, queries: int):
+    tmp = tempfile.mkdtemp(prefix="soundsteps-items-")
+    os.environ.update(
+        USER_STORE="sqlite",
+        USERS_DB_PATH=os.path.join(tmp, "users.db"),
+        PROGRESS_DB_PATH=os.path.join(tmp, "progress.db"),
+        REVOCATION_DB_PATH=os.path.join(tmp, "revoked.db"),
+    )
+    from app.services.content import Dataset
+    from app.services.item_stats import BUCKETS, ItemStats
+
+    rng = random.Random(11)
+    questions, truth = question_bank(items, rng)
+    dataset = Dataset(GAME, questions, "questions")
+    stats = ItemStats(os.path.join(tmp, "progress.db"))
+    stats.select(dataset, 0.5)
+
+    history = []
+    observe_time = flush_time = 0.0
+    flushes = 0
+    for i in range(answers):
+        item_id = rng.randrange(1, items + 1)
+        correct, seconds = answer(rng.random(), truth[item_id], rng)
+        history.append((item_id, correct, seconds))
+        start = time.perf_counter()
+        stats.observe(GAME, item_id, correct, None if correct else "decoy", seconds=seconds)
+        observe_time += time.perf_counter() - start
+        if i % flush_every == flush_every - 1:
+            start = time.perf_counter()
+            stats.flush()
+            flush_time += time.perf_counter() - start
+            flushes += 1
+    stats.flush()
+    print(f"streamed {answers:,} graded answers over {items:,} questions\n")
+    print(f"observe: {observe_time / answers * 1e6:>8.2f} us per answer")
+    print(f"flush:   {flush_time / max(1, flushes) * 1000:>8.2f} ms per flush "
+          f"({flush_every:,} answers, {flushes} flushes)\n")
+
+    print(f"{'operation':<26} {'p50':>9} {'p99':>9}")
+    p50, p99 = latencies(lambda: stats.select(dataset, rng.random(), rng=rng), queries)
+    print(f"{'select: adaptive round':<26} {p50:>7,.1f}us {p99:>7,.1f}us")
+
+    def scan():
+        totals = {}
+        for item_id, correct, _ in history:
+            counts = totals.setdefault(item_id, [0, 0])
+            counts[0] += 1
+            counts[1] += correct
+        return totals
+
+    p50, _ = latencies(scan, 3)
+    print(f"{'scan: answer history':<26} {p50 / 1000:>7,.1f}ms\n")
+
+    sizes = [len(members) for members in stats._buckets_for(dataset).members]
+    print("bucket sizes (easiest first): " + ", ".join(f"{size:,}" for size in sizes))
+    measured = [(truth[item["item_id"]], item["difficulty"]) for item in stats.describe(dataset)]
+    rho = spearman(measured)
+    print(f"rank correlation, true vs measured difficulty: {rho:.3f}")
+    means = []
+    for bucket in range(BUCKETS):
+        members = stats._buckets_for(dataset).members[bucket]
+        if members:
+            means.append(sum(truth[item_id] for item_id in members) / len(members))
+    print("mean true difficulty per bucket: " + ", ".join(f"{mean:.2f}" for mean in means))
+    assert means == sorted(means), means
+
+    weak = stats.select(dataset, 0.0, rng=rng)
+    strong = stats.select(dataset, 1.0, rng=rng)
+    weak_mean = sum(truth[q["id"]] for q in weak["questions"]) / weak["total"]
+    strong_mean = sum(truth[q["id"]] for q in strong["questions"]) / strong["total"]
+    print(f"round for the weakest learner: {weak['total']} questions, mean true difficulty {weak_mean:.2f}")
+    print(f"round for the strongest:       {strong['total']} questions, mean true difficulty {strong_mean:.2f}")
+    assert weak_mean < strong_mean
+    stats.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Item statistics streaming and adaptive round selection cost")
+    parser.add_argument("--items", type=int, default=2000)
+    parser.add_argument("--answers", type=int, default=1000000)
+    parser.add_argument("--flush-every", type=int, default=20000, help="answers per flush")
+    parser.add_argument("--queries", type=int, default=2000)
+    args = parser.parse_args()
+    main(args.items, args.answers, args.flush_every, args.queries)
@@ -0,0 +1,80 @@
+#!/usr/bin/env python3
+"""
+===============================================================
+SoundSteps bcrypt Cost Benchmark
+===============================================================
+Measures bcrypt hashes/sec per core at each cost factor, so an
+operator can pick BCRYPT_ROUNDS for their login latency target.
+
+For each cost it reports:
+- milliseconds per hash (one login's CPU)
+- hashes/sec on one core
+- logins/sec a worker can sustain with PASSWORD_WORKERS threads
+  (assuming that many free cores)
+- whether one hash fits within --slo-ms
+
+Logins with hashes at another cost are rehashed to BCRYPT_ROUNDS
+in the background, so changing the cost is safe at any time.
+
+Usage:
+    python3 scripts/bench_bcrypt.py [--min 8] [--max 14] [--slo-ms 250]
+===============================================================
+"""
+
+import argparse
+import sys
+import time
+from pathlib import Path
+
+SCRIPT_DIR = Path(__file__).parent
+PROJECT_ROOT = SCRIPT_DIR.parent
+BACKEND_DIR = PROJECT_ROOT / "backend"
+
+sys.path.insert(0, str(BACKEND_DIR))
+
+from app.services.password import BCRYPT_ROUNDS, PASSWORD_WORKERS, hash_password  # noqa: E402
+
+# Stop timing a cost once this much time has been spent on it
+BUDGET_SECONDS = 2.0
+
+
+def time_hash(rounds: int) -> float:
+    """Average seconds per hash at a cost factor"""
+    hash_password("warm-up", rounds=4)
+    count = 0
+    start = time.process_time()
+    while True:
+        hash_password("correct horse battery", rounds=rounds)
+        count += 1
+        elapsed = time.process_time() - start
+        if count >= 3 and elapsed >= BUDGET_SECONDS or elapsed >= BUDGET_SECONDS * 3:
+            return elapsed / count
+
+
+def main(min_rounds: int, max_rounds: int, slo_ms: float):
+    print(f"BCRYPT_ROUNDS={BCRYPT_ROUNDS}, PASSWORD_WORKERS={PASSWORD_WORKERS}, SLO {slo_ms:.0f} ms\n")
+    print(f"{'cost':>4} {'ms/hash':>9} {'hashes/s/core':>14} {'logins/s/worker':>16}  fits SLO")
+    best = None
+    for rounds in range(min_rounds, max_rounds + 1):
+        seconds = time_hash(rounds)
+        fits = seconds * 1000 <= slo_ms
+        if fits:
+            best = rounds
+        marker = " (current)" if rounds == BCRYPT_ROUNDS else ""
+        print(f"{rounds:>4} {seconds * 1000:>9.1f} {1 / seconds:>14.1f} "
+              f"{PASSWORD_WORKERS / seconds:>16.1f}  {'yes' if fits else 'no'}{marker}")
+
+    if best is None:
+        print(f"\nNo cost in {min_rounds}-{max_rounds} hashes within {slo_ms:.0f} ms on this machine.")
+    else:
+        print(f"\nHighest cost within the SLO: BCRYPT_ROUNDS={best}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="bcrypt hashes/sec per cost factor")
+    parser.add_argument("--min", type=int, default=8, dest="min_rounds")
+    parser.add_argument("--max", type=int, default=14, dest="max_rounds")
+    parser.add_argument("--slo-ms", type=float, default=250,
+                        help="CPU budget for one password check")
+    args = parser.parse_args()
+    main(args.min_rounds, args.max_rounds, args.slo_ms)
@@ -0,0 +1,128 @@
+#!/usr/bin/env python3
+"""
+===============================================================
+SoundSteps Content Route Benchmark
+===============================================================
+Measures requests/sec on the read-only content routes, comparing:
+
+- before: the original handlers (json.load per request, dict body,
+  FastAPI jsonable_encoder + json.dumps)
+- after:  the current app (in-memory catalog, bodies pre-encoded
+  once per content version, ORJSONResponse as the default class)
+
+Requests are driven straight through the ASGI interface in-process,
+so the numbers measure the application, not the network stack.
+
+Usage:
+    python3 scripts/bench_content_routes.py [--requests 2000]
+===============================================================
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import sys
+import time
+from pathlib import Path
+
+SCRIPT_DIR = Path(__file__).parent
+PROJECT_ROOT = SCRIPT_DIR.parent
+BACKEND_DIR = PROJECT_ROOT / "backend"
+DATA_DIR = BACKEND_DIR / "data"
+
+sys.path.insert(0, str(BACKEND_DIR))
+
+from fastapi import FastAPI  # noqa: E402
+
+# (path, data file, list key)
+ROUTES = [
+    ("/api/cards/", "flashcards.json", "cards"),
+    ("/api/soundout/", "soundout.json", "words"),
+    ("/api/game/hungry-monster", "hungry_monster.json", "questions"),
+    ("/api/game/minimal-pairs", "minimal_pairs.json", "exercises"),
+    ("/api/mouth-moves/", "mouth_moves.json", "exercises"),
+    ("/api/homophone-quiz/", "homophone_quiz.json", "questions"),
+]
+
+
+def build_baseline_app() -> FastAPI:
+    """Recreate the pre-catalog handlers for comparison"""
+    app = FastAPI()
+
+    def make_handler(file_name, list_key):
+        path = DATA_DIR / file_name
+
+        async def handler():
+            with open(path, 'r', encoding='utf-8') as f:
+                items = json.load(f)
+            return {list_key: items, "total": len(items)}
+        return handler
+
+    for route, file_name, list_key in ROUTES:
+        app.add_api_route(route, make_handler(file_name, list_key), methods=["GET"])
+    return app
+
+
+async def call(app, path: str, headers=()):
+    """Send one GET through the ASGI app and return (status, response headers)"""
+    scope = {
+        "type": "http",
+        "asgi": {"version": "3.0"},
+        "http_version": "1.1",
+        "method": "GET",
+        "scheme": "http",
+        "path": path,
+        "raw_path": path.encode(),
+        "query_string": b"",
+        "root_path": "",
+        "headers": [(k.encode(), v.encode()) for k, v in headers],
+        "client": ("127.0.0.1", 5000),
+        "server": ("127.0.0.1", 8000),
+    }
+    result = {"status": 0, "headers": {}}
+
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message):
+        if message["type"] == "http.response.start":
+            result["status"] = message["status"]
+            result["headers"] = {k.decode().lower(): v.decode() for k, v in message["headers"]}
+
+    await app(scope, receive, send)
+    return result["status"], result["headers"]
+
+
+async def bench(app, path: str, requests: int, headers=()) -> float:
+    """Return requests/sec for repeated GETs of one path"""
+    status, _ = await call(app, path, headers)
+    assert status in (200, 304), f"{path} returned {status}"
+    start = time.perf_counter()
+    for _ in range(requests):
+        await call(app, path, headers)
+    return requests / (time.perf_counter() - start)
+
+
+async def main(requests: int):
+    from app.main import app as current_app
+    from app.services.content import load_catalog
+
+    load_catalog()
+    baseline_app = build_baseline_app()
+
+    print(f"{'route':<28} {'before':>10} {'after':>10} {'speedup':>8} {'after 304':>10}")
+    for route, _, _ in ROUTES:
+        before = await bench(baseline_app, route, requests)
+        after = await bench(current_app, route, requests)
+        _, headers = await call(current_app, route)
+        not_modified = await bench(current_app, route, requests, [("if-none-match", headers["etag"])])
+        print(f"{route:<28} {before:>8.0f}/s {after:>8.0f}/s {after / before:>7.1f}x {not_modified:>8.0f}/s")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[2])
+    parser.add_argument("--requests", type=int, default=2000, help="requests per route and variant")
+    args = parser.parse_args()
+    os.environ.setdefault("CONTENT_RELOAD_INTERVAL", "0")
+    asyncio.run(main(args.requests))
@@ -0,0 +1,157 @@
+#!/usr/bin/env python3
+"""
+===============================================================
+SoundSteps Leaderboard Benchmark
+===============================================================
+Seeds a throwaway progress.db with synthetic learners (in classes
+of ~30, some active this week and today), builds the leaderboard
+from it and reports:
+
+- build:   time to load every board (what a worker pays at startup)
+- updates: XP changes per second read from board_log and applied
+           to the boards (global and class, all time / week / day
+           each), as a worker follows the others' writes
+- queries: latency of top 10 + my rank, my rank with 5 neighbors
+           either side, and the class board, global and per class
+- scan:    my rank recomputed by counting higher scores, what a
+           leaderboard without an ordered index costs per query
+
+The real progress.db is never touched.
+
+Usage:
+    python3 scripts/bench_leaderboard.py [--learners 1000000]
+                                         [--updates 100000] [--queries 2000]
+===============================================================
+"""
+
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+SCRIPT_DIR = Path(__file__).parent
+PROJECT_ROOT = SCRIPT_DIR.parent
+BACKEND_DIR = PROJECT_ROOT / "backend"
+
+sys.path.insert(0, str(BACKEND_DIR))
+
+CLASS_SIZE = 30
+WEEK_ACTIVE = 0.3
+DAY_ACTIVE = 0.1
+
+
+def seed(log, learners: int, rng: random.Random, now: float):
+    """Aggregates, class memberships and this week's board_log rows"""
+    from app.services.progress import DAY
+
+    conn = log._conn
+    week_start = (((int(now // DAY) + 3) // 7) * 7 - 3) * DAY
+    conn.execute("BEGIN")
+    conn.executemany(
+        "INSERT INTO aggregates (user_id, events, views, answers, correct, time_spent, xp, streak,"
+        " best_streak, last_day, last_event_at, utc_offset, flashcards, modules)"
+        " VALUES (?, 0, 0, 0, 0, 0, ?, 0, 0, NULL, 0, 0, '0', '{}')",
+        ((f"learner{i}", rng.randrange(50, 50000, 50)) for i in range(learners))
+    )
+    conn.executemany(
+        "INSERT INTO class_members (user_id, class_code) VALUES (?, ?)",
+        ((f"learner{i}", f"C{i // CLASS_SIZE}") for i in range(learners))
+    )
+    rows = []
+    for i in range(learners):
+        chance = rng.random()
+        if chance < DAY_ACTIVE:
+            rows.append(("xp", f"learner{i}", rng.randrange(50, 500, 50), now - rng.uniform(0, now % DAY)))
+        elif chance < WEEK_ACTIVE:
+            rows.append(("xp", f"learner{i}", rng.randrange(50, 500, 50), rng.uniform(week_start, now)))
+    conn.executemany("INSERT INTO board_log (kind, user_id, xp, at) VALUES (?, ?, ?, ?)", rows)
+    conn.execute("COMMIT")
+
+
+def latencies(func, queries: int):
+    """p50 and p99 of func() in microseconds"""
+    samples = []
+    for _ in range(queries):
+        start = time.perf_counter()
+        func()
+        samples.append(time.perf_counter() - start)
+    samples.sort()
+    return samples[len(samples) // 2] * 1e6, samples[int(len(samples) * 0.99)] * 1e6
+
+
+def main(learners: int, updates: int, queries: int):
+    tmp = tempfile.mkdtemp(prefix="soundsteps-leaderboard-")
+    os.environ["PROGRESS_DB_PATH"] = os.path.join(tmp, "progress.db")
+    from app.services.leaderboard import Leaderboard
+    from app.services.progress import ProgressLog
+
+    rng = random.Random(7)
+    now = time.time()
+    log = ProgressLog()
+    start = time.perf_counter()
+    seed(log, learners, rng, now)
+    print(f"seeded {learners:,} learners in {time.perf_counter() - start:.1f}s\n")
+
+    start = time.perf_counter()
+    board = Leaderboard()
+    print(f"build          {time.perf_counter() - start:>8.2f}s  "
+          f"(week {len(board._global['week']):,}, day {len(board._global['day']):,} learners)")
+
+    # XP earned on other workers: their board_log rows (and aggregates),
+    # picked up and applied by the next query
+    user_ids = [f"learner{rng.randrange(learners)}" for _ in range(updates)]
+    gains = [rng.randrange(50, 250, 50) for _ in range(updates)]
+    conn = log._conn
+    conn.execute("BEGIN")
+    conn.executemany("UPDATE aggregates SET xp = xp + ? WHERE user_id = ?", zip(gains, user_ids))
+    conn.executemany("INSERT INTO board_log (kind, user_id, xp, at) VALUES ('xp', ?, ?, ?)",
+                     ((user_id, xp, now) for user_id, xp in zip(user_ids, gains)))
+    conn.execute("COMMIT")
+    start = time.perf_counter()
+    board.standings("global", "all", user_ids[0])
+    elapsed = time.perf_counter() - start
+    print(f"updates        {updates / elapsed:>8,.0f}/s  (6 boards each: global and class x all/week/day)\n")
+
+    print(f"{'query':<26} {'p50':>9} {'p99':>9}")
+    callers = [f"learner{rng.randrange(learners)}" for _ in range(queries)]
+    pick = iter(callers * 8).__next__
+    for label, func in (
+        ("global top 10 + my rank", lambda: board.standings("global", "all", pick())),
+        ("global around me (5)", lambda: board.neighbors("global", "all", pick())),
+        ("global page, middle rank", lambda: board.standings("global", "all", pick(), learners // 2, 10)),
+        ("week top 10 + my rank", lambda: board.standings("global", "week", pick())),
+        ("class top 10 + my rank", lambda: board.standings("class", "all", pick())),
+        ("class around me (5)", lambda: board.neighbors("class", "day", pick())),
+    ):
+        p50, p99 = latencies(func, queries)
+        print(f"{label:<26} {p50:>7,.1f}us {p99:>7,.1f}us")
+
+    scores = board._global["all"].scores
+
+    def scan():
+        xp = scores.get(pick(), 0)
+        return 1 + sum(1 for other in scores.values() if other > xp)
+
+    p50, p99 = latencies(scan, max(1, min(queries, 50)))
+    print(f"{'scan: my rank by counting':<26} {p50:>7,.0f}us {p99:>7,.0f}us")
+
+    # The incremental boards must agree with a fresh build
+    fresh = Leaderboard()
+    for period in ("all", "week", "day"):
+        assert fresh._global[period].scores == board._global[period].scores, period
+    assert fresh.standings("global", "all", callers[0], 0, 100) == board.standings("global", "all", callers[0], 0, 100)
+    fresh.close()
+    board.close()
+    log.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Leaderboard build, update and query cost")
+    parser.add_argument("--learners", type=int, default=1000000)
+    parser.add_argument("--updates", type=int, default=100000)
+    parser.add_argument("--queries", type=int, default=2000)
+    args = parser.parse_args()
+    main(args.learners, args.updates, args.queries)
@@ -0,0 +1,98 @@
+#!/usr/bin/env python3
+"""
+===============================================================
+SoundSteps Login Lookup Benchmark
+===============================================================
+Measures the user-resolution part of login (email lookup, then
+username lookup as authenticate_user does) at growing user counts:
+
+- before: linear scans over users_db.values()
+- after:  email/username hash indexes in services/auth.py
+
+bcrypt verification is left out: it costs the same at any user
+count and would hide the difference being measured.
+
+Usage:
+    python3 scripts/bench_login_lookup.py [--sizes 10000,100000,1000000]
+===============================================================
+"""
+
+import argparse
+import random
+import sys
+import time
+from pathlib import Path
+
+SCRIPT_DIR = Path(__file__).parent
+PROJECT_ROOT = SCRIPT_DIR.parent
+BACKEND_DIR = PROJECT_ROOT / "backend"
+
+sys.path.insert(0, str(BACKEND_DIR))
+
+from app.models.user_record import UserRecord  # noqa: E402
+from app.services import auth  # noqa: E402
+
+LOOKUPS = 200
+
+
+def linear_by_email(email):
+    for user in auth.users_db.values():
+        if user.email == email:
+            return user
+    return None
+
+
+def linear_by_username(username):
+    for user in auth.users_db.values():
+        if user.username == username:
+            return user
+    return None
+
+
+def populate(count: int):
+    """Fill users_db and the indexes with synthetic registered users"""
+    auth.users_db = {}
+    auth.email_index.clear()
+    auth.username_index.clear()
+    for i in range(count):
+        user = UserRecord(
+            id=f"user-{i}",
+            username=f"learner{i}",
+            email=f"learner{i}@school.example",
+            hashed_password="",
+            is_guest=False,
+            created_at=1767225600,
+            last_active=1767225600
+        )
+        auth.users_db[user.id] = user
+        auth._index_user(user)
+
+
+def time_login_lookup(by_email, by_username, names, count) -> float:
+    """Average microseconds to resolve a login identifier"""
+    start = time.perf_counter()
+    for name in names:
+        # Logging in by username tries email first, the worst case
+        user = by_email(name) or by_username(name)
+        assert user is not None
+    return (time.perf_counter() - start) * 1e6 / len(names)
+
+
+def main(sizes):
+    print(f"{'users':>10} {'before (scan)':>16} {'after (index)':>16} {'speedup':>10}")
+    for count in sizes:
+        populate(count)
+        names = [f"learner{random.randrange(count)}" for _ in range(LOOKUPS)]
+        # Linear scans get slow fast; fewer samples keep the run short
+        scan_names = names[:max(5, LOOKUPS * 10000 // count)]
+        before = time_login_lookup(linear_by_email, linear_by_username, scan_names, count)
+        after = time_login_lookup(auth.get_user_by_email, auth.get_user_by_username, names, count)
+        print(f"{count:>10,} {before:>13,.1f} us {after:>13,.2f} us {before / after:>9,.0f}x")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark login user lookup")
+    parser.add_argument("--sizes", default="10000,100000,1000000",
+                        help="comma-separated user counts")
+    args = parser.parse_args()
+    main([int(size) for size in args.sizes.split(",")])
@@ -0,0 +1,178 @@
+#!/usr/bin/env python3
+"""
+===============================================================
+SoundSteps Login Storm Benchmark
+===============================================================
+Measures /api/cards/ latency on one worker while a burst of
+logins runs on the same event loop, comparing:
+
+- before: login verifying the bcrypt hash inline on the event
+  loop, as routes/auth.login used to
+- after:  the current app (bcrypt in the bounded password pool,
+  excess logins shed with 503 + Retry-After)
+
+Requests are driven straight through the ASGI interface on a
+single event loop, which is exactly what one uvicorn worker is.
+Users are written to a throwaway SQLite store.
+
+Usage:
+    python3 scripts/bench_login_storm.py [--seconds 10] [--logins 16]
+===============================================================
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+SCRIPT_DIR = Path(__file__).parent
+PROJECT_ROOT = SCRIPT_DIR.parent
+BACKEND_DIR = PROJECT_ROOT / "backend"
+
+sys.path.insert(0, str(BACKEND_DIR))
+
+EMAIL = "storm@school.example"
+PASSWORD = "password1"
+CARD_POLLERS = 4
+# Seconds between card requests of one poller
+CARD_INTERVAL = 0.02
+
+
+async def call(app, method: str, path: str, payload=None) -> int:
+    """Send one request through the ASGI app and return the status"""
+    body = json.dumps(payload).encode() if payload is not None else b""
+    scope = {
+        "type": "http",
+        "asgi": {"version": "3.0"},
+        "http_version": "1.1",
+        "method": method,
+        "scheme": "http",
+        "path": path,
+        "raw_path": path.encode(),
+        "query_string": b"",
+        "root_path": "",
+        "headers": [(b"content-type", b"application/json"), (b"content-length", str(len(body)).encode())],
+        "client": ("127.0.0.1", 5000),
+        "server": ("127.0.0.1", 8000),
+    }
+    result = {"status": 0}
+
+    async def receive():
+        return {"type": "http.request", "body": body, "more_body": False}
+
+    async def send(message):
+        if message["type"] == "http.response.start":
+            result["status"] = message["status"]
+
+    await app(scope, receive, send)
+    return result["status"]
+
+
+def build_baseline_app():
+    """The current content routes plus a login that runs bcrypt inline"""
+    from fastapi import FastAPI, HTTPException
+    from fastapi.responses import ORJSONResponse
+    from app.models.user import UserLogin
+    from app.routers.phonics import flashcards
+    from app.services.auth import get_user_by_email, get_user_by_username
+    from app.services.password import verify_password
+
+    app = FastAPI(default_response_class=ORJSONResponse)
+    app.include_router(flashcards.router, prefix="/api/cards")
+
+    @app.post("/api/auth/login")
+    async def login(credentials: UserLogin):
+        user = get_user_by_email(credentials.email_or_username) or get_user_by_username(credentials.email_or_username)
+        if not user or not verify_password(credentials.password, user.hashed_password):
+            raise HTTPException(status_code=401)
+        return {"id": user.id}
+
+    return app
+
+
+def percentile(ordered, p):
+    return ordered[min(len(ordered) - 1, int(p * len(ordered)))] * 1000 if ordered else 0.0
+
+
+async def storm(app, seconds: float, logins: int):
+    """Run concurrent logins and card pollers; return card latencies and login statuses"""
+    deadline = time.perf_counter() + seconds
+    latencies = []
+    statuses = {}
+
+    async def log_in():
+        credentials = {"email_or_username": EMAIL, "password": PASSWORD}
+        while time.perf_counter() < deadline:
+            status = await call(app, "POST", "/api/auth/login", credentials)
+            statuses[status] = statuses.get(status, 0) + 1
+            # Hand the loop back between requests, as a network read would
+            await asyncio.sleep(0.05 if status == 503 else 0)
+
+    async def poll_cards():
+        # Requests are due on a fixed schedule and latency counts from the due
+        # time, so time spent waiting for a blocked event loop is included
+        due = time.perf_counter()
+        while due < deadline:
+            await asyncio.sleep(max(0, due - time.perf_counter()))
+            assert await call(app, "GET", "/api/cards/") == 200
+            latencies.append(time.perf_counter() - due)
+            due = max(due + CARD_INTERVAL, time.perf_counter())
+
+    await asyncio.gather(*[log_in() for _ in range(logins)], *[poll_cards() for _ in range(CARD_POLLERS)])
+    return sorted(latencies), statuses
+
+
+def report(label, latencies, statuses):
+    logins = ", ".join(f"{count} x {status}" for status, count in sorted(statuses.items())) or "-"
+    if not latencies:
+        print(f"{label:<22} {0:>6} {'starved: no card request was served':>26}   {logins}")
+        return
+    print(f"{label:<22} {len(latencies):>6} {percentile(latencies, 0.5):>8.1f} "
+          f"{percentile(latencies, 0.99):>8.1f} {percentile(latencies, 1):>8.1f}   {logins}")
+
+
+async def main(seconds: float, logins: int):
+    from app.main import app as current_app
+    from app.models.user import UserCreate
+    from app.services import auth, metrics, password
+    from app.services.content import load_catalog
+
+    load_catalog()
+    if not auth.get_user_by_email(EMAIL):
+        await auth.register_user(UserCreate(username="stormuser", email=EMAIL, password=PASSWORD))
+    baseline_app = build_baseline_app()
+
+    print(f"password pool: {password.PASSWORD_WORKERS} threads, queue limit {password.PASSWORD_QUEUE_LIMIT}; "
+          f"{logins} concurrent logins, {CARD_POLLERS} card pollers, {seconds:.0f}s per run\n")
+    print(f"{'/api/cards/ latency':<22} {'reqs':>6} {'p50 ms':>8} {'p99 ms':>8} {'max ms':>8}   logins")
+    latencies, statuses = await storm(current_app, min(seconds, 3), 0)
+    report("no logins", latencies, statuses)
+    latencies, statuses = await storm(baseline_app, seconds, logins)
+    report("before (inline bcrypt)", latencies, statuses)
+    latencies, statuses = await storm(current_app, seconds, logins)
+    report("after (password pool)", latencies, statuses)
+
+    timings = metrics.snapshot()["timings"]
+    for name in ("password_queue_wait", "password_verify"):
+        if name in timings:
+            t = timings[name]
+            print(f"\n{name}: p50 {t['p50_ms']:.1f} ms, p99 {t['p99_ms']:.1f} ms over {t['count']} calls", end="")
+    print()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Card latency during a login storm")
+    parser.add_argument("--seconds", type=float, default=10, help="duration of each run")
+    parser.add_argument("--logins", type=int, default=16, help="concurrent login loops")
+    args = parser.parse_args()
+    os.environ.setdefault("CONTENT_RELOAD_INTERVAL", "0")
+    os.environ["USER_STORE"] = "sqlite"
+    tmp = tempfile.mkdtemp(prefix="soundsteps-storm-")
+    os.environ["USERS_DB_PATH"] = os.path.join(tmp, "users.db")
+    os.environ["REVOCATION_DB_PATH"] = os.path.join(tmp, "revoked.db")
+    os.environ["PROGRESS_DB_PATH"] = os.path.join(tmp, "progress.db")
+    asyncio.run(main(args.seconds, args.logins))
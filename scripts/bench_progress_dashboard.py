@@ -0,0 +1,125 @@
+#!/usr/bin/env python3
+"""
+===============================================================
+SoundSteps Progress Dashboard Benchmark
+===============================================================
+Times reading one learner's dashboard as their event history
+grows, comparing:
+
+- aggregate: GET /api/progress's path, one primary-key read of
+  the learner's running totals
+- replay:    folding every logged event of the learner again
+  (what a dashboard computed from the log would cost)
+
+Also reports ingestion throughput for batches of events. Runs on
+a throwaway database; the real progress.db is never touched.
+
+Usage:
+    python3 scripts/bench_progress_dashboard.py [--history 100,10000,100000]
+                                                [--batch 50] [--reads 200]
+===============================================================
+"""
+
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+SCRIPT_DIR = Path(__file__).parent
+PROJECT_ROOT = SCRIPT_DIR.parent
+BACKEND_DIR = PROJECT_ROOT / "backend"
+
+sys.path.insert(0, str(BACKEND_DIR))
+
+MODULES = ("flashcards", "soundout", "pairs", "monster")
+NOW = time.time()
+
+
+def random_events(count: int, rng: random.Random, start: float):
+    """A learner's events, spread over the days before start"""
+    from app.models.progress import ProgressEvent
+
+    events = []
+    for i in range(count):
+        module = rng.choice(MODULES)
+        kind = rng.choices(("card_view", "answer", "time_spent", "module_complete"), (40, 40, 15, 5))[0]
+        events.append(ProgressEvent(
+            type=kind,
+            module=module,
+            item_id=rng.randrange(1, 27) if kind in ("card_view", "answer") else None,
+            correct=rng.random() < 0.8 if kind == "answer" else None,
+            seconds=rng.uniform(1, 30) if kind == "time_spent" else 0,
+            at=start - (count - i) * 5
+        ))
+    return events
+
+
+def replay(log, user_id: str, rules):
+    """Dashboard computed from the event log alone"""
+    from app.models.progress import ProgressEvent
+    from app.services.progress import ProgressAggregate, _day
+
+    aggregate = ProgressAggregate(user_id)
+    rows = log._conn.execute(
+        "SELECT seq, type, module, item_id, correct, seconds, at FROM events WHERE user_id = ? ORDER BY at, seq",
+        (user_id,)
+    )
+    for seq, kind, module, item_id, correct, seconds, at in rows:
+        event = ProgressEvent.model_construct(type=kind, module=module, item_id=item_id,
+                                              correct=None if correct is None else bool(correct),
+                                              seconds=seconds, at=at)
+        xp, _ = rules.evaluate(aggregate.achievements, aggregate.apply(event, at, _day(at, 0), seq), at)
+        aggregate.xp += xp
+    return aggregate.dashboard(rules, now=NOW)
+
+
+def per_read(func, reads: int) -> float:
+    start = time.perf_counter()
+    for _ in range(reads):
+        func()
+    return (time.perf_counter() - start) / reads
+
+
+def main(histories, batch: int, reads: int):
+    tmp = tempfile.mkdtemp(prefix="soundsteps-progress-")
+    os.environ["PROGRESS_DB_PATH"] = os.path.join(tmp, "progress.db")
+    from app.services.achievements import get_rules
+    from app.services.content import load_catalog
+    from app.services.progress import ProgressLog
+
+    load_catalog()
+    rules = get_rules()
+    log = ProgressLog()
+    rng = random.Random(7)
+    now = NOW
+
+    print(f"dashboard read for one learner, {reads} reads each; events posted {batch} per batch\n")
+    print(f"{'history':>9} {'ingest ev/s':>12} {'aggregate':>11} {'replay':>11} {'speedup':>9}")
+    for number, history in enumerate(histories):
+        user_id = f"learner{number}"
+        events = random_events(history, rng, now)
+        start = time.perf_counter()
+        for i in range(0, history, batch):
+            log.record(user_id, events[i:i + batch], now=now)
+        ingest = history / (time.perf_counter() - start)
+
+        aggregate_s = per_read(lambda: log.get(user_id).dashboard(rules, now=now), reads)
+        replay_reads = max(1, min(reads, 2000000 // history))
+        replay_s = per_read(lambda: replay(log, user_id, rules), replay_reads)
+        assert replay(log, user_id, rules) == log.get(user_id).dashboard(rules, now=now)
+        print(f"{history:>9,} {ingest:>12,.0f} {aggregate_s * 1e6:>9,.0f}us {replay_s * 1e6:>9,.0f}us "
+              f"{replay_s / aggregate_s:>8,.0f}x")
+    log.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Dashboard read cost as a learner's history grows")
+    parser.add_argument("--history", default="100,10000,100000",
+                        help="comma-separated event counts, one learner each")
+    parser.add_argument("--batch", type=int, default=50)
+    parser.add_argument("--reads", type=int, default=200)
+    args = parser.parse_args()
+    main([int(count) for count in args.history.split(",")], args.batch, args.reads)
@@ -0,0 +1,147 @@
+#!/usr/bin/env python3
+"""
+===============================================================
+SoundSteps Review Scheduler Benchmark
+===============================================================
+Seeds a throwaway progress.db with review schedules for synthetic
+learners (every flashcard and sound-out word each, some due now,
+some long overdue) and reports:
+
+- queue:   latency of a learner's next 10 items (what
+           /api/cards/next reads), from the due-time index
+- record:  a card view or answer recorded with its rescheduling
+- nightly: the pass over overdue items, rows per second, and how
+           many rows it read compared with the whole table
+- scan:    counting overdue items without the index, what a pass
+           that scans every learner-item pair costs just to find them
+
+The real progress.db is never touched.
+
+Usage:
+    python3 scripts/bench_reviews.py [--learners 100000] [--overdue 0.1]
+                                     [--queries 2000]
+===============================================================
+"""
+
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+import uuid
+from pathlib import Path
+
+SCRIPT_DIR = Path(__file__).parent
+PROJECT_ROOT = SCRIPT_DIR.parent
+BACKEND_DIR = PROJECT_ROOT / "backend"
+
+sys.path.insert(0, str(BACKEND_DIR))
+
+DAY = 86400
+# Share of each learner's items due today (the rest are spread over the
+# next weeks, or overdue for --overdue of learners)
+DUE_TODAY = 0.1
+
+
+def seed(log, learners: int, overdue: float, rng: random.Random, now: float) -> int:
+    """Schedules for every deck item of every learner; returns rows written"""
+    from app.services.content import get_catalog
+    from app.services.reviews import DECKS
+
+    catalog = get_catalog()
+    items = [(deck, item["id"]) for deck in DECKS for item in catalog.get(deck).items]
+    conn = log._conn
+    rows = 0
+    conn.execute("BEGIN")
+    for i in range(learners):
+        away = rng.random() < overdue
+        batch = []
+        for deck, item_id in items:
+            interval = rng.choice((1, 6, 15, 37, 90))
+            if away:
+                due = now - rng.uniform(2, 60) * DAY
+            elif rng.random() < DUE_TODAY:
+                due = now - rng.uniform(0, DAY)
+            else:
+                due = now + rng.uniform(0, interval) * DAY
+            batch.append((f"learner{i}", deck, item_id, 2.5, interval, 2, 0, due, due - interval * DAY))
+        conn.executemany(
+            "INSERT INTO reviews (user_id, deck, item_id, ease, interval, reps, lapses, due, reviewed_at)"
+            " VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)", batch
+        )
+        rows += len(batch)
+        if i % 10000 == 9999:
+            conn.execute("COMMIT")
+            conn.execute("BEGIN")
+    conn.execute("COMMIT")
+    return rows
+
+
+def latencies(func, queries: int):
+    """p50 and p99 of func() in microseconds"""
+    samples = []
+    for _ in range(queries):
+        start = time.perf_counter()
+        func()
+        samples.append(time.perf_counter() - start)
+    samples.sort()
+    return samples[len(samples) // 2] * 1e6, samples[int(len(samples) * 0.99)] * 1e6
+
+
+def main(learners: int, overdue: float, queries: int):
+    tmp = tempfile.mkdtemp(prefix="soundsteps-reviews-")
+    os.environ["PROGRESS_DB_PATH"] = os.path.join(tmp, "progress.db")
+    from app.models.progress import ProgressEvent
+    from app.services.content import get_catalog, load_catalog
+    from app.services.progress import ProgressLog
+    from app.services.reviews import REVIEW_OVERDUE_GRACE
+
+    load_catalog()
+    rng = random.Random(7)
+    now = time.time()
+    log = ProgressLog()
+    start = time.perf_counter()
+    rows = seed(log, learners, overdue, rng, now)
+    print(f"seeded {rows:,} learner-item schedules ({learners:,} learners) "
+          f"in {time.perf_counter() - start:.1f}s\n")
+
+    print(f"{'operation':<26} {'p50':>9} {'p99':>9}")
+    pick = lambda: f"learner{rng.randrange(learners)}"  # noqa: E731
+    item_ids = get_catalog().get("flashcards").item_ids
+    p50, p99 = latencies(lambda: log.review_queue(pick(), "flashcards", 10, item_ids, now), queries)
+    print(f"{'queue: next 10 due':<26} {p50:>7,.1f}us {p99:>7,.1f}us")
+
+    def record():
+        event = ProgressEvent(type="answer", module="flashcards", item_id=rng.randrange(1, 27),
+                              correct=rng.random() < 0.8, key=uuid.uuid4().hex)
+        log.record(pick(), [event], now=now)
+
+    p50, p99 = latencies(record, max(1, queries // 4))
+    print(f"{'record: answer + review':<26} {p50:>7,.1f}us {p99:>7,.1f}us\n")
+
+    cutoff = now - REVIEW_OVERDUE_GRACE
+    start = time.perf_counter()
+    expected, = log._conn.execute("SELECT COUNT(*) FROM reviews NOT INDEXED WHERE due < ?", (cutoff,)).fetchone()
+    scan = time.perf_counter() - start
+    print(f"scan: find overdue      {scan:>8.2f}s  ({expected:,} of {rows:,} rows, full table)")
+
+    start = time.perf_counter()
+    moved = log.reschedule_overdue(now)
+    elapsed = time.perf_counter() - start
+    print(f"nightly pass            {elapsed:>8.2f}s  ({moved:,} rescheduled, "
+          f"{moved / elapsed if elapsed else 0:,.0f}/s, only overdue rows read)")
+    assert moved == expected, (moved, expected)
+    left, = log._conn.execute("SELECT COUNT(*) FROM reviews WHERE due < ?", (cutoff,)).fetchone()
+    assert left == 0, left
+    assert log.reschedule_overdue(now) == 0
+    log.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Review queue, recording and nightly pass cost")
+    parser.add_argument("--learners", type=int, default=100000)
+    parser.add_argument("--overdue", type=float, default=0.1, help="share of learners away (all items overdue)")
+    parser.add_argument("--queries", type=int, default=2000)
+    args = parser.parse_args()
+    main(args.learners, args.overdue, args.queries)
@@ -0,0 +1,143 @@
+#!/usr/bin/env python3
+"""
+===============================================================
+SoundSteps User Memory Benchmark
+===============================================================
+Measures bytes per user held in memory for a population of
+synthetic users, comparing:
+
+- before: pydantic UserInDB with ISO-8601 timestamp strings,
+  a stored placeholder email for guests and a progress dict
+  holding a list of completed flashcards
+- after:  the slotted UserRecord (epoch-second timestamps,
+  flashcard bitset, interned usernames, derived guest email)
+
+Each representation is built in its own process and measured
+as the growth of the process's resident memory (everything it
+takes to hold the users, including the dict keyed by ID).
+Strings are created fresh per user, as parsing users.json or
+SQLite rows would. Linux only (reads /proc/self/statm).
+
+Usage:
+    python3 scripts/bench_user_memory.py [--users 1000000]
+                                         [--guest-share 0.8]
+===============================================================
+"""
+
+import argparse
+import gc
+import json
+import os
+import random
+import subprocess
+import sys
+import time
+import uuid
+from pathlib import Path
+
+SCRIPT_DIR = Path(__file__).parent
+PROJECT_ROOT = SCRIPT_DIR.parent
+BACKEND_DIR = PROJECT_ROOT / "backend"
+
+sys.path.insert(0, str(BACKEND_DIR))
+
+FLASHCARDS = 26
+
+
+def fresh(text: str) -> str:
+    """A new string object, as a JSON parser would produce"""
+    return "".join(list(text))
+
+
+def synthetic_users(count: int, guest_share: float):
+    """Yield stored-form dicts for a mix of guests and registered users"""
+    rng = random.Random(7)
+    for i in range(count):
+        is_guest = rng.random() < guest_share
+        if is_guest:
+            user_id = f"guest_{i:05d}"
+            username = fresh("Guest")
+            email = f"{user_id}@guest.soundsteps.app"
+            hashed_password = ""
+        else:
+            user_id = str(uuid.UUID(int=rng.getrandbits(128)))
+            username = f"learner{i}"
+            email = f"learner{i}@school.example"
+            hashed_password = "$2b$12$" + "".join(rng.choices("abcdefghijklmnopqrstuvwxyz0123456789./", k=53))
+        yield {
+            "username": username,
+            "email": email,
+            "id": user_id,
+            "hashed_password": hashed_password,
+            "is_guest": is_guest,
+            "created_at": f"2026-{1 + i % 12:02d}-{1 + i % 28:02d}T10:{i % 60:02d}:00.{rng.randrange(10 ** 6):06d}",
+            "last_active": f"2026-{1 + i % 12:02d}-{1 + i % 28:02d}T11:{i % 60:02d}:00.{rng.randrange(10 ** 6):06d}",
+            "progress": {
+                "flashcards_completed": sorted(rng.sample(range(1, FLASHCARDS + 1), rng.randrange(FLASHCARDS))),
+                "soundout_completed": rng.randrange(50),
+                "games_completed": rng.randrange(50),
+                "minimal_pairs_completed": rng.randrange(50),
+                "total_time_spent": rng.randrange(100000),
+                "current_streak": rng.randrange(30),
+            },
+        }
+
+
+def resident_bytes() -> int:
+    gc.collect()
+    with open("/proc/self/statm") as f:
+        return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+
+
+def measure(representation: str, count: int, guest_share: float) -> dict:
+    """Build the users in one representation; return bytes held and build time"""
+    from app.models.user import UserInDB
+    from app.models.user_record import UserRecord
+
+    build = UserInDB.model_validate if representation == "before" else UserRecord.from_dict
+    # Warm up allocator pools and lazily built validators outside the measurement
+    for data in synthetic_users(1000, guest_share):
+        build(data)
+    baseline = resident_bytes()
+    users = {}
+    start = time.perf_counter()
+    for data in synthetic_users(count, guest_share):
+        # The source dict is garbage once built, as after parsing a file
+        users[data["id"]] = build(data)
+    elapsed = time.perf_counter() - start
+    held = resident_bytes() - baseline
+    return {"bytes": held, "seconds": elapsed}
+
+
+def megabytes(size: float) -> str:
+    return f"{size / 1024 / 1024:,.0f} MB"
+
+
+def main(count: int, guest_share: float):
+    print(f"{count:,} users ({guest_share:.0%} guests), each with random progress "
+          f"over {FLASHCARDS} flashcards\n")
+    print(f"{'representation':<28} {'total':>10} {'bytes/user':>11} {'build s':>9}")
+    results = {}
+    for representation, label in (("before", "UserInDB (pydantic, ISO)"), ("after", "UserRecord (slotted)")):
+        output = subprocess.run(
+            [sys.executable, __file__, "--users", str(count), "--guest-share", str(guest_share),
+             "--measure", representation],
+            check=True, capture_output=True, text=True
+        ).stdout
+        result = results[representation] = json.loads(output)
+        print(f"{label:<28} {megabytes(result['bytes']):>10} {result['bytes'] / count:>11,.0f} "
+              f"{result['seconds']:>9.1f}")
+    print(f"\n{results['before']['bytes'] / results['after']['bytes']:.1f}x less memory per user")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Bytes per in-memory user, before and after UserRecord")
+    parser.add_argument("--users", type=int, default=1000000)
+    parser.add_argument("--guest-share", type=float, default=0.8,
+                        help="fraction of users that are guests")
+    parser.add_argument("--measure", choices=("before", "after"), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    if args.measure:
+        print(json.dumps(measure(args.measure, args.users, args.guest_share)))
+    else:
+        main(args.users, args.guest_share)
@@ -0,0 +1,244 @@
+#!/usr/bin/env python3
+"""
+===============================================================
+SoundSteps Multi-Worker User Store Hammer
+===============================================================
+Starts the API with 4 uvicorn workers on a throwaway SQLite
+user store and hammers /api/auth/guest and /api/auth/register
+from many threads at once, then checks:
+
+- every guest got a distinct guest ID
+- each contested email/username was registered exactly once
+- every registered user can log in and use their token on
+  every worker, and every guest token works on every worker
+  (reads see other workers' writes)
+- the stored guest counter covers every issued guest ID
+- a token revoked by logging out on one worker is rejected by
+  every worker once they have synced (USER_SYNC_INTERVAL)
+
+With --id-service the local guest ID service is started too and
+the workers allocate guest IDs through it.
+
+Exits non-zero if any check fails.
+
+Usage:
+    python3 scripts/hammer_user_store.py [--guests 400] [--users 100]
+                                         [--contenders 4] [--id-service]
+===============================================================
+"""
+
+import argparse
+import json
+import os
+import random
+import socket
+import sqlite3
+import subprocess
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from urllib.error import HTTPError, URLError
+from urllib.request import Request, urlopen
+
+SCRIPT_DIR = Path(__file__).parent
+PROJECT_ROOT = SCRIPT_DIR.parent
+BACKEND_DIR = PROJECT_ROOT / "backend"
+
+WORKERS = 4
+THREADS = 32
+# Workers' USER_SYNC_INTERVAL: others refuse a revoked token within it
+USER_SYNC_INTERVAL = 0.5
+# Lets the script read GET /metrics (which worker answered)
+METRICS_TOKEN = "hammer"
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def call(base, method, path, payload=None, token=None):
+    """Send one request on a fresh connection; return (status, JSON body)"""
+    headers = {"Content-Type": "application/json"}
+    if token:
+        headers["Authorization"] = f"Bearer {token}"
+    data = json.dumps(payload).encode() if payload is not None else None
+    request = Request(base + path, data=data, headers=headers, method=method)
+    try:
+        with urlopen(request, timeout=30) as response:
+            return response.status, json.load(response)
+    except HTTPError as e:
+        return e.code, json.load(e)
+
+
+def wait_until_up(url, process, timeout=30):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        if process.poll() is not None:
+            sys.exit(f"{url} exited during startup")
+        try:
+            with urlopen(url + "/health", timeout=1):
+                return
+        except (URLError, ConnectionError):
+            time.sleep(0.2)
+    sys.exit(f"{url} did not come up")
+
+
+def main(guests, users, contenders, id_service):
+    tmp = tempfile.mkdtemp(prefix="soundsteps-hammer-")
+    db_path = os.path.join(tmp, "users.db")
+    env = dict(os.environ, USER_STORE="sqlite", USERS_DB_PATH=db_path,
+               REVOCATION_DB_PATH=os.path.join(tmp, "revoked.db"),
+               PROGRESS_DB_PATH=os.path.join(tmp, "progress.db"), METRICS_TOKEN=METRICS_TOKEN,
+               CONTENT_RELOAD_INTERVAL="0", USER_SYNC_INTERVAL=str(USER_SYNC_INTERVAL),
+               PYTHONPATH=str(BACKEND_DIR))
+    processes = []
+
+    if id_service:
+        id_port = free_port()
+        processes.append(subprocess.Popen(
+            [sys.executable, str(SCRIPT_DIR / "id_service.py"), "--port", str(id_port),
+             "--db", os.path.join(tmp, "id_service.db")],
+            stdout=subprocess.DEVNULL
+        ))
+        env["GUEST_ID_SERVICE_URL"] = f"http://127.0.0.1:{id_port}"
+        wait_until_up(env["GUEST_ID_SERVICE_URL"], processes[-1])
+
+    port = free_port()
+    base = f"http://127.0.0.1:{port}"
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "app.main:app", "--host", "127.0.0.1",
+         "--port", str(port), "--workers", str(WORKERS), "--log-level", "warning"],
+        cwd=BACKEND_DIR, env=env
+    )
+    processes.append(server)
+    failures = []
+
+    try:
+        wait_until_up(base, server)
+        # Let every worker finish startup before the storm
+        time.sleep(2)
+
+        tag = os.urandom(3).hex()
+        registrations = [
+            {"username": f"ham{tag}{i}", "email": f"ham{tag}{i}@school.example", "password": "password1"}
+            for i in range(users)
+            for _ in range(contenders)
+        ]
+        jobs = [("guest", {"name": None}) for _ in range(guests)]
+        jobs += [("register", payload) for payload in registrations]
+        # Interleave guests and registrations
+        random.shuffle(jobs)
+
+        start = time.perf_counter()
+        with ThreadPoolExecutor(THREADS) as pool:
+            results = list(pool.map(lambda job: (job[0], job[1], call(base, "POST", f"/api/auth/{job[0]}", job[1])), jobs))
+        elapsed = time.perf_counter() - start
+        print(f"{len(jobs)} requests against {WORKERS} workers in {elapsed:.1f}s")
+
+        # Guest IDs are distinct
+        guest_ids = [body["user"]["id"] for kind, _, (status, body) in results if kind == "guest" and status == 200]
+        if len(guest_ids) != guests:
+            failures.append(f"only {len(guest_ids)}/{guests} guest sessions succeeded")
+        if len(set(guest_ids)) != len(guest_ids):
+            failures.append(f"{len(guest_ids) - len(set(guest_ids))} duplicate guest IDs")
+        print(f"guests: {len(guest_ids)} created, {len(set(guest_ids))} distinct IDs")
+
+        # Each contested account registered exactly once
+        wins = {}
+        for kind, payload, (status, body) in results:
+            if kind == "register" and status == 200:
+                wins.setdefault(payload["email"], []).append(body["user"]["id"])
+        if len(wins) != users or any(len(ids) != 1 for ids in wins.values()):
+            doubles = sum(len(ids) > 1 for ids in wins.values())
+            failures.append(f"{len(wins)}/{users} accounts registered, {doubles} registered twice")
+        print(f"registrations: {len(wins)} accounts, {sum(len(ids) for ids in wins.values())} "
+              f"successes out of {len(registrations)} attempts")
+
+        # Every account is visible from every worker
+        def check_user(email):
+            for _ in range(20):
+                status, body = call(base, "POST", "/api/auth/login",
+                                    {"email_or_username": email, "password": "password1"})
+                if status != 503:
+                    break
+                # Password pool shed the login; back off as Retry-After asks
+                time.sleep(0.5)
+            if status != 200:
+                return f"login {email} -> {status}"
+            token, user_id = body["access_token"], body["user"]["id"]
+            for _ in range(WORKERS * 2):
+                status, body = call(base, "GET", "/api/auth/me", token=token)
+                if status != 200 or body["id"] != user_id:
+                    return f"token of {email} rejected by a worker ({status})"
+            return None
+
+        def check_guest(body):
+            status, me = call(base, "GET", "/api/auth/me", token=body["access_token"])
+            return None if status == 200 and me["id"] == body["user"]["id"] else f"guest {body['user']['id']} -> {status}"
+
+        guest_bodies = [body for kind, _, (status, body) in results if kind == "guest" and status == 200]
+        with ThreadPoolExecutor(THREADS) as pool:
+            misses = [miss for miss in pool.map(check_user, wins) if miss]
+            guest_misses = [miss for miss in pool.map(check_guest, guest_bodies) if miss]
+        failures.extend((misses + guest_misses)[:10])
+        print(f"cross-worker reads: {len(wins) - len(misses)}/{len(wins)} accounts and "
+              f"{len(guest_bodies) - len(guest_misses)}/{len(guest_bodies)} guests visible everywhere")
+
+        # Logging out on one worker revokes the token on all of them
+        def check_revoked(body):
+            token = body["access_token"]
+            call(base, "GET", "/api/auth/me", token=token)
+            call(base, "POST", "/api/auth/logout", token=token)
+            time.sleep(USER_SYNC_INTERVAL * 2)
+            for _ in range(WORKERS * 2):
+                status, _ = call(base, "GET", "/api/auth/me", token=token)
+                if status != 401:
+                    return f"revoked token of {body['user']['id']} accepted ({status})"
+            return None
+
+        with ThreadPoolExecutor(THREADS) as pool:
+            revoke_misses = [miss for miss in pool.map(check_revoked, guest_bodies[:100]) if miss]
+        failures.extend(revoke_misses[:10])
+        print(f"revocation: {min(100, len(guest_bodies)) - len(revoke_misses)}/{min(100, len(guest_bodies))} "
+              f"logged-out tokens rejected by every worker")
+
+        with ThreadPoolExecutor(THREADS) as pool:
+            pids = {body["pid"] for _, body in pool.map(lambda _: call(base, "GET", "/metrics", token=METRICS_TOKEN), range(200))}
+        print(f"workers answering: {len(pids)}")
+    finally:
+        for process in processes:
+            process.terminate()
+        for process in processes:
+            process.wait()
+
+    # Stored guest counter covers every issued ID (store allocation only)
+    if not id_service:
+        conn = sqlite3.connect(db_path)
+        counter = conn.execute("SELECT value FROM meta WHERE key = 'guest_counter'").fetchone()[0]
+        highest = max((int(guest_id.split("_")[1]) for guest_id in guest_ids), default=0)
+        if counter < highest:
+            failures.append(f"stored guest counter {counter} < highest guest ID {highest}")
+        print(f"stored guest counter: {counter} (highest issued {highest})")
+
+    if failures:
+        print("\nFAILED")
+        for failure in failures:
+            print(f"  - {failure}")
+        sys.exit(1)
+    print("\nOK")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Hammer the auth endpoints across 4 workers")
+    parser.add_argument("--guests", type=int, default=400)
+    parser.add_argument("--users", type=int, default=100, help="accounts to register")
+    parser.add_argument("--contenders", type=int, default=4,
+                        help="concurrent registrations racing for each account")
+    parser.add_argument("--id-service", action="store_true",
+                        help="allocate guest IDs through scripts/id_service.py")
+    args = parser.parse_args()
+    main(args.guests, args.users, args.contenders, args.id_service)
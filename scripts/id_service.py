@@ -0,0 +1,122 @@
+#!/usr/bin/env python3
+"""
+===============================================================
+SoundSteps Guest ID Service (local stand-in)
+===============================================================
+A tiny shared counter service, standing in for whatever a
+multi-node deployment would use (Redis INCR, a database
+sequence, ...). Every node points GUEST_ID_SERVICE_URL at it
+and gets guest numbers that never collide across nodes.
+
+Counters are kept in a SQLite file and incremented inside a
+write transaction, so restarts and concurrent requests are safe.
+
+API:
+    POST /next/<name>?floor=N  -> {"value": n}   (n > N, n > last)
+    GET  /health               -> {"status": "online"}
+
+Usage:
+    python3 scripts/id_service.py [--host 127.0.0.1] [--port 8011]
+                                  [--db backend/data/id_service.db]
+
+Then start the app with:
+    GUEST_ID_SERVICE_URL=http://127.0.0.1:8011
+===============================================================
+"""
+
+import argparse
+import json
+import sqlite3
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from urllib.parse import parse_qs, urlparse
+
+SCRIPT_DIR = Path(__file__).parent
+PROJECT_ROOT = SCRIPT_DIR.parent
+DEFAULT_DB = PROJECT_ROOT / "backend" / "data" / "id_service.db"
+
+
+class Counters:
+    """Named counters persisted in SQLite"""
+
+    def __init__(self, path: str):
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._lock = threading.Lock()
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS counters (name TEXT PRIMARY KEY, value INTEGER NOT NULL)"
+        )
+
+    def next(self, name: str, floor: int = 0) -> int:
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                self._conn.execute(
+                    "INSERT INTO counters (name, value) VALUES (?, ? + 1) "
+                    "ON CONFLICT(name) DO UPDATE SET value = MAX(value, ?) + 1",
+                    (name, floor, floor)
+                )
+                value = self._conn.execute(
+                    "SELECT value FROM counters WHERE name = ?", (name,)
+                ).fetchone()[0]
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+        return value
+
+
+def make_handler(counters: Counters):
+    class Handler(BaseHTTPRequestHandler):
+        def send_json(self, status, payload):
+            body = json.dumps(payload).encode()
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def do_GET(self):
+            if urlparse(self.path).path == "/health":
+                self.send_json(200, {"status": "online"})
+            else:
+                self.send_json(404, {"detail": "Not found"})
+
+        def do_POST(self):
+            url = urlparse(self.path)
+            parts = url.path.strip("/").split("/")
+            if len(parts) != 2 or parts[0] != "next" or not parts[1]:
+                self.send_json(404, {"detail": "Not found"})
+                return
+            try:
+                floor = int(parse_qs(url.query).get("floor", ["0"])[0])
+            except ValueError:
+                self.send_json(400, {"detail": "floor must be an integer"})
+                return
+            self.send_json(200, {"value": counters.next(parts[1], floor)})
+
+        def log_message(self, format, *args):
+            pass
+
+    return Handler
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Shared guest ID counter service")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8011)
+    parser.add_argument("--db", default=str(DEFAULT_DB))
+    args = parser.parse_args()
+
+    Path(args.db).parent.mkdir(parents=True, exist_ok=True)
+    server = ThreadingHTTPServer((args.host, args.port), make_handler(Counters(args.db)))
+    print(f"ID service listening on http://{args.host}:{args.port} ({args.db})")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
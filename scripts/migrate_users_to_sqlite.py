@@ -0,0 +1,53 @@
+#!/usr/bin/env python3
+"""
+===============================================================
+SoundSteps users.json -> SQLite Migrator
+===============================================================
+One-shot copy of every user and the guest counter from the JSON
+user file into the SQLite user store. Re-running replaces the
+database contents, so it is safe to repeat before switching over.
+
+After migrating, start the server with USER_STORE=sqlite.
+
+Usage:
+    python3 scripts/migrate_users_to_sqlite.py [--source PATH] [--target PATH]
+
+Defaults:
+    --source backend/data/users.json
+    --target $USERS_DB_PATH or backend/data/users.db
+===============================================================
+"""
+
+import argparse
+import sys
+from pathlib import Path
+
+SCRIPT_DIR = Path(__file__).parent
+PROJECT_ROOT = SCRIPT_DIR.parent
+BACKEND_DIR = PROJECT_ROOT / "backend"
+
+sys.path.insert(0, str(BACKEND_DIR))
+
+from app.services.user_store import USERS_DB_PATH, SQLiteUserStore, migrate_json_to_sqlite  # noqa: E402
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Migrate users.json into SQLite")
+    parser.add_argument("--source", default=str(BACKEND_DIR / "data" / "users.json"))
+    parser.add_argument("--target", default=USERS_DB_PATH)
+    args = parser.parse_args()
+
+    if not Path(args.source).exists():
+        print(f"Source file not found: {args.source}")
+        sys.exit(1)
+
+    count = migrate_json_to_sqlite(args.source, args.target)
+    stored = SQLiteUserStore(args.target).count()
+    print(f"Migrated {count} users from {args.source} to {args.target}")
+    if stored != count:
+        print(f"Warning: database holds {stored} users, expected {count}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,136 @@
+#!/usr/bin/env python3
+"""
+===============================================================
+SoundSteps Static Precompressor
+===============================================================
+Writes .gz (and .br when brotli is installed) siblings next to
+every compressible file under static/, so the server can pick a
+variant by Accept-Encoding without compressing per request.
+
+Also reports:
+- byte savings per asset and per cached content payload
+- CPU time per request that on-the-fly gzip middleware would
+  spend on each asset, which the precompressed path avoids
+
+Usage:
+    python3 scripts/precompress_static.py [--dry-run] [--quiet]
+
+Output:
+    static/**/*.js.gz, static/**/*.js.br, ...
+===============================================================
+"""
+
+import argparse
+import gzip
+import os
+import sys
+import time
+from pathlib import Path
+
+SCRIPT_DIR = Path(__file__).parent
+PROJECT_ROOT = SCRIPT_DIR.parent
+BACKEND_DIR = PROJECT_ROOT / "backend"
+STATIC_DIR = PROJECT_ROOT / "static"
+
+sys.path.insert(0, str(BACKEND_DIR))
+
+from app.services.compression import (  # noqa: E402
+    COMPRESS_MIN_SIZE,
+    COMPRESSIBLE_EXTENSIONS,
+    ENCODINGS,
+    FILE_SUFFIXES,
+    compress,
+)
+
+# GZipMiddleware's default level, i.e. what per-request compression would cost
+MIDDLEWARE_GZIP_LEVEL = 9
+TIMING_ROUNDS = 20
+
+
+def find_assets():
+    """Yield compressible files under static/ worth compressing"""
+    for path in sorted(STATIC_DIR.rglob("*")):
+        if not path.is_file() or path.suffix.lower() not in COMPRESSIBLE_EXTENSIONS:
+            continue
+        if path.stat().st_size >= COMPRESS_MIN_SIZE:
+            yield path
+
+
+def gzip_cost_ms(data: bytes) -> float:
+    """Average CPU milliseconds to gzip a body the way the middleware would"""
+    start = time.process_time()
+    for _ in range(TIMING_ROUNDS):
+        gzip.compress(data, compresslevel=MIDDLEWARE_GZIP_LEVEL)
+    return (time.process_time() - start) * 1000 / TIMING_ROUNDS
+
+
+def print_row(name, size, variants, cost_ms):
+    best = min(variants.values()) if variants else size
+    cells = " ".join(f"{variants.get(encoding, size):>9,}" for encoding in ENCODINGS)
+    print(f"  {name:<44} {size:>9,} {cells} {100 * (1 - best / size):>6.1f}% {cost_ms:>8.2f}")
+
+
+def print_header(title):
+    encodings = " ".join(f"{encoding:>9}" for encoding in ENCODINGS)
+    print(f"\n{title}")
+    print(f"  {'asset':<44} {'original':>9} {encodings} {'saved':>7} {'gzip ms':>8}")
+
+
+def main(dry_run: bool, quiet: bool):
+    total_original = total_best = 0
+    total_cost_ms = 0.0
+
+    if not quiet:
+        print_header("Static assets")
+    for path in find_assets():
+        data = path.read_bytes()
+        variants = {}
+        for encoding in ENCODINGS:
+            compressed = compress(data, encoding)
+            if len(compressed) >= len(data):
+                continue
+            variants[encoding] = len(compressed)
+            if not dry_run:
+                target = Path(str(path) + FILE_SUFFIXES[encoding])
+                target.write_bytes(compressed)
+                # Keep the sibling no older than its source so it is served
+                st = path.stat()
+                os.utime(target, ns=(st.st_atime_ns, st.st_mtime_ns))
+        if quiet:
+            continue
+        cost_ms = gzip_cost_ms(data)
+        total_original += len(data)
+        total_best += min(variants.values()) if variants else len(data)
+        total_cost_ms += cost_ms
+        print_row(str(path.relative_to(PROJECT_ROOT)), len(data), variants, cost_ms)
+
+    if quiet:
+        return
+
+    from app.services.content import build_catalog
+
+    catalog = build_catalog()
+    print_header("Cached content payloads (compressed once per content version)")
+    prepared = [(f"{name} list", dataset.listing_body) for name, dataset in catalog.datasets.items()]
+    prepared.append(("achievements", catalog.achievements_body))
+    for name, body in prepared:
+        variants = {encoding: len(data) for encoding, (data, _) in body.encoded.items()}
+        cost_ms = gzip_cost_ms(body.body)
+        total_original += len(body.body)
+        total_best += min(variants.values()) if variants else len(body.body)
+        total_cost_ms += cost_ms
+        print_row(name, len(body.body), variants, cost_ms)
+
+    print(f"\nTotal: {total_original:,} -> {total_best:,} bytes "
+          f"({100 * (1 - total_best / total_original):.1f}% saved)")
+    print(f"On-the-fly gzip would spend {total_cost_ms:.2f} ms CPU for one fetch of every "
+          f"asset above, i.e. {total_cost_ms:.0f} s per 1000 full loads; precompressed "
+          f"variants spend none per request.")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Precompress static assets")
+    parser.add_argument("--dry-run", action="store_true", help="report only, write nothing")
+    parser.add_argument("--quiet", action="store_true", help="write variants without a report")
+    args = parser.parse_args()
+    main(args.dry_run, args.quiet)
@@ -0,0 +1,153 @@
+#!/usr/bin/env python3
+"""
+===============================================================
+SoundSteps Guest Day Simulation
+===============================================================
+Replays a day of guest traffic against the auth service on a
+simulated clock and reports what guests cost in memory and in
+users.json, compared with keeping every guest forever in the
+users dict and rewriting users.json on each new guest (the
+behaviour before the guest tier).
+
+Guests arrive evenly over the day; each stays active for a
+session (requests every few minutes) and never returns. Idle
+guests are swept every GUEST_SWEEP_INTERVAL simulated seconds.
+
+Runs on a copy of backend/data/users.json in a temp directory; the real
+file is never touched.
+
+Usage:
+    python3 scripts/simulate_guest_day.py [--guests 100000]
+                                          [--session-minutes 30]
+===============================================================
+"""
+
+import argparse
+import json
+import os
+import shutil
+import sys
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+
+SCRIPT_DIR = Path(__file__).parent
+PROJECT_ROOT = SCRIPT_DIR.parent
+BACKEND_DIR = PROJECT_ROOT / "backend"
+DATA_DIR = BACKEND_DIR / "data"
+
+sys.path.insert(0, str(BACKEND_DIR))
+
+DAY = 24 * 3600
+# Simulated seconds between a guest's requests
+REQUEST_INTERVAL = 300
+
+
+def megabytes(size: float) -> str:
+    for unit in ("B", "KB", "MB", "GB"):
+        if size < 1024 or unit == "GB":
+            return f"{size:,.1f} {unit}"
+        size /= 1024
+
+
+def main(guests: int, session_minutes: float):
+    tmp = tempfile.mkdtemp(prefix="soundsteps-guest-day-")
+    users_file = os.path.join(tmp, "users.json")
+    shutil.copy(DATA_DIR / "users.json", users_file)
+    os.environ.update(USER_STORE="json", USERS_FILE=users_file,
+                      REVOCATION_DB_PATH=os.path.join(tmp, "revoked.db"))
+
+    from app.services import auth, metrics, guests as guest_tier
+    from app.models.user import UserInDB
+
+    clock = [time.time()]
+    auth.guest_tier.clock = lambda: clock[0]
+    store = auth.user_store
+    written = [0, 0]
+    write = store._write
+
+    def counting_write(*args, **kwargs):
+        result = write(*args, **kwargs)
+        written[0] += 1
+        written[1] += os.path.getsize(users_file)
+        return result
+
+    store._write = counting_write
+    start_size = os.path.getsize(users_file)
+    print(f"{guests:,} guests over 24h, {session_minutes:.0f} min sessions, "
+          f"tier size {guest_tier.GUEST_TIER_SIZE:,}, idle TTL {guest_tier.GUEST_IDLE_TTL / 3600:.1f}h, "
+          f"sweep every {guest_tier.GUEST_SWEEP_INTERVAL:.0f}s\n")
+
+    tracemalloc.start()
+    base_memory = tracemalloc.get_traced_memory()[0]
+    session = session_minutes * 60
+    active = []
+    sample = None
+    peak_tier = evicted = purged = created = 0
+    sweep_at = clock[0] + guest_tier.GUEST_SWEEP_INTERVAL
+    day_start = clock[0]
+    # Run until the day's last guest has gone idle and been swept
+    end = day_start + DAY + session + guest_tier.GUEST_IDLE_TTL + 2 * guest_tier.GUEST_SWEEP_INTERVAL
+
+    while clock[0] < end:
+        # New arrivals this tick
+        due = min(guests, int((clock[0] - day_start) / DAY * guests) + 1)
+        while created < due:
+            user = auth.create_guest_user()
+            sample = sample or auth.guest_tier.get(user.id)
+            active.append((user.id, clock[0] + session))
+            created += 1
+        # Guests mid-session make a request
+        active = [(guest_id, leaves) for guest_id, leaves in active if leaves > clock[0]]
+        for guest_id, _ in active:
+            auth.get_user_by_id(guest_id)
+        peak_tier = max(peak_tier, len(auth.guest_tier))
+        if clock[0] >= sweep_at:
+            result = auth.sweep_guests(now=clock[0])
+            evicted += result["evicted"]
+            purged += result["purged"]
+            sweep_at += guest_tier.GUEST_SWEEP_INTERVAL
+        clock[0] += REQUEST_INTERVAL
+
+    tier_peak_memory = tracemalloc.get_traced_memory()[1] - base_memory
+    tracemalloc.stop()
+
+    # Baseline: every guest of the day kept as a UserInDB in one dict
+    tracemalloc.start()
+    base = tracemalloc.get_traced_memory()[0]
+    kept = {}
+    for number in range(guests):
+        guest_id = f"guest_{number:05d}"
+        kept[guest_id] = UserInDB(**dict(sample.to_dict(), id=guest_id, is_guest=True,
+                                         email=f"{guest_id}@guest.soundsteps.app"))
+    baseline_memory = tracemalloc.get_traced_memory()[0] - base
+    tracemalloc.stop()
+    # Bytes one guest adds to users.json, in the store's own format
+    guest_json = (len(json.dumps({"users": {guest_id: kept[guest_id].model_dump()}}, indent=2))
+                  - len(json.dumps({"users": {}}, indent=2)))
+    baseline_file = start_size + guests * guest_json
+    # One full rewrite per new guest, the file growing by one guest each time
+    baseline_written = guests * start_size + guest_json * guests * (guests + 1) // 2
+    del kept
+
+    final_size = os.path.getsize(users_file)
+    print(f"{'':<28} {'guest tier':>14} {'keep all':>14}")
+    print(f"{'guests in memory (peak)':<28} {peak_tier:>14,} {guests:>14,}")
+    print(f"{'guest memory (peak)':<28} {megabytes(tier_peak_memory):>14} {megabytes(baseline_memory):>14}")
+    print(f"{'users.json at end of day':<28} {megabytes(final_size):>14} {megabytes(baseline_file):>14}")
+    print(f"{'users.json rewrites':<28} {written[0]:>14,} {guests:>14,}")
+    print(f"{'bytes written':<28} {megabytes(written[1]):>14} {megabytes(baseline_written):>14}")
+    overflow = metrics.snapshot()["counters"].get("guests_evicted_overflow", 0)
+    print(f"\nguests evicted from memory: {evicted:,} idle, {overflow:,} to stay within the tier size")
+    print(f"guests from before the tier purged from users.json: {purged:,}")
+    print(f"users.json at start: {megabytes(start_size)}")
+    shutil.rmtree(tmp, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Guest memory and users.json size over a simulated day")
+    parser.add_argument("--guests", type=int, default=100000)
+    parser.add_argument("--session-minutes", type=float, default=30)
+    args = parser.parse_args()
+    main(args.guests, args.session_minutes)
@@ -0,0 +1,291 @@
+#!/usr/bin/env python3
+"""
+===============================================================
+SoundSteps Push Stream Stress Test
+===============================================================
+Starts the API with uvicorn workers (4) on throwaway databases,
+opens many idle event streams (/api/push/stream) from guests
+(PUSH_MAX_STREAMS_PER_USER each, spread over the workers) and
+checks that:
+
+- every stream opened and got the retry hint
+- every stream got a heartbeat while idle
+- progress recorded on one worker reaches the learner's streams
+  on every worker (latency from sync to the last stream)
+
+and reports the memory (RSS) of each worker before and after the
+streams opened. Opening more than ~10,000 streams needs a higher
+open files limit (ulimit -n) for this script; --workers 1 puts
+them all on one worker (PUSH_MAX_STREAMS, 10,000 by default).
+
+Usage:
+    python3 scripts/stress_push_streams.py [--streams 10000]
+                                           [--workers 4] [--senders 20]
+                                           [--heartbeat 5]
+===============================================================
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import resource
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+import uuid
+from pathlib import Path
+from urllib.error import HTTPError, URLError
+from urllib.request import Request, urlopen
+
+SCRIPT_DIR = Path(__file__).parent
+PROJECT_ROOT = SCRIPT_DIR.parent
+BACKEND_DIR = PROJECT_ROOT / "backend"
+
+# Streams per guest (the server's PUSH_MAX_STREAMS_PER_USER)
+PER_USER = 5
+CONNECT_CONCURRENCY = 200
+LEADERBOARD_INTERVAL = 2
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def call(base, method, path, payload=None, token=None):
+    """Send one request on a fresh connection; return (status, JSON body)"""
+    headers = {"Content-Type": "application/json"}
+    if token:
+        headers["Authorization"] = f"Bearer {token}"
+    data = json.dumps(payload).encode() if payload is not None else None
+    request = Request(base + path, data=data, headers=headers, method=method)
+    try:
+        with urlopen(request, timeout=30) as response:
+            return response.status, json.load(response)
+    except HTTPError as e:
+        return e.code, json.load(e)
+
+
+def wait_until_up(url, process, timeout=30):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        if process.poll() is not None:
+            sys.exit(f"{url} exited during startup")
+        try:
+            with urlopen(url + "/health", timeout=1):
+                return
+        except (URLError, ConnectionError):
+            time.sleep(0.2)
+    sys.exit(f"{url} did not come up")
+
+
+def worker_rss(server_pid: int):
+    """
+    RSS in MB of each uvicorn worker (children of the server process, or
+    the server itself when it runs one worker)
+    """
+    children = []
+    for task in Path(f"/proc/{server_pid}/task").iterdir():
+        children += (task / "children").read_text().split()
+    children = [pid for pid in children if b"resource_tracker" not in Path(f"/proc/{pid}/cmdline").read_bytes()]
+    if not children:
+        children = [server_pid]
+    sizes = []
+    for pid in children:
+        try:
+            status = Path(f"/proc/{pid}/status").read_text()
+        except FileNotFoundError:
+            continue
+        for line in status.splitlines():
+            if line.startswith("VmRSS:"):
+                sizes.append(int(line.split()[1]) / 1024)
+    return sizes
+
+
+class Listener:
+    """One idle event stream, counting heartbeats and progress events"""
+
+    def __init__(self, user_id, token):
+        self.user_id = user_id
+        self.token = token
+        self.opened = False
+        self.retry_hint = False
+        self.pings = 0
+        self.progress = []
+        self.writer = None
+
+    async def run(self, port, opened: asyncio.Semaphore):
+        reader, self.writer = await asyncio.open_connection("127.0.0.1", port)
+        self.writer.write(
+            f"GET /api/push/stream HTTP/1.1\r\nHost: 127.0.0.1\r\n"
+            f"Authorization: Bearer {self.token}\r\nAccept: text/event-stream\r\n\r\n".encode()
+        )
+        await self.writer.drain()
+        status = await reader.readline()
+        while (await reader.readline()) not in (b"\r\n", b""):
+            pass
+        opened.release()
+        if b" 200 " not in status:
+            return
+        self.opened = True
+        event = None
+        while True:
+            line = await reader.readline()
+            if not line:
+                return
+            # Chunk size lines of the chunked body match nothing below
+            line = line.rstrip(b"\r\n")
+            if line.startswith(b"retry:"):
+                self.retry_hint = True
+            elif line == b": ping":
+                self.pings += 1
+            elif line.startswith(b"event: "):
+                event = line[7:]
+            elif line.startswith(b"data: ") and event == b"progress":
+                self.progress.append((time.perf_counter(), json.loads(line[6:])))
+
+    def close(self):
+        if self.writer is not None:
+            self.writer.close()
+
+
+async def stress(base, port, server_pid, streams, senders, heartbeat):
+    users = (streams + PER_USER - 1) // PER_USER
+    start = time.perf_counter()
+    loop = asyncio.get_running_loop()
+    guests = await asyncio.gather(*(
+        loop.run_in_executor(None, call, base, "POST", "/api/auth/guest", {"name": None})
+        for _ in range(users)
+    ))
+    tokens = [(body["user"]["id"], body["access_token"]) for status, body in guests if status == 200]
+    if len(tokens) != users:
+        sys.exit(f"only {len(tokens)}/{users} guests created")
+    print(f"guests:     {users:,} created in {time.perf_counter() - start:.1f}s")
+
+    before = worker_rss(server_pid)
+    listeners = [Listener(user_id, token) for user_id, token in tokens for _ in range(PER_USER)][:streams]
+    opened = asyncio.Semaphore(CONNECT_CONCURRENCY)
+
+    async def open_one(listener):
+        await opened.acquire()
+        await listener.run(port, opened)
+
+    start = time.perf_counter()
+    tasks = [asyncio.create_task(open_one(listener)) for listener in listeners]
+    while sum(listener.opened for listener in listeners) < streams:
+        failed = [task for task in tasks if task.done()]
+        if failed:
+            error = failed[0].exception()
+            sys.exit(f"a stream ended early: {error or 'rejected'}")
+        await asyncio.sleep(0.2)
+    print(f"streams:    {streams:,} open in {time.perf_counter() - start:.1f}s")
+    await asyncio.sleep(1)
+    after = worker_rss(server_pid)
+    print("worker RSS: " + ", ".join(f"{b:.0f} -> {a:.0f} MB" for b, a in zip(before, after)))
+    print(f"            {(sum(after) - sum(before)) * 1024 / streams:.1f} KB per stream")
+
+    # Let every stream sit idle past a heartbeat (the standings sent
+    # after opening, within PUSH_LEADERBOARD_INTERVAL, restart the wait)
+    await asyncio.sleep(LEADERBOARD_INTERVAL + heartbeat * 1.5)
+    failures = []
+    hintless = sum(1 for listener in listeners if not listener.retry_hint)
+    if hintless:
+        failures.append(f"{hintless} streams got no retry hint")
+    quiet = sum(1 for listener in listeners if listener.pings == 0)
+    if quiet:
+        failures.append(f"{quiet} streams got no heartbeat")
+    print(f"heartbeats: {sum(listener.pings for listener in listeners):,} "
+          f"({quiet} streams without one)")
+
+    # Progress recorded by whichever worker takes the sync must reach
+    # the learner's streams on every worker
+    by_user = {}
+    for listener in listeners:
+        by_user.setdefault(listener.user_id, []).append(listener)
+    chosen = [(user_id, token) for user_id, token in tokens if len(by_user[user_id]) == PER_USER][:senders]
+    sent = {}
+    for user_id, token in chosen:
+        sent[user_id] = time.perf_counter()
+        status, body = await loop.run_in_executor(None, lambda token=token: call(
+            base, "POST", "/api/progress/sync",
+            {"events": [{"type": "module_complete", "module": "pairs", "key": uuid.uuid4().hex}]}, token
+        ))
+        if status != 200:
+            failures.append(f"sync for {user_id} -> {status}")
+    await asyncio.sleep(3)
+    latencies = []
+    for user_id in sent:
+        arrivals = [listener.progress[0][0] for listener in by_user[user_id] if listener.progress]
+        if len(arrivals) != PER_USER:
+            failures.append(f"{user_id}: progress reached {len(arrivals)}/{PER_USER} streams")
+        elif arrivals:
+            latencies.append(max(arrivals) - sent[user_id])
+    others = sum(1 for listener in listeners if listener.user_id not in sent and listener.progress)
+    if others:
+        failures.append(f"{others} streams got another learner's progress")
+    if latencies:
+        latencies.sort()
+        print(f"delivery:   {len(latencies)}/{len(sent)} learners, to all {PER_USER} streams in "
+              f"p50 {latencies[len(latencies) // 2] * 1000:.0f} ms, max {latencies[-1] * 1000:.0f} ms")
+
+    for listener in listeners:
+        listener.close()
+    for task in tasks:
+        task.cancel()
+    await asyncio.gather(*tasks, return_exceptions=True)
+    return failures
+
+
+def main(streams, workers, senders, heartbeat):
+    soft, hard = resource.getrlimit(resource.RLIMIT_NOFILE)
+    resource.setrlimit(resource.RLIMIT_NOFILE, (hard, hard))
+    if hard < streams + 100:
+        sys.exit(f"open files limit {hard} is too low for {streams} streams")
+
+    tmp = tempfile.mkdtemp(prefix="soundsteps-push-")
+    env = dict(
+        os.environ, USER_STORE="sqlite",
+        USERS_DB_PATH=os.path.join(tmp, "users.db"),
+        PROGRESS_DB_PATH=os.path.join(tmp, "progress.db"),
+        REVOCATION_DB_PATH=os.path.join(tmp, "revoked.db"),
+        PUSH_HEARTBEAT=str(heartbeat),
+        PUSH_MAX_STREAMS_PER_USER=str(PER_USER),
+        PUSH_LEADERBOARD_INTERVAL=str(LEADERBOARD_INTERVAL),
+        GUEST_TIER_SIZE=str(max(20000, streams)),
+    )
+    port = free_port()
+    base = f"http://127.0.0.1:{port}"
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "app.main:app", "--host", "127.0.0.1",
+         "--port", str(port), "--workers", str(workers), "--log-level", "warning",
+         "--backlog", "4096", "--timeout-graceful-shutdown", "2"],
+        cwd=BACKEND_DIR, env=env
+    )
+    try:
+        wait_until_up(base, server)
+        time.sleep(2)
+        failures = asyncio.run(stress(base, port, server.pid, streams, senders, heartbeat))
+    finally:
+        server.terminate()
+        server.wait(timeout=30)
+
+    if failures:
+        print("\nFAILED:")
+        for failure in failures[:20]:
+            print(f"  {failure}")
+        sys.exit(1)
+    print("\nOK")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Many idle event streams across workers")
+    parser.add_argument("--streams", type=int, default=10000)
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--senders", type=int, default=20)
+    parser.add_argument("--heartbeat", type=float, default=5)
+    args = parser.parse_args()
+    main(args.streams, args.workers, args.senders, args.heartbeat)
@@ -0,0 +1,200 @@
+#!/usr/bin/env python3
+"""
+===============================================================
+SoundSteps Concurrent User Update Stress Test
+===============================================================
+Fires thousands of progress updates at a few hundred users from
+many threads (as FastAPI's threadpool does), while other threads
+keep creating guests, taking full snapshots (save_users) and
+reading users back as API models. Then checks:
+
+- no thread raised (e.g. "dictionary changed size during
+  iteration" from a snapshot racing an insert)
+- every read saw a whole update: each update sets several
+  progress fields from one number, so a record caught half
+  updated shows fields that disagree
+- after closing the store, a fresh load from disk matches
+  memory for every persisted user
+
+Each store runs in its own process on throwaway files.
+
+Usage:
+    python3 scripts/stress_user_updates.py [--store all] [--users 200]
+                                           [--updates 5000] [--threads 32]
+                                           [--stripes 64]
+===============================================================
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+SCRIPT_DIR = Path(__file__).parent
+PROJECT_ROOT = SCRIPT_DIR.parent
+BACKEND_DIR = PROJECT_ROOT / "backend"
+
+sys.path.insert(0, str(BACKEND_DIR))
+
+STORES = ("json", "journal", "sqlite")
+FLASHCARDS = 26
+
+
+def update_for(k: int) -> dict:
+    """A progress update whose fields all derive from k"""
+    return {
+        "games_completed": k,
+        "soundout_completed": k,
+        "total_time_spent": k,
+        "flashcards_completed": sorted({k % FLASHCARDS, (k + 1) % FLASHCARDS}),
+    }
+
+
+def torn(progress: dict) -> bool:
+    """True if progress mixes fields of different updates"""
+    k = progress["games_completed"]
+    if k == 0 and not progress["flashcards_completed"]:
+        return progress["soundout_completed"] != 0 or progress["total_time_spent"] != 0
+    return (progress["soundout_completed"] != k or progress["total_time_spent"] != k
+            or progress["flashcards_completed"] != update_for(k)["flashcards_completed"])
+
+
+def run(store: str, users: int, updates: int, threads: int) -> dict:
+    """Stress one store in this process; return counts and failures"""
+    from app.models.user import User, UserCreate
+    from app.services import auth
+    from app.services.user_store import create_user_store
+
+    # Half registered, half guests
+    async def register():
+        ids = []
+        for i in range(users // 2):
+            user = await auth.register_user(UserCreate(
+                username=f"stress{i}", email=f"stress{i}@school.example", password="password1"))
+            ids.append(user.id)
+        return ids
+
+    user_ids = asyncio.run(register())
+    user_ids += [auth.create_guest_user().id for _ in range(users - len(user_ids))]
+
+    failures = []
+    counts = {"reads": 0, "snapshots": 0}
+    done = threading.Event()
+
+    def guard(func):
+        def wrapped(*args):
+            try:
+                return func(*args)
+            except Exception as e:
+                failures.append(f"{func.__name__}: {type(e).__name__}: {e}")
+        return wrapped
+
+    @guard
+    def update(k):
+        assert auth.update_user_progress(user_ids[k % len(user_ids)], update_for(k))
+
+    @guard
+    def churn():
+        # Inserts while snapshots iterate
+        while not done.is_set():
+            auth.create_guest_user()
+            time.sleep(0.001)
+
+    @guard
+    def snapshot():
+        while not done.is_set():
+            auth.save_users()
+            counts["snapshots"] += 1
+            time.sleep(0.01)
+
+    @guard
+    def read():
+        while not done.is_set():
+            for user_id in user_ids:
+                user = auth.get_user_by_id(user_id)
+                if user is not None and torn(user.to_model(User).progress):
+                    failures.append(f"torn read of {user_id}")
+                counts["reads"] += 1
+
+    background = [threading.Thread(target=target) for target in (churn, snapshot, read, read)]
+    for thread in background:
+        thread.start()
+    start = time.perf_counter()
+    with ThreadPoolExecutor(threads) as pool:
+        list(pool.map(update, range(1, updates + 1)))
+    elapsed = time.perf_counter() - start
+    done.set()
+    for thread in background:
+        thread.join()
+
+    # What reached disk matches memory
+    expected = {}
+    for user_id in user_ids:
+        user = auth.get_user_by_id(user_id)
+        if user is not None and (not user.is_guest or auth.user_store.persists_guests):
+            expected[user_id] = user.to_dict()["progress"]
+    auth.user_store.close()
+    stored, _ = create_user_store(json_path=auth.USERS_FILE).load()
+    mismatched = [user_id for user_id, progress in expected.items()
+                  if user_id not in stored or stored[user_id].progress != progress]
+    failures.extend(f"stored progress of {user_id} differs from memory" for user_id in mismatched[:10])
+    failures.extend(f"torn stored record {user_id}" for user_id, user in stored.items() if torn(user.progress))
+
+    return {
+        "updates_per_s": updates / elapsed,
+        "reads": counts["reads"],
+        "snapshots": counts["snapshots"],
+        "persisted_checked": len(expected),
+        "failures": failures[:20],
+        "failure_count": len(failures),
+    }
+
+
+def main(stores, users: int, updates: int, threads: int, stripes: int):
+    print(f"{updates:,} progress updates over {users} users from {threads} threads, "
+          f"{stripes} lock stripes; guests created, snapshots and reads running alongside\n")
+    print(f"{'store':<8} {'updates/s':>10} {'reads':>9} {'snapshots':>10} {'persisted':>10}  result")
+    failed = False
+    for store in stores:
+        tmp = tempfile.mkdtemp(prefix="soundsteps-stress-")
+        env = dict(os.environ, USER_STORE=store, USER_LOCK_STRIPES=str(stripes), BCRYPT_ROUNDS="4",
+                   USERS_FILE=os.path.join(tmp, "users.json"), USERS_DB_PATH=os.path.join(tmp, "users.db"),
+                   REVOCATION_DB_PATH=os.path.join(tmp, "revoked.db"),
+                   PROGRESS_DB_PATH=os.path.join(tmp, "progress.db"), JOURNAL_FLUSH_INTERVAL="0.05",
+                   CONTENT_RELOAD_INTERVAL="0")
+        output = subprocess.run(
+            [sys.executable, __file__, "--run", store, "--users", str(users),
+             "--updates", str(updates), "--threads", str(threads)],
+            env=env, check=True, capture_output=True, text=True
+        ).stdout
+        result = json.loads(output.strip().splitlines()[-1])
+        ok = result["failure_count"] == 0
+        failed = failed or not ok
+        print(f"{store:<8} {result['updates_per_s']:>10,.0f} {result['reads']:>9,} {result['snapshots']:>10,} "
+              f"{result['persisted_checked']:>10,}  {'OK' if ok else 'FAILED'}")
+        for failure in result["failures"]:
+            print(f"    - {failure}")
+    if failed:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Concurrent user progress updates against each store")
+    parser.add_argument("--store", choices=STORES + ("all",), default="all")
+    parser.add_argument("--users", type=int, default=200)
+    parser.add_argument("--updates", type=int, default=5000)
+    parser.add_argument("--threads", type=int, default=32)
+    parser.add_argument("--stripes", type=int, default=64, help="USER_LOCK_STRIPES for the run")
+    parser.add_argument("--run", choices=STORES, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    if args.run:
+        print(json.dumps(run(args.run, args.users, args.updates, args.threads)))
+    else:
+        main(STORES if args.store == "all" else (args.store,), args.users, args.updates, args.threads, args.stripes)
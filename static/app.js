@@ -143,7 +143,25 @@
   // Expose showScreen globally for progressManager
   window.showScreen = showScreen;
 
+  // Content endpoints answered from the /api/bootstrap payload
+  const BOOTSTRAP_MODULES = {
+    "/cards": "flashcards",
+    "/soundout": "soundout",
+    "/game/hungry-monster": "hungry_monster",
+    "/game/minimal-pairs": "minimal_pairs",
+    "/mouth-moves": "mouth_moves",
+    "/homophone-quiz": "homophone_quiz",
+  };
+
   async function apiCall(endpoint, options = {}) {
+    const bootstrapModule = BOOTSTRAP_MODULES[endpoint];
+    if (bootstrapModule && !options.method && window.contentBootstrap) {
+      const bootstrap = await window.contentBootstrap;
+      if (bootstrap && bootstrap[bootstrapModule]) {
+        return bootstrap[bootstrapModule];
+      }
+    }
+
     try {
       const response = await fetch(`${API_BASE}${endpoint}`, {
         headers: {
@@ -263,54 +281,92 @@
     }, 30);
   }
 
+  // Other learners' usernames come from the server
+  function escapeHtml(text) {
+    const div = document.createElement("div");
+    div.textContent = String(text);
+    return div.innerHTML;
+  }
+
   async function updateLeaderboardPreview() {
     const leaderboardContainer = document.getElementById("leaderboardPreview");
     if (!leaderboardContainer || !window.leaderboardService) return;
 
     try {
-      const leaderboard = await window.leaderboardService.getTop(5);
-      const currentUser =
-        state.userName || localStorage.getItem("guestName") || "Guest";
-
-      if (leaderboard && leaderboard.length > 0) {
-        leaderboardContainer.innerHTML = leaderboard
-          .map((entry, index) => {
-            const rankClass =
-              index === 0
-                ? "gold"
-                : index === 1
-                  ? "silver"
-                  : index === 2
-                    ? "bronze"
-                    : "";
-            const isCurrentUser = entry.name === currentUser;
-            return `
+      renderLeaderboardPreview(await window.leaderboardService.getTop(5));
+    } catch (error) {
+      console.error("Failed to load leaderboard:", error);
+      leaderboardContainer.innerHTML =
+        '<p style="color: #666; text-align: center;">Leaderboard loading...</p>';
+    }
+  }
+
+  function renderLeaderboardPreview(leaderboard) {
+    const leaderboardContainer = document.getElementById("leaderboardPreview");
+    if (!leaderboardContainer) return;
+    const currentUser =
+      state.userName || localStorage.getItem("guestName") || "Guest";
+
+    if (leaderboard && leaderboard.length > 0) {
+      leaderboardContainer.innerHTML = leaderboard
+        .map((entry, index) => {
+          const rankClass =
+            index === 0
+              ? "gold"
+              : index === 1
+                ? "silver"
+                : index === 2
+                  ? "bronze"
+                  : "";
+          const isCurrentUser = entry.isMe || entry.name === currentUser;
+          return `
                         <div class="leaderboard-item ${isCurrentUser ? "current-user" : ""}">
-                            <span class="leaderboard-rank ${rankClass}">${index + 1}</span>
-                            <span class="leaderboard-name">${entry.name}</span>
+                            <span class="leaderboard-rank ${rankClass}">${entry.rank || index + 1}</span>
+                            <span class="leaderboard-name">${escapeHtml(entry.name)}</span>
                             <span class="leaderboard-score">${entry.score} pts</span>
                         </div>
                     `;
-          })
-          .join("");
-
-        // Update user rank
-        const userRankEl = document.getElementById("userRank");
-        const userRank = leaderboard.findIndex((e) => e.name === currentUser);
-        if (userRankEl) {
-          userRankEl.textContent = userRank >= 0 ? `#${userRank + 1}` : "-";
-        }
-      } else {
-        leaderboardContainer.innerHTML =
-          '<p style="color: #666; text-align: center;">No scores yet. Start learning!</p>';
-      }
-    } catch (error) {
-      console.error("Failed to load leaderboard:", error);
+        })
+        .join("");
+
+      // The server ranks everyone, not just the page shown
+      const userRank =
+        (window.leaderboardService && window.leaderboardService.myRank) ||
+        leaderboard.findIndex((e) => e.name === currentUser) + 1;
+      showUserRank(userRank);
+    } else {
       leaderboardContainer.innerHTML =
-        '<p style="color: #666; text-align: center;">Leaderboard loading...</p>';
+        '<p style="color: #666; text-align: center;">No scores yet. Start learning!</p>';
+    }
+  }
+
+  function showUserRank(userRank) {
+    const userRankEl = document.getElementById("userRank");
+    if (userRankEl) {
+      userRankEl.textContent = userRank > 0 ? `#${userRank}` : "-";
     }
   }
 
+  // Standings pushed by the server as they change
+  window.addEventListener("pushLeaderboard", (event) => {
+    renderLeaderboardPreview(
+      event.detail.entries.map((entry) => ({
+        rank: entry.rank,
+        name: entry.username,
+        score: entry.xp,
+        totalScore: entry.xp,
+        isMe: entry.is_me,
+      })),
+    );
+  });
+
+  window.addEventListener("pushStanding", (event) => {
+    if (window.leaderboardService) {
+      window.leaderboardService.myRank = event.detail.rank;
+    }
+    showUserRank(event.detail.rank);
+  });
+
   function updateSkillsBadges(progressData) {
     const skillsGrid = document.getElementById("skillsGrid");
     if (!skillsGrid) return;
@@ -536,6 +592,10 @@
     elements.cardImage.alt = card.word;
     elements.wordLabel.textContent = card.word;
 
+    if (window.progressTracker) {
+      window.progressTracker.queueEvent("card_view", "flashcards", { item_id: card.id });
+    }
+
     // Update progress
     elements.cardIndex.textContent = `${state.currentCardIndex + 1} / ${state.flashcards.length}`;
     updateProgress();
@@ -643,6 +703,10 @@
     elements.soundoutImage.src = word.image;
     elements.soundoutImage.alt = word.word;
 
+    if (window.progressTracker) {
+      window.progressTracker.queueEvent("card_view", "soundItOut", { item_id: word.id });
+    }
+
     // Update phonemes with clickable letter sounds
     elements.phonemeDisplay.innerHTML = "";
     word.phonemes.forEach((phoneme, index) => {
@@ -995,6 +1059,7 @@
         window.progressTracker.recordActivity("soundItOut", "pronunciation", {
           correct: true,
           word: targetWord,
+          itemId: word.id,
           points: 15,
         });
       }
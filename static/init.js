@@ -62,6 +62,12 @@
                 console.log('[init.js] Leaderboard service initialized');
             }
             
+            // Follow the server's live XP, unlock and standings events
+            if (typeof PushService !== 'undefined') {
+                window.pushService = window.pushService || new PushService();
+                window.pushService.start();
+            }
+            
             // Listen for achievement events
             window.addEventListener('achievementUnlocked', (e) => {
                 if (window.feedbackService) {
@@ -92,6 +98,9 @@
             const confirmLogout = confirm('Are you sure you want to logout?');
             if (!confirmLogout) return;
             
+            if (window.pushService) {
+                window.pushService.stop();
+            }
             await authService.logout();
             
             // Clear app state
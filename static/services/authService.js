@@ -121,14 +121,18 @@
         }
 
         /**
-         * Register a new user
+         * Register a new user (a guest keeps their progress via /upgrade)
          */
         async register(username, email, password) {
             try {
-                const result = await this.apiCall('/register', {
+                const request = {
                     method: 'POST',
                     body: JSON.stringify({ username, email, password })
-                });
+                };
+                // An expired guest session cannot be upgraded; register afresh
+                const result = this.isGuest()
+                    ? await this.apiCall('/upgrade', request).catch(() => this.apiCall('/register', request))
+                    : await this.apiCall('/register', request);
 
                 this.token = result.access_token;
                 this.currentUser = result.user;
@@ -6,10 +6,14 @@
 (function (window) {
   "use strict";
 
+  const LEADERBOARD_ENDPOINT = "/api/leaderboard/";
+
   class LeaderboardService {
     constructor() {
       this.storageKey = "globalLeaderboard";
       this.data = null;
+      // The signed-in learner's rank from the last server page
+      this.myRank = null;
       this.loadLeaderboard();
     }
 
@@ -127,9 +131,32 @@
     }
 
     /**
-     * Get top N users
+     * Get top N users: the server's standings when signed in, the local
+     * board otherwise (or when the server can't be reached)
      */
-    getTop(n = 10) {
+    async getTop(n = 10, scope = "global", period = "all") {
+      this.myRank = null;
+      if (window.authService && window.authService.isAuthenticated()) {
+        try {
+          const params = new URLSearchParams({ scope, period, limit: n });
+          const response = await fetch(`${LEADERBOARD_ENDPOINT}?${params}`, {
+            headers: window.authService.getAuthHeaders(),
+          });
+          if (response.ok) {
+            const page = await response.json();
+            this.myRank = page.me.rank;
+            return page.entries.map((entry) => ({
+              rank: entry.rank,
+              name: entry.username,
+              score: entry.xp,
+              totalScore: entry.xp,
+              isMe: entry.is_me,
+            }));
+          }
+        } catch (error) {
+          console.warn("Leaderboard unavailable, showing local scores:", error);
+        }
+      }
       return this.data.leaderboard.slice(0, n);
     }
 
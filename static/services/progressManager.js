@@ -6,14 +6,109 @@
 (function () {
   "use strict";
 
+  // All lesson content in one round trip; app.js reads its modules from here too
+  window.contentBootstrap =
+    window.contentBootstrap ||
+    fetch("/api/bootstrap")
+      .then((response) => (response.ok ? response.json() : null))
+      .catch(() => null);
+
   class ProgressManager {
     constructor() {
       this.achievements = null;
       this.xpPerLevel = 500;
       this.loadAchievements();
+      // The server's totals are authoritative once a sync answers
+      window.addEventListener("serverProgressUpdate", (event) =>
+        this.applyServerProgress(event.detail),
+      );
+      // Changes recorded elsewhere (another tab or device) arrive pushed
+      window.addEventListener("pushProgress", (event) =>
+        this.applyPushedProgress(event.detail),
+      );
+      window.addEventListener("pushAchievement", (event) =>
+        this.applyPushedAchievement(event.detail),
+      );
+    }
+
+    // Replace local XP, level and achievements with the server's
+    applyServerProgress(result) {
+      const state = result && result.state;
+      if (!state) return;
+
+      const user = this.getCurrentUser();
+      user.totalXP = state.xp;
+      user.level = state.level;
+      user.achievements = (state.achievements || []).map((achievement) => ({
+        id: achievement.id,
+        name: achievement.name,
+        description: achievement.description,
+        icon: achievement.icon,
+        unlockedAt: new Date(achievement.unlocked_at * 1000).toISOString(),
+      }));
+      if (!user.completedModules) user.completedModules = [];
+      Object.entries(state.modules || {}).forEach(([module, stats]) => {
+        if (stats.completions > 0 && !user.completedModules.includes(module)) {
+          user.completedModules.push(module);
+        }
+      });
+      this.saveUserProgress(user);
+
+      // Module achievements were celebrated on completion; streaks were not
+      (result.unlocked || [])
+        .filter((achievement) => achievement.kind === "streak")
+        .forEach((achievement) => {
+          if (window.feedbackService) {
+            window.feedbackService.showToast(
+              `${achievement.icon} ${achievement.name} +${achievement.xp} XP`,
+              "success",
+              3000,
+            );
+          }
+        });
+      this.updateDashboardStats();
+    }
+
+    applyPushedProgress(progress) {
+      const user = this.getCurrentUser();
+      if (user.totalXP === progress.xp && user.level === progress.level) return;
+      user.totalXP = progress.xp;
+      user.level = progress.level;
+      this.saveUserProgress(user);
+      this.updateDashboardStats();
+    }
+
+    // Celebrate only unlocks this tab has not already shown
+    applyPushedAchievement(achievement) {
+      const user = this.getCurrentUser();
+      if (!user.achievements) user.achievements = [];
+      if (user.achievements.some((known) => known.id === achievement.id)) return;
+      user.achievements.push({
+        id: achievement.id,
+        name: achievement.name,
+        description: achievement.description,
+        icon: achievement.icon,
+        unlockedAt: new Date(achievement.unlocked_at * 1000).toISOString(),
+      });
+      this.saveUserProgress(user);
+      if (window.feedbackService) {
+        window.feedbackService.showToast(
+          `${achievement.icon} ${achievement.name}` + (achievement.xp ? ` +${achievement.xp} XP` : ""),
+          "success",
+          3000,
+        );
+      }
+      this.updateDashboardStats();
     }
 
     async loadAchievements() {
+      const bootstrap = await window.contentBootstrap;
+      if (bootstrap && bootstrap.achievements) {
+        this.achievements = bootstrap.achievements;
+        this.xpPerLevel = this.achievements.xpPerLevel || 500;
+        return;
+      }
+
       try {
         const response = await fetch("/api/achievements");
         if (response.ok) {
@@ -74,6 +169,10 @@
       }
 
       console.log("Module data found:", moduleData);
+      // The server awards its own XP, also once per day
+      if (window.progressTracker) {
+        window.progressTracker.queueEvent("module_complete", moduleName);
+      }
       const user = this.getCurrentUser();
       console.log("Current user:", user);
 
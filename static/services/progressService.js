@@ -6,12 +6,48 @@
 (function(window) {
     'use strict';
 
+    const SYNC_ENDPOINT = '/api/progress/sync';
+    // Most events per sync request; a request sent while the page unloads
+    // (keepalive) must stay under the browser's 64 KB body limit
+    const MAX_EVENT_BATCH = 500;
+    const MAX_KEEPALIVE_BATCH = 200;
+    // Longest gap between events counted as time spent (seconds)
+    const MAX_EVENT_GAP = 60;
+
+    // Tracker module names -> module keys of the achievements config
+    const SERVER_MODULES = {
+        soundItOut: 'soundout',
+        hungryMonster: 'monster',
+        minimalPairs: 'pairs'
+    };
+
     class ProgressTracker {
         constructor(userId) {
             this.userId = userId || 'guest';
             this.storageKey = `userProgress_${this.userId}`;
             this.data = null;
+            // Events not yet acknowledged by the server survive reloads and
+            // offline spells; the cursor marks the last state received
+            this.queueKey = `progressQueue_${this.userId}`;
+            this.cursorKey = `progressCursor_${this.userId}`;
+            try {
+                this.pendingEvents = JSON.parse(localStorage.getItem(this.queueKey)) || [];
+            } catch (error) {
+                this.pendingEvents = [];
+            }
+            this.syncing = false;
+            this.lastEvent = null;
             this.loadProgress();
+
+            // Sync once per session rather than per tap: when a module is
+            // finished, when the page is hidden or closed, and when the
+            // connection comes back
+            document.addEventListener('visibilitychange', () => {
+                if (document.visibilityState === 'hidden') this.syncEvents(true);
+            });
+            window.addEventListener('pagehide', () => this.syncEvents(true));
+            window.addEventListener('online', () => this.syncEvents());
+            if (this.pendingEvents.length > 0) this.syncEvents();
         }
 
         /**
@@ -157,6 +193,13 @@
                     break;
             }
 
+            if (typeof result.correct === 'boolean') {
+                // An item ID lets the server schedule the item for review
+                const details = { correct: result.correct };
+                if (result.itemId !== undefined) details.item_id = result.itemId;
+                this.queueEvent('answer', module, details);
+            }
+
             // Update overall progress
             this.data.overallProgress.activitiesCompleted++;
             if (result.correct) {
@@ -169,6 +212,116 @@
             this.saveProgress();
         }
 
+        /**
+         * Queue a learning event for the server's progress log
+         * (card_view, answer, module_complete); kept until a sync succeeds
+         */
+        queueEvent(type, module, details = {}) {
+            if (!window.authService || !window.authService.isAuthenticated()) return;
+
+            const serverModule = SERVER_MODULES[module] || module;
+            const now = Date.now();
+            // Time since the previous event in the same module counts as time spent there
+            let seconds = 0;
+            if (this.lastEvent && this.lastEvent.module === serverModule) {
+                seconds = Math.min(MAX_EVENT_GAP, (now - this.lastEvent.at) / 1000);
+            }
+            this.lastEvent = { module: serverModule, at: now };
+
+            // The key lets the server drop an event it already has when a
+            // sync is retried after a lost response
+            const key = window.crypto && window.crypto.randomUUID
+                ? window.crypto.randomUUID()
+                : `${now.toString(36)}-${Math.random().toString(36).slice(2)}`;
+            this.pendingEvents.push({ type, module: serverModule, seconds, at: now / 1000, key, ...details });
+            this.saveQueue();
+
+            if (type === 'module_complete' || this.pendingEvents.length >= MAX_EVENT_BATCH) {
+                this.syncEvents();
+            }
+        }
+
+        saveQueue() {
+            try {
+                localStorage.setItem(this.queueKey, JSON.stringify(this.pendingEvents));
+            } catch (error) {
+                console.error('Error saving progress queue:', error);
+            }
+        }
+
+        /**
+         * Upload queued events and apply the server's state delta. Events
+         * stay queued until acknowledged; resending them is harmless
+         */
+        async syncEvents(keepalive = false) {
+            if (this.syncing || this.pendingEvents.length === 0 || !window.authService) return;
+            this.syncing = true;
+            try {
+                while (this.pendingEvents.length > 0) {
+                    const events = this.pendingEvents.slice(0, keepalive ? MAX_KEEPALIVE_BATCH : MAX_EVENT_BATCH);
+                    const response = await fetch(SYNC_ENDPOINT, {
+                        method: 'POST',
+                        headers: window.authService.getAuthHeaders(),
+                        body: JSON.stringify({
+                            events,
+                            cursor: Number(localStorage.getItem(this.cursorKey)) || 0,
+                            utc_offset_minutes: -new Date().getTimezoneOffset()
+                        }),
+                        keepalive
+                    });
+                    // Server errors and expired sessions: keep the queue for later
+                    if (response.status >= 500 || response.status === 401) return;
+                    if (response.status === 422) {
+                        // Drop just the events that failed validation and resend the rest
+                        const invalid = await this.invalidEventIndexes(response);
+                        if (invalid.size > 0) {
+                            this.pendingEvents = this.pendingEvents.filter((_, i) => !invalid.has(i));
+                            this.saveQueue();
+                            continue;
+                        }
+                    }
+                    // Other rejections would fail again; drop those events. A
+                    // successful sync recorded every event but those in
+                    // result.rejected (unknown modules), which would fail again too
+                    this.pendingEvents.splice(0, events.length);
+                    this.saveQueue();
+                    if (response.ok) {
+                        const result = await response.json();
+                        if (result.rejected && result.rejected.length > 0) {
+                            console.warn('Progress events rejected by the server:', result.rejected);
+                        }
+                        localStorage.setItem(this.cursorKey, String(result.state.cursor));
+                        window.dispatchEvent(new CustomEvent('serverProgressUpdate', { detail: result }));
+                    }
+                    if (keepalive) return;
+                }
+            } catch (error) {
+                console.error('Error syncing progress:', error);
+            } finally {
+                this.syncing = false;
+            }
+        }
+
+        /**
+         * Positions in the sent batch of events a 422 response points at
+         * (validation errors are located as body.events.<index>)
+         */
+        async invalidEventIndexes(response) {
+            const invalid = new Set();
+            try {
+                const body = await response.json();
+                for (const error of Array.isArray(body.detail) ? body.detail : []) {
+                    const loc = error.loc || [];
+                    if (loc[0] === 'body' && loc[1] === 'events' && Number.isInteger(loc[2])) {
+                        invalid.add(loc[2]);
+                    }
+                }
+            } catch (error) {
+                console.error('Error reading sync rejection:', error);
+            }
+            return invalid;
+        }
+
         /**
          * Record flashcard activity
          */
@@ -0,0 +1,126 @@
+/**
+ * Push Service
+ * Follows the server's event stream (/api/push/stream) and re-dispatches
+ * its events on window: pushProgress, pushAchievement, pushStanding and
+ * pushLeaderboard
+ */
+
+(function (window) {
+  "use strict";
+
+  const STREAM_ENDPOINT = "/api/push/stream";
+  // Reconnect delays (ms): the server's retry hint after a clean end,
+  // doubling from it after failures up to the maximum
+  const DEFAULT_RETRY = 3000;
+  const MAX_RETRY = 60000;
+
+  const EVENTS = {
+    progress: "pushProgress",
+    achievement: "pushAchievement",
+    standing: "pushStanding",
+    leaderboard: "pushLeaderboard",
+  };
+
+  class PushService {
+    constructor() {
+      this.controller = null;
+      this.retry = DEFAULT_RETRY;
+      this.failures = 0;
+      this.timer = null;
+    }
+
+    /**
+     * Open the stream (EventSource cannot send the bearer token, so the
+     * stream is read with fetch)
+     */
+    start() {
+      this.stop();
+      if (!window.ReadableStream || !window.authService || !window.authService.isAuthenticated()) {
+        return;
+      }
+      this.controller = new AbortController();
+      this.connect(this.controller);
+    }
+
+    stop() {
+      clearTimeout(this.timer);
+      this.timer = null;
+      if (this.controller) {
+        this.controller.abort();
+        this.controller = null;
+      }
+    }
+
+    async connect(controller) {
+      let delay = null;
+      try {
+        const response = await fetch(STREAM_ENDPOINT, {
+          headers: window.authService.getAuthHeaders(),
+          signal: controller.signal,
+        });
+        if (response.status === 401) {
+          // Signed out or token expired: the next sign-in starts it again
+          this.controller = null;
+          return;
+        }
+        if (!response.ok) {
+          const retryAfter = parseInt(response.headers.get("Retry-After"), 10);
+          if (retryAfter > 0) delay = retryAfter * 1000;
+          throw new Error(`Event stream unavailable (${response.status})`);
+        }
+        this.failures = 0;
+        await this.read(response.body.getReader());
+      } catch (error) {
+        if (controller.signal.aborted) return;
+        this.failures += 1;
+        console.warn("Event stream interrupted:", error);
+      }
+      if (controller !== this.controller) return;
+      if (delay === null) {
+        delay = Math.min(this.retry * 2 ** this.failures, MAX_RETRY);
+      }
+      // Jitter keeps a restarted server from getting every client at once
+      delay = delay * (0.5 + Math.random());
+      this.timer = setTimeout(() => this.connect(controller), delay);
+    }
+
+    async read(reader) {
+      const decoder = new TextDecoder();
+      let buffer = "";
+      for (;;) {
+        const { done, value } = await reader.read();
+        if (done) return;
+        buffer += decoder.decode(value, { stream: true });
+        let end;
+        while ((end = buffer.indexOf("\n\n")) >= 0) {
+          this.handle(buffer.slice(0, end));
+          buffer = buffer.slice(end + 2);
+        }
+      }
+    }
+
+    handle(block) {
+      let event = "message";
+      const data = [];
+      block.split("\n").forEach((line) => {
+        if (line.startsWith(":")) return;
+        const colon = line.indexOf(":");
+        const field = colon >= 0 ? line.slice(0, colon) : line;
+        const value = colon >= 0 ? line.slice(colon + 1).replace(/^ /, "") : "";
+        if (field === "event") event = value;
+        else if (field === "data") data.push(value);
+        else if (field === "retry" && /^\d+$/.test(value)) this.retry = parseInt(value, 10);
+      });
+      if (!data.length || !EVENTS[event]) return;
+      try {
+        window.dispatchEvent(
+          new CustomEvent(EVENTS[event], { detail: JSON.parse(data.join("\n")) }),
+        );
+      } catch (error) {
+        console.warn("Bad push event:", error);
+      }
+    }
+  }
+
+  window.PushService = PushService;
+})(window);